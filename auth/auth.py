@@ -1,9 +1,9 @@
 import hashlib
-import json
-import os
 import secrets
 import stat
+import threading
 import time
+from typing import Dict, Optional
 
 import bcrypt
 
@@ -11,26 +11,59 @@ from gui.config import cfg
 from models.auth_model import AuthRespModel, UserLoginModel, UserRegModel
 
 from .limiter import RateLimiter
+from .store import UserStore, open_user_store
+
+# Hashes checked for unknown usernames, one per bcrypt cost (made once)
+_dummy_hashes: Dict[int, bytes] = {}
+_dummy_lock = threading.Lock()
+
+
+def dummy_hash(rounds: int) -> bytes:
+    """bcrypt hash of nothing real at given cost, so a login of unknown user
+    costs one bcrypt check like any other"""
+    with _dummy_lock:
+        if rounds not in _dummy_hashes:
+            _dummy_hashes[rounds] = bcrypt.hashpw(
+                secrets.token_bytes(32), bcrypt.gensalt(rounds=rounds)
+            )
+        return _dummy_hashes[rounds]
 
 
 class AuthManager:
     def __init__(self):
-        self.db_path = cfg.config_dir / "users.json"
+        self.store: UserStore = open_user_store(cfg.config_dir)
         self.rate_limiter = RateLimiter()
-        self._ensure_db_exists()
 
-    def _ensure_db_exists(self):
-        try:
-            if not self.db_path.exists():
-                with open(self.db_path, "w") as f:
-                    json.dump({}, f)
-                # Set admin rights 600 rw (only for Linux / MacOS and etc.)
-                if os.name != "nt":
-                    self.db_path.chmod(stat.S_IRUSR | stat.S_IWUSR)
-        except OSError as e:
-            print(f"Error creating DB: {e}")
+        # Pepper is read once and kept in memory
+        self._lock = threading.Lock()
+        self._pepper: Optional[str] = None
+        # bcrypt cost of unknown usernames (read from the store once)
+        self._dummy_rounds: Optional[int] = None
+
+    # Make dummy hash in background (login window start), so the first failed
+    # login doesn't pay for it
+    def warm_up(self):
+        threading.Thread(
+            target=lambda: dummy_hash(self.dummy_rounds()), daemon=True
+        ).start()
+
+    # Cost most stored hashes have, so an unknown username costs as much as a
+    # real one whatever BCRYPT_ROUNDS is now (settings default if no users)
+    def dummy_rounds(self) -> int:
+        with self._lock:
+            if self._dummy_rounds is None:
+                self._dummy_rounds = (
+                    self.store.common_hash_cost() or cfg.data.BCRYPT_ROUNDS
+                )
+            return self._dummy_rounds
 
     def _get_pepper(self) -> str:
+        with self._lock:
+            if self._pepper is None:
+                self._pepper = self._load_pepper()
+            return self._pepper
+
+    def _load_pepper(self) -> str:
         pepper_path = cfg.config_dir / cfg.data.PEPPER_PATH
 
         if not pepper_path.exists():
@@ -49,54 +82,88 @@ class AuthManager:
         with open(pepper_path, "r") as f:
             return f.read().strip()
 
-    def register_user(self, user_data: UserRegModel) -> AuthRespModel:
-        try:
-            if self.db_path.exists():
-                with open(self.db_path, "r") as f:
-                    try:
-                        users = json.load(f)
-                    except json.JSONDecodeError:
-                        users = {}
-            else:
-                users = {}
-
-            if user_data.username in users:
-                return AuthRespModel(
-                    success=False,
-                    message="This username already exist",
-                    lockout_time=None,
-                    remaining_attempts=None,
-                )
-
-            pepper = self._get_pepper()
-            salted_input = user_data.password + pepper
+    # SHA-256 pre-hash (password + pepper), then bcrypt
+    def hash_password(self, password: str, rounds: Optional[int] = None) -> str:
+        salted_input = password + self._get_pepper()
+        pre_hash = hashlib.sha256(salted_input.encode("utf-8")).hexdigest()
+        hashed = bcrypt.hashpw(
+            pre_hash.encode("utf-8"),
+            bcrypt.gensalt(rounds=rounds or cfg.data.BCRYPT_ROUNDS),
+        )
+        return hashed.decode("utf-8")
 
-            # SHA-256 pre-hash
-            pre_hash = hashlib.sha256(salted_input.encode("utf-8")).hexdigest()
+    # Cost of bcrypt hash ($2b$<cost>$...) / None if not a bcrypt hash
+    @staticmethod
+    def hash_rounds(hashed: str) -> Optional[int]:
+        try:
+            return int(hashed.split("$")[2])
+        except (IndexError, ValueError):
+            return None
+
+    # Rehash stored password in background if its cost differs from
+    # BCRYPT_ROUNDS of loaded settings. Only for a password that has just
+    # passed verify_user(). Returns the started thread (None if up to date)
+    def rehash_if_needed(
+        self, username: str, password: str
+    ) -> Optional[threading.Thread]:
+        user = self.store.get(username)
+        rounds = cfg.data.BCRYPT_ROUNDS
+        if user is None or self.hash_rounds(user["hash"]) == rounds:
+            return None
+
+        def rehash():
+            try:
+                new_hash = self.hash_password(password, rounds)
+                if self.store.replace_hash(username, user["hash"], new_hash):
+                    print(f"Password hash of {username} upgraded to cost {rounds}")
+            except Exception as e:
+                print(f"Password rehash failed: {e}")
+
+        # Not a daemon: the process waits for the write at exit
+        thread = threading.Thread(target=rehash, name="bcrypt-rehash")
+        thread.start()
+        return thread
+
+    # Check password against stored bcrypt hash (no rate limit)
+    def check_password(self, password: str, hashed: str) -> bool:
+        salted_input = password + self._get_pepper()
+        pre_hash = hashlib.sha256(salted_input.encode("utf-8")).hexdigest()
+        return bcrypt.checkpw(pre_hash.encode("utf-8"), hashed.encode("utf-8"))
+
+    # Replace stored fields of exist user (hash, vault_salt and etc.)
+    def update_user(self, username: str, **fields):
+        self.store.update(username, **fields)
+
+    # Stored vault salt of the user (hex) / None if no such user. Not a secret
+    # (auth/login.py derives the vault key with it while bcrypt runs)
+    def get_vault_salt(self, username: str) -> Optional[str]:
+        user = self.store.get(username)
+        return user["vault_salt"] if user else None
+
+    @staticmethod
+    def _user_exists() -> AuthRespModel:
+        return AuthRespModel(
+            success=False,
+            message="This username already exist",
+            lockout_time=None,
+            remaining_attempts=None,
+        )
 
-            # Bcrypt hash
-            hashed = bcrypt.hashpw(
-                pre_hash.encode("utf-8"),
-                bcrypt.gensalt(rounds=cfg.data.BCRYPT_ROUNDS),
-            )
+    def register_user(self, user_data: UserRegModel) -> AuthRespModel:
+        try:
+            if self.store.get(user_data.username) is not None:
+                return self._user_exists()
 
             vault_salt = secrets.token_hex(32)
-
-            users[user_data.username] = {
-                "hash": hashed.decode("utf-8"),
+            user = {
+                "hash": self.hash_password(user_data.password),
                 "vault_salt": vault_salt,
                 "created_at": time.time(),
             }
 
-            # Atomic write
-            temp_path = self.db_path.with_suffix(".tmp")
-            with open(temp_path, "w") as f:
-                json.dump(users, f, indent=4)
-
-            if os.name != "nt":
-                os.chmod(temp_path, stat.S_IRUSR | stat.S_IWUSR)
-
-            os.replace(temp_path, self.db_path)
+            # Name may have been taken while bcrypt was running
+            if not self.store.add(user_data.username, user):
+                return self._user_exists()
 
             return AuthRespModel(
                 success=True,
@@ -122,22 +189,14 @@ class AuthManager:
             return rate_response
 
         try:
-            # Protection from timing attack (additional hash verification)
-            target_hash = None
-            user_found = False
-            users = {}
-
-            if self.db_path.exists():
-                with open(self.db_path, "r") as f:
-                    users = json.load(f)
-                    if login_data.username in users:
-                        target_hash = users[login_data.username]["hash"].encode("utf-8")
-                        user_found = True
-
-            # If user not exist, use fake hash (fool hash)
-            if not target_hash:
-                fake_salt = bcrypt.gensalt(rounds=cfg.data.BCRYPT_ROUNDS)
-                target_hash = bcrypt.hashpw(b"dummy_password", fake_salt)
+            # Protection from timing attack: unknown user is checked against
+            # precomputed dummy hash, so both cost one bcrypt check
+            user_data = self.store.get(login_data.username)
+            user_found = user_data is not None
+            if user_found:
+                target_hash = user_data["hash"].encode("utf-8")
+            else:
+                target_hash = dummy_hash(self.dummy_rounds())
 
             pepper = self._get_pepper()
             salted_input = login_data.password + pepper
@@ -152,8 +211,7 @@ class AuthManager:
             if user_found and is_valid:
                 self.rate_limiter.clear_attempts(login_data.username)
 
-                user_data = users.get(login_data.username, {})
-                vault_salt = user_data.get("vault_salt")
+                vault_salt = user_data["vault_salt"] or None
 
                 return AuthRespModel(
                     success=True,
@@ -1,64 +1,88 @@
-import threading
 import time
-from typing import Any, Dict, Tuple
+from pathlib import Path
+from typing import Optional, Tuple
 
 from gui.config import cfg
 from models.auth_model import AuthRespModel
 
+from .store import USERS_DB, SqliteDatabase
+
+"""
+Explanation:
+    Failed login attempts live in the login_attempts table of users.db, so a
+    lockout survives restarts and holds for every process on the machine.
+    Each row is kept until CLEANUP_INTERVAL or LOCKOUT_DURATION (the longer)
+    after the last failed attempt, so a lockout always runs out in full and
+    attempts are counted until there is a quiet period that long. Rows are kept
+    ordered by expiry (index), every write removes at most EXPIRE_BATCH of
+    the oldest expired ones, so cleanup is spread over calls (each row is
+    removed once, O(1) amortized) instead of rebuilding the whole table.
+    Expired rows that are still there are ignored on reads.
+"""
+
+EXPIRE_BATCH = 64  # Expired rows removed per write
+
 
 class RateLimiter:
-    def __init__(self):
-        self.failed_attempts: Dict[
-            str, Dict[str, Any]
-        ] = {}  # Failed attempts. Key = username, Arg = count / first_attempt / last_attempt
-        self.lock = threading.RLock()  # Reentrant lock
-        self.last_cleanup = time.time()  # Last cleanup time
-
-    # Old entries cleanup
-    def _cleanup_old_entries(self):
-        current_time = time.time()
-        if current_time - self.last_cleanup >= cfg.data.CLEANUP_INTERVAL:
-            with self.lock:
-                # Work with failed attempts count
-                self.failed_attempts = {
-                    username: data
-                    for username, data in self.failed_attempts.items()
-                    if current_time - data["first_attempt"] < cfg.data.CLEANUP_INTERVAL
-                }
-                self.last_cleanup = current_time
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db = SqliteDatabase(
+            db_path or cfg.config_dir / USERS_DB,
+            [
+                "CREATE TABLE IF NOT EXISTS login_attempts ("
+                " username TEXT PRIMARY KEY,"
+                " count INTEGER NOT NULL,"
+                " first_attempt REAL NOT NULL,"
+                " last_attempt REAL NOT NULL,"
+                " expires_at REAL NOT NULL"
+                ") WITHOUT ROWID",
+                "CREATE INDEX IF NOT EXISTS login_attempts_expiry"
+                " ON login_attempts (expires_at)",
+            ],
+        )
+
+    # Remove a batch of the oldest expired entries (inside write transaction)
+    @staticmethod
+    def _expire(conn, current_time: float):
+        conn.execute(
+            "DELETE FROM login_attempts WHERE username IN ("
+            " SELECT username FROM login_attempts WHERE expires_at <= ?"
+            " ORDER BY expires_at LIMIT ?)",
+            (current_time, EXPIRE_BATCH),
+        )
 
     # Check limits
     def check_rate_limit(self, username: str) -> Tuple[bool, AuthRespModel]:
-        self._cleanup_old_entries()
         current_time = time.time()
-
-        with self.lock:
-            if username in self.failed_attempts:
-                attempts_data = self.failed_attempts[username]
-
-                time_passed = current_time - attempts_data["last_attempt"]
-
-                if time_passed < cfg.data.LOCKOUT_DURATION:
-                    if attempts_data["count"] >= cfg.data.MAX_LOGIN_ATTEMPTS:
-                        remaining_time = int(cfg.data.LOCKOUT_DURATION - time_passed)
-                        return False, AuthRespModel(
-                            success=False,
-                            message=f"Too many failed attempts. Try again in {remaining_time} seconds.",
-                            lockout_time=remaining_time,
-                            remaining_attempts=0,
-                        )
-
-                    # Limited access
-                    else:
-                        remaining_attempts = (
-                            cfg.data.MAX_LOGIN_ATTEMPTS - attempts_data["count"]
-                        )
-                        return True, AuthRespModel(
-                            success=True,
-                            message="Proceed",
-                            lockout_time=None,
-                            remaining_attempts=remaining_attempts,
-                        )
+        attempts_data = self.db.conn.execute(
+            "SELECT count, last_attempt FROM login_attempts"
+            " WHERE username = ? AND expires_at > ?",
+            (username, current_time),
+        ).fetchone()
+
+        if attempts_data is not None:
+            time_passed = current_time - attempts_data["last_attempt"]
+
+            if time_passed < cfg.data.LOCKOUT_DURATION:
+                if attempts_data["count"] >= cfg.data.MAX_LOGIN_ATTEMPTS:
+                    remaining_time = int(cfg.data.LOCKOUT_DURATION - time_passed)
+                    return False, AuthRespModel(
+                        success=False,
+                        message=f"Too many failed attempts. Try again in {remaining_time} seconds.",
+                        lockout_time=remaining_time,
+                        remaining_attempts=0,
+                    )
+
+                # Limited access
+                else:
+                    remaining_attempts = (
+                        cfg.data.MAX_LOGIN_ATTEMPTS - attempts_data["count"]
+                    )
+                    return True, AuthRespModel(
+                        success=True,
+                        message="Proceed",
+                        lockout_time=None,
+                        remaining_attempts=remaining_attempts,
+                    )
 
         # Full access
         return True, AuthRespModel(
@@ -68,42 +92,54 @@ class RateLimiter:
             lockout_time=None,
         )
 
-    # Record failed attempt
+    # Record failed attempt (one statement, so parallel logins can't lose a
+    # count; an expired entry starts over)
     def rec_failed_attempt(self, username: str) -> AuthRespModel:
         current_time = time.time()
-
-        with self.lock:
-            if username not in self.failed_attempts:
-                self.failed_attempts[username] = {
-                    "count": 0,
-                    "first_attempt": current_time,
-                    "last_attempt": current_time,
-                }
-
-            data = self.failed_attempts[username]
-            data["count"] += 1
-            data["last_attempt"] = current_time
-
-            remaining_attempts = cfg.data.MAX_LOGIN_ATTEMPTS - data["count"]
-
-            if data["count"] >= cfg.data.MAX_LOGIN_ATTEMPTS:
-                lockout_time = cfg.data.LOCKOUT_DURATION
-                return AuthRespModel(
-                    success=False,
-                    message=f"Sorry, your account locked due to too many failed attempts. Try again in {lockout_time} second.",
-                    remaining_attempts=0,
-                    lockout_time=lockout_time,
-                )
-
-            else:
-                return AuthRespModel(
-                    success=False,
-                    message=f"Invalid credentials. {remaining_attempts} attempts remaining.",
-                    remaining_attempts=remaining_attempts,
-                    lockout_time=None,
-                )
+        # Row outlives the lockout it may start
+        keep = max(cfg.data.CLEANUP_INTERVAL, cfg.data.LOCKOUT_DURATION)
+
+        with self.db.transaction() as conn:
+            self._expire(conn, current_time)
+            count = conn.execute(
+                "INSERT INTO login_attempts"
+                " (username, count, first_attempt, last_attempt, expires_at)"
+                " VALUES (:username, 1, :now, :now, :expires_at)"
+                " ON CONFLICT (username) DO UPDATE SET"
+                "  count = CASE WHEN expires_at > :now THEN count + 1 ELSE 1 END,"
+                "  first_attempt = CASE WHEN expires_at > :now"
+                "   THEN first_attempt ELSE :now END,"
+                "  expires_at = MAX(expires_at, :expires_at),"
+                "  last_attempt = :now"
+                " RETURNING count",
+                {
+                    "username": username,
+                    "now": current_time,
+                    "expires_at": current_time + keep,
+                },
+            ).fetchone()["count"]
+
+        remaining_attempts = cfg.data.MAX_LOGIN_ATTEMPTS - count
+
+        if count >= cfg.data.MAX_LOGIN_ATTEMPTS:
+            lockout_time = cfg.data.LOCKOUT_DURATION
+            return AuthRespModel(
+                success=False,
+                message=f"Sorry, your account locked due to too many failed attempts. Try again in {lockout_time} second.",
+                remaining_attempts=0,
+                lockout_time=lockout_time,
+            )
+
+        else:
+            return AuthRespModel(
+                success=False,
+                message=f"Invalid credentials. {remaining_attempts} attempts remaining.",
+                remaining_attempts=remaining_attempts,
+                lockout_time=None,
+            )
 
     # Cleanup if success auth
     def clear_attempts(self, username: str):
-        with self.lock:
-            self.failed_attempts.pop(username, None)
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM login_attempts WHERE username = ?", (username,))
+            self._expire(conn, time.time())
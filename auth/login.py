@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from crypto.crypto import CryptoManager
+from gui.config import cfg
+from keys.vault import VaultManager
+from models.auth_model import AuthRespModel, UserLoginModel
+
+from .auth import AuthManager
+
+"""
+Explanation:
+    Login pipeline: password check and vault unlock in one call, meant to run
+    off the UI thread. The vault key derivation (PBKDF2 / scrypt / Argon2) is
+    started together with the bcrypt check, both release the GIL, so the
+    unlock costs about the longer of the two instead of their sum:
+        bcrypt check      |==========|
+        vault key (KDF)   |=======|
+        vault open                   |=|
+    Only the vault's stored metadata is read for it, the store is opened (and
+    its journal replayed) after the check. Unknown users get the same
+    derivation over a dummy salt, so the answer time doesn't tell whether the
+    account exists; locked accounts get none. The derived key is wiped if the
+    check fails. User's settings are loaded only after a successful check; if
+    the stored bcrypt cost differs from their BCRYPT_ROUNDS, the password is
+    rehashed in background.
+"""
+
+STAGE_VERIFY = "verify"  # bcrypt check (vault key is derived meanwhile)
+STAGE_UNLOCK = "unlock"  # Settings are loaded, vault is opened
+
+
+@dataclass
+class LoginResult:
+    """Auth response and the unlocked vault (None if login failed)"""
+
+    response: AuthRespModel
+    vault: Optional[VaultManager] = None
+
+
+def login(
+    auth_manager: AuthManager,
+    login_data: UserLoginModel,
+    progress: Optional[Callable[[str], None]] = None,
+) -> LoginResult:
+    """Verify user and unlock the vault (vault errors are raised)"""
+    username, password = login_data.username, login_data.password
+    salt_hex = auth_manager.get_vault_salt(username)
+    can_proceed, _ = auth_manager.rate_limiter.check_rate_limit(username)
+
+    if progress:
+        progress(STAGE_VERIFY)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        derived = None
+        if salt_hex and can_proceed:
+            derived = pool.submit(
+                VaultManager.derive_slot_key,
+                username,
+                password,
+                bytes.fromhex(salt_hex),
+            )
+        elif can_proceed:
+            derived = pool.submit(_dummy_derivation, password)
+        response = auth_manager.verify_user(login_data)
+        password_key = _result(derived)
+
+    if not response.success or response.vault_salt != salt_hex:
+        if password_key is not None:
+            password_key.wipe()
+        if not response.success:
+            return LoginResult(response)
+        password_key = None  # Salt changed meanwhile (password change)
+
+    if progress:
+        progress(STAGE_UNLOCK)
+    cfg.load_user_config(username)
+    if password_key is not None:
+        vault = VaultManager.unlock_with(username, password_key)
+    else:
+        salt = bytes.fromhex(response.vault_salt) if response.vault_salt else None
+        vault = VaultManager.unlock(username, password, salt)
+
+    # After the unlock, so it doesn't compete with it for CPU
+    auth_manager.rehash_if_needed(username, password)
+    return LoginResult(response, vault)
+
+
+def _dummy_derivation(password: str) -> None:
+    """Key derivation of an unknown user (configured KDF, random salt)"""
+    CryptoManager(password, os.urandom(cfg.data.SALT_SIZE)).wipe()
+
+
+def _result(derived: Optional[Future]) -> Optional[CryptoManager]:
+    """Speculative key / None if it wasn't started or failed (the vault is
+    unlocked the usual way then, so its error is reported there)"""
+    if derived is None:
+        return None
+    try:
+        return derived.result()
+    except Exception as e:
+        print(f"Vault key derivation failed: {e}")
+        return None
@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+import stat
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+"""
+Explanation:
+    User records (bcrypt hash, vault salt, creation time) behind a small
+    interface, so AuthManager doesn't depend on the storage:
+        get(username)          -> record dict / None
+        add(username, record)  -> False if the username is taken
+        update(username, ...)  -> ValueError if there is no such user
+        replace_hash(...)      -> False if the hash isn't the expected one
+        common_hash_cost()     -> most common bcrypt cost / None if no users
+    SqliteUserStore keeps them in users.db: one row per user, primary key on
+    username, WAL mode so logins read while another process writes, busy
+    timeout instead of "database is locked" errors. Every thread has its own
+    connection (SqliteDatabase, also used by the login rate limiter). Early
+    users.json is imported on first open and kept renamed as
+    users.json.migrated.
+"""
+
+USERS_DB = "users.db"
+USERS_JSON = "users.json"
+FIELDS = ("hash", "vault_salt", "created_at")
+BUSY_TIMEOUT = 10.0  # Seconds to wait for a write lock of other process
+
+
+class UserStore(ABC):
+    """Storage of user records"""
+
+    @abstractmethod
+    def get(self, username: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def add(self, username: str, record: dict) -> bool: ...
+
+    @abstractmethod
+    def update(self, username: str, **fields): ...
+
+    @abstractmethod
+    def replace_hash(self, username: str, old_hash: str, new_hash: str) -> bool: ...
+
+    @abstractmethod
+    def common_hash_cost(self) -> Optional[int]: ...
+
+    def close(self):
+        pass
+
+
+class SqliteDatabase:
+    """SQLite file shared by processes: WAL mode, connection per thread"""
+
+    def __init__(self, db_path: Path, schema: Iterable[str] = ()):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        # rw------- rights before SQLite creates the file
+        if not db_path.exists():
+            os.close(os.open(db_path, os.O_WRONLY | os.O_CREAT, 0o600))
+            try:
+                db_path.chmod(stat.S_IRUSR | stat.S_IWUSR)
+            except OSError:  # For Windows and etc.
+                pass
+
+        with self.transaction() as conn:
+            for statement in schema:
+                conn.execute(statement)
+
+    # Connection of the current thread (opened on first use)
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path, timeout=BUSY_TIMEOUT, isolation_level=None
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # Durable with WAL
+            self._local.conn = conn
+        return conn
+
+    # Write transaction (lock is taken at start, so read-then-write is atomic
+    # across processes)
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class SqliteUserStore(SqliteDatabase, UserStore):
+    """User records in SQLite database (WAL mode)"""
+
+    def __init__(self, db_path: Path):
+        super().__init__(
+            db_path,
+            [
+                "CREATE TABLE IF NOT EXISTS users ("
+                " username TEXT PRIMARY KEY,"
+                " hash TEXT NOT NULL,"
+                " vault_salt TEXT NOT NULL DEFAULT '',"
+                " created_at REAL NOT NULL DEFAULT 0"
+                ") WITHOUT ROWID"
+            ],
+        )
+
+    def get(self, username: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT hash, vault_salt, created_at FROM users WHERE username = ?",
+            (username,),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def add(self, username: str, record: dict) -> bool:
+        try:
+            with self.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO users (username, hash, vault_salt, created_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (
+                        username,
+                        record["hash"],
+                        record.get("vault_salt") or "",
+                        record.get("created_at") or 0,
+                    ),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def update(self, username: str, **fields):
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown user fields: {', '.join(sorted(unknown))}")
+        if not fields:
+            return
+
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE users SET {columns} WHERE username = ?",
+                (*fields.values(), username),
+            )
+            if cursor.rowcount == 0:
+                raise ValueError(f"User {username} does not exist")
+
+    # Compare-and-swap: False if the hash was changed meanwhile (password
+    # change), so a late rehash can't bring an old password back
+    def replace_hash(self, username: str, old_hash: str, new_hash: str) -> bool:
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE users SET hash = ? WHERE username = ? AND hash = ?",
+                (new_hash, username, old_hash),
+            )
+            return cursor.rowcount == 1
+
+    # Cost of the bcrypt hashes ($2b$<cost>$...) most users have, newest
+    # first on a tie. Unknown usernames are checked at this cost
+    def common_hash_cost(self) -> Optional[int]:
+        row = self.conn.execute(
+            "SELECT substr(hash, 5, 2) AS cost FROM users"
+            " GROUP BY cost ORDER BY COUNT(*) DESC, MAX(created_at) DESC LIMIT 1"
+        ).fetchone()
+        if row is None or not row["cost"].isdigit():
+            return None
+        return int(row["cost"])
+
+    def migrate_json(self, json_path: Path) -> int:
+        """Import users.json (existing usernames are kept) and rename it.
+        Returns imported count"""
+        try:
+            with open(json_path, "r") as f:
+                users = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except ValueError as e:
+            print(f"Users file {json_path} can't be migrated: {e}")
+            return 0
+
+        with self.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (username, hash, vault_salt, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        username,
+                        user["hash"],
+                        user.get("vault_salt") or "",
+                        user.get("created_at") or 0,
+                    )
+                    for username, user in users.items()
+                    if isinstance(user, dict) and user.get("hash")
+                ],
+            )
+            imported = conn.total_changes - before
+
+        # Import is idempotent: if other process renamed it first, nothing lost
+        try:
+            json_path.replace(json_path.with_name(json_path.name + ".migrated"))
+        except FileNotFoundError:
+            pass
+        return imported
+
+
+def open_user_store(config_dir: Path) -> UserStore:
+    """User store of the config directory (users.json is migrated if found)"""
+    store = SqliteUserStore(config_dir / USERS_DB)
+    json_path = config_dir / USERS_JSON
+    if json_path.exists():
+        imported = store.migrate_json(json_path)
+        print(f"Migrated {imported} users from {json_path.name} to {USERS_DB}")
+    return store
@@ -0,0 +1,322 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bcrypt  # noqa: E402
+
+from crypto.crypto import CryptoManager  # noqa: E402
+from crypto.kdf import (  # noqa: E402
+    KDF_PBKDF2,
+    KdfParams,
+    available_kdfs,
+    default_params,
+)
+from crypto.secret import SecretBuffer  # noqa: E402
+from gui.config import cfg  # noqa: E402
+from keys.store import open_store  # noqa: E402
+from keys.vault import VaultManager, vault_path  # noqa: E402
+from models.vault_model import VaultEntryModel  # noqa: E402
+
+"""
+Explanation:
+    Offline benchmark suite of the crypto primitives and vault storage:
+        kdf     : CryptoManager._derive_key for every available KDF (settings)
+        cipher  : encrypt_data / decrypt_data of one field
+        bcrypt  : bcrypt.hashpw for each cost in --bcrypt-rounds
+        vault   : VaultManager save (add all + compact), load (open + unlock)
+                  and decrypt of all entries, for each size in --sizes
+    Every case records ops/sec, latency percentiles and peak Python memory
+    (tracemalloc, measured on the warm-up run, so timed runs aren't traced).
+    Results go to a JSON file; with --baseline they are compared against an
+    earlier results file and the exit code is 1 if any case is slower (ops/sec)
+    or bigger (peak memory) than --tolerance allows:
+        python bench/suite.py --output bench/baseline.json
+        python bench/suite.py --baseline bench/baseline.json
+    Vaults are created in a temp directory, the user's vaults aren't touched.
+"""
+
+GROUPS = ("kdf", "cipher", "bcrypt", "vault")
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+PASSWORD = "Bench-Password-1"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    index = max(0, min(len(values) - 1, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+def run_case(
+    func: Callable[[], object],
+    repeat: int,
+    ops: int = 1,
+    setup: Optional[Callable[[], None]] = None,
+    teardown: Optional[Callable[[], None]] = None,
+) -> dict:
+    """Warm-up (traced) run, then timed runs. ops is operations per func call
+    (entries of a vault), latency is per call"""
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    if teardown:
+        teardown()
+
+    latencies = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+        if teardown:
+            teardown()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "repeat": repeat,
+        "ops_per_call": ops,
+        "ops_per_sec": round(ops * repeat / total, 2) if total else 0.0,
+        "mean_ms": round(total / repeat * 1e3, 4),
+        "p50_ms": round(percentile(latencies, 50) * 1e3, 4),
+        "p90_ms": round(percentile(latencies, 90) * 1e3, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1e3, 4),
+        "max_ms": round(latencies[-1] * 1e3, 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def bench_kdf(repeat: int) -> Dict[str, dict]:
+    results = {}
+    manager = CryptoManager.__new__(CryptoManager)
+    manager.salt = os.urandom(cfg.data.SALT_SIZE)
+    with SecretBuffer(PASSWORD) as password:
+        for name in available_kdfs():
+            manager.kdf_params = default_params(name)
+            results[f"kdf/{name}"] = run_case(
+                lambda: manager._derive_key(password).wipe(), repeat
+            )
+    return results
+
+
+def bench_cipher(repeat: int, size: int) -> Dict[str, dict]:
+    crypto = CryptoManager.from_key(CryptoManager.generate_key())
+    data = "x" * size
+    token = crypto.encrypt_data(data)
+    return {
+        f"cipher/encrypt_data/{size}B": run_case(
+            lambda: crypto.encrypt_data(data), repeat
+        ),
+        f"cipher/decrypt_data/{size}B": run_case(
+            lambda: crypto.decrypt_data(token), repeat
+        ),
+    }
+
+
+def bench_bcrypt(repeat: int, rounds_list: List[int]) -> Dict[str, dict]:
+    results = {}
+    for rounds in rounds_list:
+        results[f"bcrypt/hashpw/{rounds}"] = run_case(
+            lambda: bcrypt.hashpw(b"x" * 64, bcrypt.gensalt(rounds=rounds)), repeat
+        )
+    return results
+
+
+def bench_vault(repeat: int, sizes: List[int], workdir: Path) -> Dict[str, dict]:
+    results = {}
+    # Cheap password key: KDF cost is measured by the kdf group
+    password_key = CryptoManager(PASSWORD, kdf=KdfParams(KDF_PBKDF2, iterations=1000))
+
+    for size in sizes:
+        username = f"bench{size}"
+        entries = [
+            VaultEntryModel(
+                service=f"service-{i:06d}.example.com",
+                username=f"user{i}@example.com",
+                password=f"Pw-{i:06d}-secret!",
+                notes="" if i % 4 else f"Recovery codes {i}",
+            )
+            for i in range(size)
+        ]
+        state = {}
+
+        def remove_vault():
+            shutil.rmtree(workdir, ignore_errors=True)
+            workdir.mkdir()
+
+        def new_vault():
+            remove_vault()
+            state["vault"] = VaultManager(username, password_key)
+
+        def save():
+            state["vault"].add_entries(entries)
+            state["vault"].compact()
+
+        def close_vault():
+            state.pop("vault").close()
+
+        results[f"vault/save/{size}"] = run_case(
+            save, repeat, size, new_vault, close_vault
+        )
+
+        # Vault of the last save run stays for load / decrypt
+        new_vault()
+        save()
+        close_vault()
+
+        def load():
+            store = open_store(vault_path(username), cfg.data.VAULT_SHARDS)
+            state["vault"] = VaultManager(username, password_key, store)
+
+        results[f"vault/load/{size}"] = run_case(load, repeat, size, None, close_vault)
+
+        def decrypt_all():
+            vault = state["vault"]
+            encrypted = [vault.store.get(s) for s in vault.list_services()]
+            for entry in vault.decrypt_entries(encrypted):
+                if isinstance(entry, ValueError):
+                    raise entry
+
+        results[f"vault/decrypt_all/{size}"] = run_case(
+            decrypt_all, repeat, size, load, close_vault
+        )
+        remove_vault()
+    return results
+
+
+def environment() -> dict:
+    """Host and settings the results depend on"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "app_version": cfg.data.VERSION,
+        "kdf": cfg.data.KDF,
+        "cipher": cfg.data.CIPHER,
+        "crypto_workers": cfg.data.CRYPTO_WORKERS,
+        "vault_fsync": cfg.data.VAULT_FSYNC,
+        "vault_shards": cfg.data.VAULT_SHARDS,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Cases slower / bigger than baseline beyond tolerance (printed table)"""
+    regressions = []
+    if baseline.get("environment") != results["environment"]:
+        print("Warning: baseline was recorded on other host or settings")
+
+    print(f"\n{'case':<32} {'ops/s':>12} {'baseline':>12} {'change':>8} {'peak':>8}")
+    for name, case in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            print(f"{name:<32} {case['ops_per_sec']:>12.2f} {'-':>12}")
+            continue
+
+        speed = case["ops_per_sec"] / base["ops_per_sec"] - 1
+        memory = (case["peak_kib"] + 1) / (base["peak_kib"] + 1) - 1
+        flags = []
+        if speed < -tolerance:
+            flags.append("SLOWER")
+        if memory > tolerance:
+            flags.append("MEMORY")
+        if flags:
+            regressions.append(f"{name}: {', '.join(flags)}")
+        print(
+            f"{name:<32} {case['ops_per_sec']:>12.2f} {base['ops_per_sec']:>12.2f}"
+            f" {speed:>+8.1%} {memory:>+8.1%} {' '.join(flags)}"
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="hash.all benchmark suite")
+    parser.add_argument(
+        "--only", nargs="+", choices=GROUPS, default=list(GROUPS), help="Groups"
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Vault sizes"
+    )
+    parser.add_argument(
+        "--bcrypt-rounds",
+        nargs="+",
+        type=int,
+        default=sorted({10, 12, cfg.data.BCRYPT_ROUNDS}),
+        help="bcrypt costs",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument(
+        "--cipher-repeat", type=int, default=5000, help="Timed runs of field cases"
+    )
+    parser.add_argument("--field-size", type=int, default=64, help="Field bytes")
+    parser.add_argument("--output", type=Path, help="Write results JSON")
+    parser.add_argument("--baseline", type=Path, help="Compare with results JSON")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.15, help="Allowed change (0.15 = 15%%)"
+    )
+    args = parser.parse_args()
+
+    results = {"environment": environment(), "created_at": time.time(), "cases": {}}
+    cases = results["cases"]
+
+    def report(group: Dict[str, dict]):
+        for name, case in group.items():
+            print(
+                f"{name:<32} {case['ops_per_sec']:>12.2f} ops/s"
+                f"  p50 {case['p50_ms']:>10.3f} ms  p99 {case['p99_ms']:>10.3f} ms"
+                f"  peak {case['peak_kib']:>10.1f} KiB"
+            )
+        cases.update(group)
+
+    if "kdf" in args.only:
+        report(bench_kdf(args.repeat))
+    if "cipher" in args.only:
+        report(bench_cipher(args.cipher_repeat, args.field_size))
+    if "bcrypt" in args.only:
+        report(bench_bcrypt(args.repeat, args.bcrypt_rounds))
+    if "vault" in args.only:
+        # Vaults go to a temp dir instead of the user's vaults directory
+        vaults_dir = cfg.vaults_dir
+        temp_dir = Path(tempfile.mkdtemp(prefix="hash.all-bench-"))
+        cfg.vaults_dir = temp_dir / "vaults"
+        try:
+            report(bench_vault(args.repeat, args.sizes, cfg.vaults_dir))
+        finally:
+            cfg.vaults_dir = vaults_dir
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=4), encoding="utf-8")
+        print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        try:
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Baseline can't be read: {e}")
+            return 2
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
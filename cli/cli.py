@@ -0,0 +1,350 @@
+import argparse
+import getpass
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from auth.auth import AuthManager
+from auth.login import login
+from crypto.kdf import apply_params, available_kdfs, calibrate
+from crypto.stream import decrypt_file, encrypt_file
+from gui.config import cfg
+from keys.exporter import ExportStats, VaultExporter
+from keys.importer import ImportStats, VaultImporter
+from keys.rekey import (
+    RekeyStats,
+    VaultRekey,
+    change_password,
+    load_checkpoint,
+    retune_kdf,
+)
+from keys.vault import VaultManager
+from models.auth_model import UserLoginModel
+
+"""
+Explanation:
+    Headless commands (no GUI), started as: python main.py <command> ...
+"""
+
+
+def open_vault(username: str, password: Optional[str] = None) -> VaultManager:
+    """Log in (with password prompt if not given) and open user's vault"""
+    if password is None:
+        password = getpass.getpass(f"Master password for {username}: ")
+    result = login(AuthManager(), UserLoginModel(username=username, password=password))
+    if result.vault is None:
+        raise SystemExit(result.response.message)
+    return result.vault
+
+
+def ask_new_password(prompt: str) -> str:
+    """Password prompt with confirmation"""
+    password = getpass.getpass(f"{prompt}: ")
+    if password != getpass.getpass(f"Repeat {prompt.lower()}: "):
+        raise SystemExit("Passwords do not match")
+    return password
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    archive_password = None
+    if (args.format or "") == "archive" or args.input.endswith(".hashall"):
+        archive_password = getpass.getpass("Archive password: ")
+
+    def on_progress(stats: ImportStats):
+        print(f"\r{stats.rows} rows ({stats.rate:.0f} rows/s)", end="", flush=True)
+
+    try:
+        stats = VaultImporter(vault, workers=args.workers).import_file(
+            args.input,
+            fmt=args.format,
+            progress=on_progress,
+            archive_password=archive_password,
+        )
+    finally:
+        vault.close()
+
+    print(
+        f"\nImported: {stats.imported}, skipped: {stats.skipped} "
+        f"in {stats.elapsed:.2f} s ({stats.rate:.0f} rows/s)"
+    )
+    for error in stats.errors:
+        print(f"  {error}")
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    archive_password = None
+    if (args.format or "") == "archive" or args.output.endswith(".hashall"):
+        archive_password = ask_new_password("Archive password")
+    else:
+        print("Warning: export file will contain plaintext passwords")
+
+    def on_progress(stats: ExportStats):
+        print(f"\r{stats.exported}/{stats.total} entries", end="", flush=True)
+
+    try:
+        stats = VaultExporter(vault, workers=args.workers).export_file(
+            args.output,
+            fmt=args.format,
+            archive_password=archive_password,
+            progress=on_progress,
+        )
+    finally:
+        vault.close()
+
+    print(
+        f"\nExported: {stats.exported}, failed: {stats.failed} "
+        f"in {stats.elapsed:.2f} s ({stats.rate:.0f} entries/s)"
+    )
+    return 1 if stats.failed else 0
+
+
+def cmd_find(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    try:
+        services = vault.find_by_username(args.username)
+    finally:
+        vault.close()
+
+    for service in services:
+        print(service)
+    return 0 if services else 1
+
+
+def cmd_passwd(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    try:
+        new_password = ask_new_password("New master password")
+        change_password(vault, args.user, new_password)
+    finally:
+        vault.close()
+    print("Master password changed")
+    return 0
+
+
+def cmd_rekey(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    if load_checkpoint(args.user):
+        print("Resuming interrupted password change")
+    new_password = ask_new_password("New master password")
+
+    def on_progress(stats: RekeyStats):
+        print(f"\r{stats.done}/{stats.total} entries", end="", flush=True)
+
+    try:
+        stats = VaultRekey(vault, args.user, workers=args.workers).run(
+            new_password, progress=on_progress
+        )
+    finally:
+        vault.close()
+
+    print(
+        f"\nRe-encrypted: {stats.done - stats.resumed}, resumed: {stats.resumed} "
+        f"in {stats.elapsed:.2f} s ({stats.rate:.0f} entries/s)"
+    )
+    print("Master password changed")
+    return 0
+
+
+def cmd_calibrate(args: argparse.Namespace) -> int:
+    if args.user:
+        cfg.load_user_config(args.user)
+    kdf = args.kdf or cfg.data.KDF
+    target_ms = args.target_ms or cfg.data.KDF_TARGET_MS
+
+    print(f"Calibrating {kdf} to {target_ms} ms...")
+    params = calibrate(kdf, target_ms)
+    print(
+        f"iterations: {params.iterations}, memory: {params.memory_cost} KiB, "
+        f"parallelism: {params.parallelism}"
+    )
+    if not args.user:
+        return 0
+
+    # Settings of the user, then the vault key is re-wrapped with them
+    password = getpass.getpass(f"Master password for {args.user}: ")
+    vault = open_vault(args.user, password)
+    try:
+        apply_params(params)
+        cfg.data.KDF_TARGET_MS = target_ms
+        cfg.save()
+        retune_kdf(vault, args.user, password)
+    finally:
+        vault.close()
+    print("Vault key derivation updated")
+    return 0
+
+
+def cmd_encrypt_file(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    try:
+        size = encrypt_file(
+            vault.attachments.crypto,
+            args.input,
+            args.output,
+            info={"name": Path(args.input).name, "size": os.path.getsize(args.input)},
+        )
+    finally:
+        vault.close()
+    print(f"Encrypted {size} bytes")
+    return 0
+
+
+def cmd_decrypt_file(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    try:
+        info = decrypt_file(vault.attachments.crypto, args.input, args.output)
+    finally:
+        vault.close()
+    print(f"Decrypted {info.get('name', args.input)} ({info.get('size', 0)} bytes)")
+    return 0
+
+
+def cmd_attach(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    try:
+        attachment = vault.attachments.add(args.service, args.file)
+    except KeyError:
+        raise SystemExit(f"No entry for {args.service}")
+    finally:
+        vault.close()
+    print(f"{attachment.id}  {attachment.name}  ({attachment.size} bytes)")
+    return 0
+
+
+def cmd_attachments(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    try:
+        attachments = vault.attachments.list(args.service)
+    finally:
+        vault.close()
+
+    for attachment in attachments:
+        print(f"{attachment.id}  {attachment.name}  ({attachment.size} bytes)")
+    return 0 if attachments else 1
+
+
+def cmd_extract(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    try:
+        if args.output:
+            output = args.output
+        else:
+            # Original file name, without path parts
+            names = {a.id: a.name for a in vault.attachments.list(args.service)}
+            if args.id not in names:
+                raise SystemExit(f"No attachment {args.id} for {args.service}")
+            output = Path(names[args.id]).name
+        attachment = vault.attachments.extract(args.service, args.id, output)
+    finally:
+        vault.close()
+    print(f"Extracted {attachment.name} to {output}")
+    return 0
+
+
+def cmd_detach(args: argparse.Namespace) -> int:
+    vault = open_vault(args.user)
+    try:
+        removed = vault.attachments.remove(args.service, args.id)
+    finally:
+        vault.close()
+    return 0 if removed else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="hash.all", description="hash.all headless commands"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p_import = commands.add_parser("import", help="Import entries from export file")
+    p_import.add_argument("input", help="CSV / JSON / JSONL / .hashall file")
+    p_import.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_import.add_argument("-f", "--format", choices=["csv", "json", "jsonl", "archive"])
+    p_import.add_argument("-w", "--workers", type=int, help="Encryption threads")
+    p_import.set_defaults(func=cmd_import)
+
+    p_export = commands.add_parser("export", help="Export vault entries to file")
+    p_export.add_argument("output", help="CSV / JSONL / .hashall file")
+    p_export.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_export.add_argument("-f", "--format", choices=list(VaultExporter.FORMATS))
+    p_export.add_argument("-w", "--workers", type=int, help="Decryption threads")
+    p_export.set_defaults(func=cmd_export)
+
+    p_passwd = commands.add_parser("passwd", help="Change master password")
+    p_passwd.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_passwd.set_defaults(func=cmd_passwd)
+
+    p_rekey = commands.add_parser(
+        "rekey", help="Change master password and re-encrypt with new data key"
+    )
+    p_rekey.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_rekey.add_argument("-w", "--workers", type=int, help="Encryption threads")
+    p_rekey.set_defaults(func=cmd_rekey)
+
+    p_find = commands.add_parser("find", help="List services used with a username")
+    p_find.add_argument("username", help="Login / e-mail (case is ignored)")
+    p_find.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_find.set_defaults(func=cmd_find)
+
+    p_encrypt = commands.add_parser(
+        "encrypt-file", help="Encrypt a file of any size with the vault key"
+    )
+    p_encrypt.add_argument("input", help="File to encrypt")
+    p_encrypt.add_argument("output", help="Encrypted file")
+    p_encrypt.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_encrypt.set_defaults(func=cmd_encrypt_file)
+
+    p_decrypt = commands.add_parser("decrypt-file", help="Decrypt an encrypted file")
+    p_decrypt.add_argument("input", help="Encrypted file")
+    p_decrypt.add_argument("output", help="Decrypted file")
+    p_decrypt.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_decrypt.set_defaults(func=cmd_decrypt_file)
+
+    p_attach = commands.add_parser("attach", help="Attach a file to an entry")
+    p_attach.add_argument("service", help="Entry service name")
+    p_attach.add_argument("file", help="File to attach")
+    p_attach.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_attach.set_defaults(func=cmd_attach)
+
+    p_attachments = commands.add_parser(
+        "attachments", help="List attachments of an entry"
+    )
+    p_attachments.add_argument("service", help="Entry service name")
+    p_attachments.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_attachments.set_defaults(func=cmd_attachments)
+
+    p_extract = commands.add_parser("extract", help="Decrypt an attachment to file")
+    p_extract.add_argument("service", help="Entry service name")
+    p_extract.add_argument("id", help="Attachment id (see attachments)")
+    p_extract.add_argument("-o", "--output", help="Target file (original name)")
+    p_extract.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_extract.set_defaults(func=cmd_extract)
+
+    p_detach = commands.add_parser("detach", help="Remove an attachment")
+    p_detach.add_argument("service", help="Entry service name")
+    p_detach.add_argument("id", help="Attachment id (see attachments)")
+    p_detach.add_argument("-u", "--user", required=True, help="Vault owner")
+    p_detach.set_defaults(func=cmd_detach)
+
+    p_calibrate = commands.add_parser(
+        "calibrate", help="Pick KDF costs for target unlock time on this machine"
+    )
+    p_calibrate.add_argument("-k", "--kdf", choices=available_kdfs())
+    p_calibrate.add_argument("-t", "--target-ms", type=int, help="Unlock time (ms)")
+    p_calibrate.add_argument("-u", "--user", help="Apply to the user's vault")
+    p_calibrate.set_defaults(func=cmd_calibrate)
+
+    return parser
+
+
+def run(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
@@ -0,0 +1,87 @@
+import os
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+"""
+Explanation:
+    Versioned AEAD tokens (raw bytes, the caller encodes them once if needed):
+        version (1) | nonce (12) | ciphertext + tag (16)
+    Version byte selects the cipher. Each cipher has its own 256-bit subkey
+    derived from the engine key (HKDF-SHA256, cipher name as info), so one key
+    is never used by two algorithms:
+        0x03 - AES-256-GCM (fast with AES-NI)
+        0x04 - ChaCha20-Poly1305 (fast without AES hardware)
+    0x01 / 0x02 are the same ciphers over the engine key itself (first AEAD
+    tokens), they are still decrypted but never written.
+    Nonces are random, so one key is good for about 2^32 tokens.
+    Early entries hold base64 of a Fernet token, which is base64 text itself:
+    after one decode it starts with "g" (0x67), never a version byte here.
+"""
+
+AES_GCM = "aes-256-gcm"
+CHACHA20_POLY1305 = "chacha20-poly1305"
+
+# Algorithm ids, also the version bytes of tokens over the engine key itself
+CIPHER_VERSIONS = {AES_GCM: 0x01, CHACHA20_POLY1305: 0x02}
+# Version bytes of tokens over the per-cipher subkey
+SUBKEY_VERSIONS = {AES_GCM: 0x03, CHACHA20_POLY1305: 0x04}
+NONCE_SIZE = 12
+TAG_SIZE = 16
+OVERHEAD = 1 + NONCE_SIZE + TAG_SIZE
+
+
+def new_aead(version: int, key: bytes):
+    """AEAD primitive of the algorithm id (ValueError if unknown)"""
+    if version == CIPHER_VERSIONS[AES_GCM]:
+        return AESGCM(key)
+    if version == CIPHER_VERSIONS[CHACHA20_POLY1305]:
+        return ChaCha20Poly1305(key)
+    raise ValueError(f"Unsupported cipher version: {version}")
+
+
+def cipher_subkey(key: bytes, cipher: str) -> bytes:
+    """Key of one cipher derived from the engine key"""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"hash.all cipher " + cipher.encode(),
+    ).derive(key)
+
+
+def is_aead_token(token: bytes) -> bool:
+    """Token was made by CipherEngine (any version)"""
+    return len(token) >= OVERHEAD and (
+        token[0] in SUBKEY_VERSIONS.values() or token[0] in CIPHER_VERSIONS.values()
+    )
+
+
+class CipherEngine:
+    """AEAD encryption with version byte (ValueError on unknown cipher)"""
+
+    def __init__(self, key: bytes, cipher: str = AES_GCM):
+        if cipher not in CIPHER_VERSIONS:
+            raise ValueError(f"Unsupported cipher: {cipher}")
+        self.version = SUBKEY_VERSIONS[cipher]
+        self._ciphers = {}
+        for name, algorithm in CIPHER_VERSIONS.items():
+            self._ciphers[SUBKEY_VERSIONS[name]] = new_aead(
+                algorithm, cipher_subkey(key, name)
+            )
+            self._ciphers[algorithm] = new_aead(algorithm, key)  # First tokens
+
+    def encrypt(self, data: bytes, associated_data: bytes = b"") -> bytes:
+        nonce = os.urandom(NONCE_SIZE)
+        sealed = self._ciphers[self.version].encrypt(nonce, data, associated_data)
+        return bytes((self.version,)) + nonce + sealed
+
+    # Any known version is decrypted, whatever cipher encrypts now
+    def decrypt(self, token: bytes, associated_data: bytes = b"") -> bytes:
+        if not is_aead_token(token):
+            raise ValueError("Not an AEAD token")
+        nonce = token[1 : 1 + NONCE_SIZE]
+        return self._ciphers[token[0]].decrypt(
+            nonce, token[1 + NONCE_SIZE :], associated_data
+        )
@@ -1,64 +1,227 @@
 import base64
+import hmac
 import os
-from typing import Optional
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar, Union
 
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
+from crypto.cipher import CipherEngine, is_aead_token
+from crypto.kdf import KdfParams, default_params, derive_key
+from crypto.secret import SecretBuffer, urlsafe_b64decode
 from gui.config import cfg
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_many(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[Union[R, ValueError]]:
+    """Apply func to items in a thread pool (OpenSSL releases the GIL), chunk
+    by chunk, in input order. ValueError of an item is yielded in its place"""
+    workers = workers or cfg.data.CRYPTO_WORKERS or os.cpu_count() or 1
+    chunk_size = chunk_size or cfg.data.CRYPTO_CHUNK_SIZE
+
+    def run(part: List[T]) -> List[Union[R, ValueError]]:
+        results: List[Union[R, ValueError]] = []
+        for item in part:
+            try:
+                results.append(func(item))
+            except ValueError as e:
+                results.append(e)
+        return results
+
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        while True:
+            # Next chunk is read and submitted before results of the previous
+            # one are handed out, so the pool doesn't wait for the consumer.
+            # One part per worker keeps task overhead per chunk, not per item
+            chunk = list(islice(items, chunk_size))
+            step = -(-len(chunk) // workers) or 1
+            submitted = [
+                pool.submit(run, chunk[i : i + step])
+                for i in range(0, len(chunk), step)
+            ]
+            for future in pending:
+                yield from future.result()
+            if not chunk:
+                return
+            pending = submitted
+
 
 class CryptoManager:
-    def __init__(self, password: str, salt: Optional[bytes] = None):
+    # KDF is the configured one unless given (parameters of an existing vault),
+    # iterations alone overrides PBKDF2 iterations. Password given as str is
+    # copied once into a buffer wiped after derivation, a SecretBuffer is left
+    # to the caller
+    def __init__(
+        self,
+        password: Union[str, SecretBuffer],
+        salt: Optional[bytes] = None,
+        iterations: Optional[int] = None,
+        kdf: Optional[KdfParams] = None,
+    ):
         self.salt = salt or os.urandom(cfg.data.SALT_SIZE)
-        self.key = self._derive_key(password)
-        self.fernet = Fernet(self.key)
-        self._secure_wipe(password)
-
-    def _derive_key(self, password: str) -> bytes:
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),  # Hash-func
-            length=32,  # Key lenght
-            salt=self.salt,  # Unique salt
-            iterations=cfg.data.PBKDF2_ITERATIONS,  # 100,000 iterations
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        return key
-
-    def _secure_wipe(self, data: str):
-        if not data:
-            return
+        self.kdf_params = kdf or default_params()
+        if iterations:
+            self.kdf_params = replace(self.kdf_params, iterations=iterations)
+
+        if isinstance(password, SecretBuffer):
+            self._use_key(self._derive_key(password))
+        else:
+            with SecretBuffer(password) as secret:
+                self._use_key(self._derive_key(secret))
+
+    # Manager over a ready key (vault data key), no password derivation
+    @classmethod
+    def from_key(
+        cls, key: Union[bytes, SecretBuffer], salt: Optional[bytes] = None
+    ) -> "CryptoManager":
+        manager = cls.__new__(cls)
+        manager.salt = salt
+        manager.kdf_params = None
+        manager._use_key(key)
+        return manager
+
+    # KDF name and its main cost (None for managers over a ready key)
+    @property
+    def kdf(self) -> Optional[str]:
+        return self.kdf_params.name if self.kdf_params else None
+
+    @property
+    def iterations(self) -> Optional[int]:
+        return self.kdf_params.iterations if self.kdf_params else None
+
+    # New random key (for vault data), same encoding as Fernet keys
+    @staticmethod
+    def generate_key() -> SecretBuffer:
+        return SecretBuffer(base64.urlsafe_b64encode(os.urandom(32)))
+
+    # Key is copied into own buffer. Subkeys are derived once, from the key
+    # decoded into a buffer wiped right after; HKDF returns bytes that can't
+    # be wiped, so they go straight into the OpenSSL contexts and are dropped
+    def _use_key(self, key: Union[bytes, SecretBuffer]):
+        self.key = SecretBuffer(key)
+        self._fernet: Optional[Fernet] = None  # Created for early tokens only
+        with urlsafe_b64decode(self.key.view()) as raw_key:
+            self._index_hmac = hmac.new(
+                self._derive_subkey(raw_key, b"hash.all blind index"),
+                digestmod="sha256",
+            )
+            # AEAD key (info name is kept from the first sealed entries)
+            self.cipher = CipherEngine(
+                self._derive_subkey(raw_key, b"hash.all entry seal"), cfg.data.CIPHER
+            )
+
+    def _derive_key(self, password: SecretBuffer) -> SecretBuffer:
+        raw = derive_key(password.view(), self.salt, self.kdf_params)
+        return SecretBuffer(base64.urlsafe_b64encode(raw))
+
+    # Independent subkey from the decoded vault key (HKDF-SHA256)
+    @staticmethod
+    def _derive_subkey(
+        raw_key: SecretBuffer, info: bytes, salt: Optional[bytes] = None
+    ) -> bytes:
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=info)
+        return hkdf.derive(raw_key.view())
+
+    # Key of one encrypted file (crypto/stream.py), salt is stored in the file
+    def derive_file_key(self, salt: bytes) -> bytes:
+        with urlsafe_b64decode(self.key.view()) as raw_key:
+            return self._derive_subkey(raw_key, b"hash.all file stream", salt)
+
+    # Fernet takes the key only as bytes and keeps its halves as bytes for its
+    # lifetime, none of it can be wiped. So it is made once, only when an early
+    # token is met, and cached: every new one would leave more key copies
+    @property
+    def fernet(self) -> Fernet:
+        if self._fernet is None:
+            self._fernet = Fernet(bytes(self.key.view()))
+        return self._fernet
+
+    # Keyed HMAC token of normalized value: equal values give equal tokens,
+    # so lookups run without decryption, but the value can't be recovered
+    def blind_index(self, data: str) -> str:
+        normalized = unicodedata.normalize("NFKC", data).strip().casefold()
+        mac = self._index_hmac.copy()
+        mac.update(normalized.encode())
+        digest = mac.digest()
+        return base64.urlsafe_b64encode(digest[:16]).decode().rstrip("=")
+
+    # One AEAD token for several fields. associated_data is authenticated but
+    # not stored (e.g. the service name, so a token can't be moved to another
+    # entry)
+    def seal(self, data: Union[bytes, memoryview], associated_data: bytes = b"") -> str:
+        token = self.cipher.encrypt(data, associated_data)
+        return base64.urlsafe_b64encode(token).decode()
+
+    def unseal(self, token: str, associated_data: bytes = b"") -> bytes:
         try:
-            if isinstance(data, (bytearray, list)):
-                for i in range(len(data)):
-                    data[i] = 0
+            raw = base64.urlsafe_b64decode(token.encode())
+            if not is_aead_token(raw):
+                # Early format: base64 of Fernet token (no associated data)
+                return self.fernet.decrypt(raw)
+            return self.cipher.decrypt(raw, associated_data)
         except Exception as e:
-            print(f"Error: {e}")
-        finally:
-            del data
+            raise ValueError(
+                "Decryption failed - possible tampering or wrong key"
+            ) from e
+
+    # Batch versions (order is kept, failed items are ValueError)
+    def encrypt_many(
+        self,
+        data: Iterable[str],
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[Union[str, ValueError]]:
+        return map_many(self.encrypt_data, data, workers, chunk_size)
+
+    def decrypt_many(
+        self,
+        encrypted_data: Iterable[str],
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[Union[str, ValueError]]:
+        return map_many(self.decrypt_data, encrypted_data, workers, chunk_size)
+
+    # Encrypt other key with this one (envelope encryption)
+    def wrap_key(self, key: Union[bytes, SecretBuffer]) -> str:
+        return self.seal(key.view() if isinstance(key, SecretBuffer) else key)
+
+    def unwrap_key(self, wrapped: str) -> SecretBuffer:
+        return SecretBuffer(self.unseal(wrapped))
 
     def encrypt_data(self, data: str) -> str:
         if not data:
             return ""
-        encrypted = self.fernet.encrypt(data.encode())
-        return base64.b64encode(encrypted).decode()
+        return self.seal(data.encode())
 
     def decrypt_data(self, encrypted_data: str) -> str:
         if not encrypted_data:
             return ""
-        try:
-            encrypted_bytes = base64.b64decode(encrypted_data.encode())
-            decrypted = self.fernet.decrypt(encrypted_bytes)
-            return decrypted.decode()
-        except Exception as e:
-            raise ValueError(
-                "Decryption failed - possible tampering or wrong key"
-            ) from e
+        return self.unseal(encrypted_data).decode()
 
-    def __del__(self):
-        if hasattr(self, "key"):
+    # Zero the key and drop cipher contexts (manager is unusable afterwards)
+    def wipe(self):
+        key = getattr(self, "key", None)
+        if key is not None:
+            key.wipe()
+        for attr in ("_fernet", "_index_hmac", "cipher"):
             try:
-                del self.key
+                delattr(self, attr)
             except AttributeError:
                 pass
+
+    def __del__(self):
+        self.wipe()
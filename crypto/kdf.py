@@ -0,0 +1,164 @@
+import os
+import time
+from dataclasses import dataclass, replace
+from typing import List, Optional, Union
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+from gui.config import cfg
+
+try:  # cryptography >= 44 built with OpenSSL 3.2+
+    from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+except ImportError:
+    Argon2id = None
+
+"""
+Explanation:
+    Password key derivation backends. Parameters are uniform for all of them:
+        pbkdf2-sha256 : iterations
+        scrypt        : memory_cost (KiB) = n with r = 8, parallelism = p
+        argon2id      : iterations (time cost), memory_cost (KiB), parallelism
+                        (lanes)
+    calibrate() benchmarks the host and picks the costs that hit a target
+    unlock time, apply_params() stores them in the settings.
+"""
+
+KDF_PBKDF2 = "pbkdf2-sha256"
+KDF_SCRYPT = "scrypt"
+KDF_ARGON2ID = "argon2id"
+
+SCRYPT_BLOCK_SIZE = 8  # r: 128 * r bytes per unit of n = 1 KiB
+MAX_MEMORY_COST = 1048576  # KiB (1 GiB), calibration never goes higher
+
+
+@dataclass(frozen=True)
+class KdfParams:
+    """KDF name and cost parameters"""
+
+    name: str = KDF_PBKDF2
+    iterations: int = 0
+    memory_cost: int = 0  # KiB
+    parallelism: int = 0
+
+
+def available_kdfs() -> List[str]:
+    """KDFs supported by installed cryptography / OpenSSL"""
+    kdfs = [KDF_PBKDF2, KDF_SCRYPT]
+    if Argon2id is not None:
+        kdfs.append(KDF_ARGON2ID)
+    return kdfs
+
+
+def default_params(name: Optional[str] = None) -> KdfParams:
+    """Parameters of the KDF from settings (configured KDF if name is None)"""
+    name = name or cfg.data.KDF
+    if name == KDF_PBKDF2:
+        return KdfParams(name, iterations=cfg.data.PBKDF2_ITERATIONS)
+    if name == KDF_SCRYPT:
+        return KdfParams(
+            name,
+            iterations=1,
+            memory_cost=cfg.data.SCRYPT_MEMORY_COST,
+            parallelism=cfg.data.SCRYPT_PARALLELISM,
+        )
+    if name == KDF_ARGON2ID:
+        return KdfParams(
+            name,
+            iterations=cfg.data.ARGON2_TIME_COST,
+            memory_cost=cfg.data.ARGON2_MEMORY_COST,
+            parallelism=cfg.data.ARGON2_LANES,
+        )
+    raise ValueError(f"Unsupported key derivation function: {name}")
+
+
+def derive_key(
+    password: Union[bytes, memoryview], salt: bytes, params: KdfParams, length: int = 32
+) -> bytes:
+    """Raw key from password (ValueError for unsupported KDF or parameters)"""
+    if params.name not in available_kdfs():
+        raise ValueError(f"Unsupported key derivation function: {params.name}")
+
+    if params.name == KDF_PBKDF2:
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=length,
+            salt=salt,
+            iterations=params.iterations,
+        )
+    elif params.name == KDF_SCRYPT:
+        kdf = Scrypt(
+            salt=salt,
+            length=length,
+            n=params.memory_cost,
+            r=SCRYPT_BLOCK_SIZE,
+            p=params.parallelism,
+        )
+    else:
+        kdf = Argon2id(
+            salt=salt,
+            length=length,
+            iterations=params.iterations,
+            lanes=params.parallelism,
+            memory_cost=params.memory_cost,
+        )
+    return kdf.derive(password)
+
+
+def _measure(params: KdfParams) -> float:
+    """Derivation time in seconds"""
+    start = time.perf_counter()
+    derive_key(b"calibration password", os.urandom(16), params)
+    return time.perf_counter() - start
+
+
+def calibrate(name: Optional[str] = None, target_ms: Optional[int] = None) -> KdfParams:
+    """Costs of the KDF that take about target_ms to derive a key on this host"""
+    params = default_params(name)
+    target = (target_ms or cfg.data.KDF_TARGET_MS) / 1000
+
+    if params.name == KDF_PBKDF2:
+        # Time is linear in iterations: probe long enough to be measured well
+        probe = replace(params, iterations=10000)
+        elapsed = _measure(probe)
+        while elapsed < target / 4:
+            probe = replace(probe, iterations=probe.iterations * 2)
+            elapsed = _measure(probe)
+        iterations = int(probe.iterations * target / elapsed)
+        return replace(params, iterations=max(10000, iterations // 1000 * 1000))
+
+    if params.name == KDF_SCRYPT:
+        # n must be a power of 2: largest one within the target
+        memory_cost = 1024
+        while memory_cost * 2 <= MAX_MEMORY_COST:
+            elapsed = _measure(replace(params, memory_cost=memory_cost))
+            if elapsed * 2 > target:
+                break
+            memory_cost *= 2
+        return replace(params, memory_cost=memory_cost)
+
+    # Argon2id: configured memory (halved if one pass is too slow), then passes
+    memory_cost = min(params.memory_cost, MAX_MEMORY_COST)
+    while True:
+        probe = replace(params, iterations=1, memory_cost=memory_cost)
+        elapsed = _measure(probe)
+        if elapsed <= target or memory_cost <= 8 * params.parallelism:
+            break
+        memory_cost //= 2
+    iterations = max(1, int(target / elapsed))
+    return replace(params, iterations=iterations, memory_cost=memory_cost)
+
+
+def apply_params(params: KdfParams):
+    """Make params the configured KDF (cfg.save() is up to the caller)"""
+    cfg.data.KDF = params.name
+    if params.name == KDF_PBKDF2:
+        cfg.data.PBKDF2_ITERATIONS = params.iterations
+    elif params.name == KDF_SCRYPT:
+        cfg.data.SCRYPT_MEMORY_COST = params.memory_cost
+        cfg.data.SCRYPT_PARALLELISM = params.parallelism
+    elif params.name == KDF_ARGON2ID:
+        cfg.data.ARGON2_TIME_COST = params.iterations
+        cfg.data.ARGON2_MEMORY_COST = params.memory_cost
+        cfg.data.ARGON2_LANES = params.parallelism
@@ -0,0 +1,111 @@
+import ctypes
+import hmac
+from typing import Union
+
+"""
+Explanation:
+    SecretBuffer keeps secret bytes (master password, keys, entry plaintext) in
+    one mutable bytearray that is zeroed on wipe(), on leaving a with-block and
+    on garbage collection. KDFs and AEAD ciphers take its view() directly, so
+    no extra immutable copies are made on the way.
+    Python str / bytes can't be wiped: a secret that arrives as str (Qt line
+    edit, getpass) is converted once and only the buffer is passed on.
+"""
+
+SecretLike = Union[str, bytes, bytearray, memoryview, "SecretBuffer"]
+
+URLSAFE_B64 = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+_B64_VALUES = {symbol: value for value, symbol in enumerate(URLSAFE_B64)}
+
+
+class SecretBuffer:
+    """Zeroizable secret bytes"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: SecretLike = b""):
+        if isinstance(data, SecretBuffer):
+            data = data._data
+        elif isinstance(data, str):
+            data = data.encode("utf-8")
+        self._data = bytearray(data)
+
+    # Move bytes out of a bytearray (the source is zeroed)
+    @classmethod
+    def take(cls, data: bytearray) -> "SecretBuffer":
+        secret = cls(data)
+        _zero(data)
+        return secret
+
+    def view(self) -> memoryview:
+        """Read-only view for KDF / cipher input (no copy)"""
+        return memoryview(self._data).toreadonly()
+
+    def wipe(self):
+        _zero(self._data)
+        try:
+            del self._data[:]
+        except BufferError:  # A view is still held, it sees zeros
+            pass
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __bool__(self) -> bool:
+        return bool(self._data)
+
+    # Constant-time comparison
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SecretBuffer):
+            other = other._data
+        if not isinstance(other, (bytes, bytearray)):
+            return NotImplemented
+        return hmac.compare_digest(self._data, other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SecretBuffer(<{len(self._data)} bytes>)"
+
+    def __enter__(self) -> "SecretBuffer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wipe()
+
+    def __del__(self):
+        try:
+            self.wipe()
+        except AttributeError:  # Failed in __init__
+            pass
+
+
+def urlsafe_b64decode(data: Union[bytes, memoryview]) -> SecretBuffer:
+    """Decode URL-safe base64 key straight into a SecretBuffer (base64 module
+    returns immutable bytes). ValueError on a symbol out of the alphabet"""
+    data = memoryview(data)
+    end = len(data)
+    while end and data[end - 1] == ord("="):
+        end -= 1
+
+    out = bytearray(end * 6 // 8)
+    bits = count = size = 0
+    for symbol in data[:end]:
+        try:
+            bits = (bits << 6) | _B64_VALUES[symbol]
+        except KeyError:
+            _zero(out)
+            raise ValueError("Invalid base64 key") from None
+        count += 6
+        if count >= 8:
+            count -= 8
+            out[size] = bits >> count
+            bits &= (1 << count) - 1
+            size += 1
+    return SecretBuffer.take(out)
+
+
+def _zero(data: bytearray):
+    """Overwrite bytearray memory in place"""
+    if data:
+        ctypes.memset((ctypes.c_char * len(data)).from_buffer(data), 0, len(data))
@@ -0,0 +1,208 @@
+import json
+import mmap
+import os
+import stat
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+from cryptography.exceptions import InvalidTag
+
+from crypto.cipher import CIPHER_VERSIONS, TAG_SIZE, new_aead
+from crypto.crypto import CryptoManager, map_many
+from gui.config import cfg
+
+"""
+Explanation:
+    Chunked AEAD file encryption (STREAM construction) for files of any size:
+        header : magic (8) | version (u8) | cipher (u8) | reserved (u16)
+                 | chunk size (u32) | salt (32) | info length (u32)
+        info   : sealed JSON (file name etc.), may be empty
+        chunks : ciphertext + tag of each chunk_size block of the plaintext
+    File key is derived from the CryptoManager key and the per-file salt.
+    Chunk nonce is its index (u64) + "last chunk" flag (u32), so chunks can't
+    be reordered, dropped or cut off at the end without failing the tag, and
+    the header is authenticated with every chunk.
+    Input is memory-mapped and chunks are encrypted by map_many a few at a
+    time, so memory use is constant (about 2 x workers x chunk size) for any
+    file size. Output goes to a temp file that replaces the target only when
+    everything is done and verified.
+"""
+
+MAGIC = b"HASHALLS"
+VERSION = 1
+HEADER = struct.Struct("<8sBBHI32sI")
+CHUNK_SIZE = 1048576  # 1 MiB
+NONCE = struct.Struct(">QI")
+INFO_INDEX = 2**64 - 1  # Nonce index of the sealed info block
+
+PathLike = Union[str, Path]
+
+
+def is_encrypted_file(path: PathLike) -> bool:
+    """Check stream magic"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def encrypt_file(
+    crypto: CryptoManager,
+    src: PathLike,
+    dst: PathLike,
+    info: Optional[dict] = None,
+    associated_data: bytes = b"",
+    chunk_size: int = CHUNK_SIZE,
+    workers: Optional[int] = None,
+) -> int:
+    """Encrypt src into dst (info is stored sealed) / returns plaintext size"""
+    salt = os.urandom(32)
+    aead = new_aead(CIPHER_VERSIONS[cfg.data.CIPHER], crypto.derive_file_key(salt))
+
+    info_bytes = json.dumps(info).encode("utf-8") if info else b""
+    info_length = len(info_bytes) + TAG_SIZE if info_bytes else 0
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        CIPHER_VERSIONS[cfg.data.CIPHER],
+        0,
+        chunk_size,
+        salt,
+        info_length,
+    )
+    aad = header + associated_data
+
+    with _mapped(src) as data, _output(dst) as out:
+        out.write(header)
+        if info_bytes:
+            out.write(aead.encrypt(NONCE.pack(INFO_INDEX, 2), info_bytes, aad))
+
+        count = max(1, -(-len(data) // chunk_size))
+
+        def encrypt_chunk(index: int) -> bytes:
+            nonce = NONCE.pack(index, index == count - 1)
+            # Slice of the map is released at once (map can't close otherwise)
+            with data[index * chunk_size : (index + 1) * chunk_size] as chunk:
+                return aead.encrypt(nonce, chunk, aad)
+
+        for sealed in map_many(encrypt_chunk, range(count), workers, _group(workers)):
+            if isinstance(sealed, ValueError):
+                raise sealed
+            out.write(sealed)
+        return len(data)
+
+
+def decrypt_file(
+    crypto: CryptoManager,
+    src: PathLike,
+    dst: PathLike,
+    associated_data: bytes = b"",
+    workers: Optional[int] = None,
+) -> dict:
+    """Decrypt src into dst (ValueError if damaged / wrong key) / returns info"""
+    with _mapped(src) as data:
+        aead, aad, info, offset, chunk_size = _open(crypto, data, associated_data)
+        stride = chunk_size + TAG_SIZE
+        count = max(1, -(-(len(data) - offset) // stride))
+
+        def decrypt_chunk(index: int) -> bytes:
+            start = offset + index * stride
+            nonce = NONCE.pack(index, index == count - 1)
+            try:
+                with data[start : start + stride] as chunk:
+                    return aead.decrypt(nonce, chunk, aad)
+            except InvalidTag as e:
+                raise ValueError(
+                    f"Chunk {index} is damaged, truncated or key is wrong"
+                ) from e
+
+        with _output(dst) as out:
+            for chunk in map_many(
+                decrypt_chunk, range(count), workers, _group(workers)
+            ):
+                if isinstance(chunk, ValueError):
+                    raise chunk
+                out.write(chunk)
+    return info
+
+
+def read_info(
+    crypto: CryptoManager, src: PathLike, associated_data: bytes = b""
+) -> dict:
+    """Sealed info of encrypted file (header only is read)"""
+    with open(src, "rb") as f:
+        head = f.read(HEADER.size)
+        if len(head) == HEADER.size:
+            head += f.read(HEADER.unpack(head)[6])
+        return _open(crypto, head, associated_data)[2]
+
+
+def _open(
+    crypto: CryptoManager, data, associated_data: bytes
+) -> Tuple[object, bytes, dict, int, int]:
+    """Parse header / returns (aead, aad, info, first chunk offset, chunk size)"""
+    try:
+        magic, version, cipher, _, chunk_size, salt, info_length = HEADER.unpack_from(
+            data, 0
+        )
+    except struct.error as e:
+        raise ValueError("Not an encrypted file") from e
+    if magic != MAGIC:
+        raise ValueError("Not an encrypted file")
+    if version > VERSION:
+        raise ValueError(f"Encrypted file version {version} is not supported")
+
+    aead = new_aead(cipher, crypto.derive_file_key(salt))
+    aad = bytes(data[: HEADER.size]) + associated_data
+    info = {}
+    if info_length:
+        sealed = bytes(data[HEADER.size : HEADER.size + info_length])
+        try:
+            info = json.loads(aead.decrypt(NONCE.pack(INFO_INDEX, 2), sealed, aad))
+        except InvalidTag as e:
+            raise ValueError("Wrong key or damaged encrypted file") from e
+    return aead, aad, info, HEADER.size + info_length, chunk_size
+
+
+def _group(workers: Optional[int]) -> int:
+    """Chunks handed to the pool at a time (bounds memory use)"""
+    return 2 * (workers or cfg.data.CRYPTO_WORKERS or os.cpu_count() or 1)
+
+
+@contextmanager
+def _mapped(path: PathLike) -> Iterator[memoryview]:
+    """Read-only memory map of the file (empty view for empty file)"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b"")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+@contextmanager
+def _output(path: PathLike):
+    """Temp file that replaces path on success (rw------- rights)"""
+    path = Path(path)
+    temp_file = path.with_name(path.name + ".tmp")
+    fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with open(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        try:  # rw------- rights
+            temp_file.chmod(stat.S_IRUSR | stat.S_IWUSR)
+        except OSError:  # For Windows and etc.
+            pass
+        temp_file.replace(path)
+    except BaseException:
+        temp_file.unlink(missing_ok=True)
+        raise
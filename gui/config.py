@@ -17,6 +17,16 @@ class Config:
 
     # Safe limits (defaults)
     PBKDF2_ITERATIONS: int = 100000
+    KDF: str = "pbkdf2-sha256"  # "pbkdf2-sha256" / "scrypt" / "argon2id"
+    KDF_TARGET_MS: int = 300  # Unlock time the KDF calibration aims at
+    SCRYPT_MEMORY_COST: int = 32768  # KiB (n, power of 2; r = 8)
+    SCRYPT_PARALLELISM: int = 1
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_LANES: int = 4
+    CIPHER: str = "aes-256-gcm"  # "aes-256-gcm" / "chacha20-poly1305"
+    CRYPTO_WORKERS: int = 0  # Threads of bulk encryption (0 = CPU count)
+    CRYPTO_CHUNK_SIZE: int = 500  # Items per bulk encryption chunk
     BCRYPT_ROUNDS: int = 14
     MIN_PASSWORD_LENGTH: int = 8
     MAX_PASSWORD_LENGTH: int = 128
@@ -27,6 +37,12 @@ class Config:
     LOCKOUT_DURATION: int = 900
     CLEANUP_INTERVAL: int = 3600
 
+    # Vault storage settings
+    VAULT_FSYNC: str = "always"  # "always" / "compact" (base file only) / "never"
+    VAULT_JOURNAL_LIMIT: int = 1048576  # Journal size (bytes) that triggers compaction
+    VAULT_SHARDS: int = 1  # Shard files for new / migrated vaults (1 = single file)
+    NOTES_INDEX: bool = False  # In-memory search over decrypted notes (opt-in)
+
     # Application settings
     APP_NAME: str = "hash.all (test branch)"
     VERSION: str = "1.0.1b"
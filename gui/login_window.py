@@ -1,33 +1,61 @@
+import traceback
+from typing import Optional
+
 from pydantic import ValidationError
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QVBoxLayout,
     QWidget,
 )
 
 from auth.auth import AuthManager
+from auth.login import STAGE_UNLOCK, STAGE_VERIFY, LoginResult, login
 from gui.config import cfg
 from gui.translator import translate
 from models.auth_model import UserLoginModel, UserRegModel
 
 
+class LoginThread(QThread):
+    """Verify user and unlock the vault off the UI thread (auth/login.py)"""
+
+    progress = Signal(str)  # Pipeline stage
+    done = Signal(object)  # LoginResult / error message (str)
+
+    def __init__(self, auth_manager: AuthManager, login_data: UserLoginModel):
+        super().__init__()
+        self.auth_manager = auth_manager
+        self.login_data = login_data
+
+    def run(self):
+        try:
+            self.done.emit(
+                login(self.auth_manager, self.login_data, self.progress.emit)
+            )
+        except Exception as e:
+            traceback.print_exc()
+            self.done.emit(str(e))
+
+
 # Login window
 class LoginWindow(QWidget):
     """Login window widget"""
 
-    # Salt signal
-    success = Signal(str)
+    # Unlocked vault signal (VaultManager)
+    success = Signal(object)
 
     def __init__(self):
         super().__init__()
 
         # Initializing AuthManager
         self.auth_manager = AuthManager()
+        self.auth_manager.warm_up()
+        self.login_thread: Optional[LoginThread] = None
 
         # Default layout
         main_layout = QVBoxLayout()
@@ -103,9 +131,22 @@ class LoginWindow(QWidget):
         self.register_btn.setMinimumHeight(35)
         self.register_btn.setStyleSheet("background-color: #444444; color: #ccc;")
 
+        # Busy indicator while login runs
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 0)
+        self.progress.setTextVisible(False)
+        self.progress.setFixedHeight(6)
+        self.progress.hide()
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.status_label.setStyleSheet("color: #aaa;")
+        self.status_label.hide()
+
         # Add to main layout
         main_layout.addWidget(self.login_btn)
         main_layout.addWidget(self.register_btn)
+        main_layout.addWidget(self.progress)
+        main_layout.addWidget(self.status_label)
 
         # Connect logic
         self.login_btn.clicked.connect(self.check_login)
@@ -170,58 +211,6 @@ class LoginWindow(QWidget):
 
         try:
             login_data = UserLoginModel(username=username, password=password)
-            response = self.auth_manager.verify_user(login_data)
-
-            if response.success:
-                self.success.emit(response.vault_salt or "")
-            else:
-                error_msg = response.message
-
-                if "Invalid credentials" in error_msg and hasattr(
-                    response, "remaining_attempts"
-                ):
-                    creds_warning_raw = translate.get_translation("login_warning_creds")
-
-                    try:
-                        error_msg = creds_warning_raw.format(
-                            remaining_attempts=response.remaining_attempts
-                        )
-                    except KeyError:
-                        error_msg = f"{creds_warning_raw}{response.remaining_attempts}"
-                elif (
-                    "Too many failed attempts" in error_msg
-                    and getattr(response, "lockout_time", None) is not None
-                ):
-                    lockout_msg = translate.get_translation(
-                        "login_warning_lockout_first"
-                    )
-                    try:
-                        error_msg = lockout_msg.format(
-                            lockout_time=response.lockout_time
-                        )
-                    except KeyError:
-                        error_msg = f"{lockout_msg} {response.lockout_time}"
-                elif (
-                    "account locked" in error_msg
-                    and getattr(response, "lockout_time", None) is not None
-                ):
-                    lockout_msg = translate.get_translation(
-                        "login_warning_lockout_second"
-                    )
-                    try:
-                        error_msg = lockout_msg.format(
-                            lockout_time=response.lockout_time
-                        )
-                    except KeyError:
-                        error_msg = f"{lockout_msg} {response.lockout_time}"
-
-                # Login error
-                QMessageBox.warning(
-                    self,
-                    translate.get_translation("login_failed_title"),
-                    error_msg,
-                )
-
         except ValidationError as e:
             # Error handler, because pydantic v2 giving a detailed description of the error, which is unnecessary here
             error_msg = e.errors()[0]["msg"] if e.errors() else str(e)
@@ -231,14 +220,99 @@ class LoginWindow(QWidget):
             QMessageBox.warning(
                 self, translate.get_translation("invalid_data_title"), error_msg
             )
-        except Exception as e:
+            return
+
+        if self.login_thread is not None:
+            return
+        self.set_busy(True)
+        self.login_thread = LoginThread(self.auth_manager, login_data)
+        self.login_thread.progress.connect(self.on_login_progress)
+        self.login_thread.done.connect(self.on_login_done)
+        self.login_thread.start()
+
+    def set_busy(self, busy: bool):
+        """Lock the form while login runs"""
+        for widget in (
+            self.name_input,
+            self.pass_input,
+            self.login_btn,
+            self.register_btn,
+        ):
+            widget.setEnabled(not busy)
+        self.progress.setVisible(busy)
+        self.status_label.setVisible(busy)
+        if not busy:
+            self.status_label.clear()
+
+    def on_login_progress(self, stage: str):
+        """Slot called when login pipeline reaches next stage"""
+        if stage == STAGE_VERIFY:
+            self.status_label.setText(translate.get_translation("login_verifying"))
+        elif stage == STAGE_UNLOCK:
+            self.status_label.setText(translate.get_translation("login_unlocking"))
+
+    def on_login_done(self, result):
+        """Slot called when login pipeline is finished"""
+        self.login_thread.wait()
+        self.login_thread = None
+        self.set_busy(False)
+
+        if isinstance(result, str):
             QMessageBox.critical(
                 self,
                 translate.get_translation("error_title"),
                 translate.get_translation("login_error_unexpected").format(
-                    error=str(e)
+                    error=result
                 ),
             )
+            return
+
+        if result.vault is not None:
+            self.success.emit(result.vault)
+            return
+
+        # Login error
+        QMessageBox.warning(
+            self,
+            translate.get_translation("login_failed_title"),
+            self.login_error_message(result),
+        )
+
+    def login_error_message(self, result: LoginResult) -> str:
+        """Translated message of failed login response"""
+        response = result.response
+        error_msg = response.message
+
+        if "Invalid credentials" in error_msg and hasattr(
+            response, "remaining_attempts"
+        ):
+            creds_warning_raw = translate.get_translation("login_warning_creds")
+
+            try:
+                error_msg = creds_warning_raw.format(
+                    remaining_attempts=response.remaining_attempts
+                )
+            except KeyError:
+                error_msg = f"{creds_warning_raw}{response.remaining_attempts}"
+        elif (
+            "Too many failed attempts" in error_msg
+            and getattr(response, "lockout_time", None) is not None
+        ):
+            lockout_msg = translate.get_translation("login_warning_lockout_first")
+            try:
+                error_msg = lockout_msg.format(lockout_time=response.lockout_time)
+            except KeyError:
+                error_msg = f"{lockout_msg} {response.lockout_time}"
+        elif (
+            "account locked" in error_msg
+            and getattr(response, "lockout_time", None) is not None
+        ):
+            lockout_msg = translate.get_translation("login_warning_lockout_second")
+            try:
+                error_msg = lockout_msg.format(lockout_time=response.lockout_time)
+            except KeyError:
+                error_msg = f"{lockout_msg} {response.lockout_time}"
+        return error_msg
 
     def register_user(self):
         username = self.name_input.text()
@@ -2,9 +2,7 @@ import traceback
 
 from PySide6.QtWidgets import QMainWindow, QMessageBox, QStackedWidget, QTabWidget
 
-from crypto.crypto import CryptoManager
 from gui.breach_tab import CheckTab
-from gui.config import cfg
 from gui.generator_tab import GeneratorTab
 from gui.login_window import LoginWindow
 from gui.settings_tab import SettingsTab
@@ -36,34 +34,21 @@ class MainWindow(QMainWindow):
         # Protection from garbage collector (objects links)
         self.crypto_manager = None
         self.vault_manager = None
+        self.username = None
 
-    def on_login_success(self, vault_salt_hex: str):
-        """Slot which initializing logic if success"""
+    def on_login_success(self, vault_manager: VaultManager):
+        """Slot which initializing logic if success (vault is unlocked by login
+        thread, user's configuration is loaded there)"""
         username = self.login_screen.name_input.text()
-        password = self.login_screen.pass_input.text()
         try:
-            # print("Login successful. Initializing managers...")  # Just for debugging
-            cfg.load_user_config(username)
             print(f"Loaded configuration for user: {username}")
 
             # Loading translates
             translate.load_language()
 
-            # Type conversion
-            salt_bytes = None
-            if vault_salt_hex:
-                try:
-                    salt_bytes = bytes.fromhex(vault_salt_hex)
-                except ValueError:
-                    print("Error: Invalid salt format")
-
-            # Initializing CryptoManager
-            self.crypto_manager = CryptoManager(password=password, salt=salt_bytes)
-
-            # Initializing VaultManager
-            self.vault_manager = VaultManager(
-                username=username, crypto_manager=self.crypto_manager
-            )
+            self.vault_manager = vault_manager
+            self.crypto_manager = self.vault_manager.crypto
+            self.username = username
 
             # Build interface
             self.setup_main()
@@ -103,6 +88,7 @@ class MainWindow(QMainWindow):
         if hasattr(self, "tabs"):
             if self.vault_manager:
                 self.vault_tab.set_vault_manager(self.vault_manager)
+                self.settings_tab.set_vault_manager(self.vault_manager, self.username)
             return
 
         # Tabs widget
@@ -117,6 +103,7 @@ class MainWindow(QMainWindow):
         # Dependency injection
         if self.vault_manager:
             self.vault_tab.set_vault_manager(self.vault_manager)
+            self.settings_tab.set_vault_manager(self.vault_manager, self.username)
 
         self.generator_tab.password_used_in_vault.connect(
             self.on_password_from_generator
@@ -155,6 +142,13 @@ class MainWindow(QMainWindow):
         if hasattr(self.breach_tab, "retranslate_ui"):
             self.breach_tab.retranslate_ui()
 
+    def closeEvent(self, event):
+        """End of session: wipe in-memory indexes and release the vault"""
+        if self.vault_manager:
+            self.vault_manager.close()
+            self.vault_manager = None
+        super().closeEvent(event)
+
     def center_window(self):
         """Center window"""
         frame_geometry = self.frameGeometry()
@@ -1,10 +1,17 @@
-from PySide6.QtCore import Qt, Signal
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from keys.vault import VaultManager
+
+from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtWidgets import (
+    QCheckBox,
     QComboBox,
     QDoubleSpinBox,
     QFormLayout,
     QGroupBox,
     QHBoxLayout,
+    QInputDialog,
     QLabel,
     QLineEdit,
     QMessageBox,
@@ -15,8 +22,48 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from crypto.kdf import KDF_PBKDF2, KdfParams, apply_params, available_kdfs, calibrate
 from gui.config import cfg
 from gui.translator import translate
+from keys.rekey import retune_kdf
+
+
+class KdfCalibrateThread(QThread):
+    """Benchmark the KDF off the UI thread"""
+
+    done = Signal(object)  # KdfParams / error message (str)
+
+    def __init__(self, kdf: str, target_ms: int):
+        super().__init__()
+        self.kdf = kdf
+        self.target_ms = target_ms
+
+    def run(self):
+        try:
+            self.done.emit(calibrate(self.kdf, self.target_ms))
+        except Exception as e:
+            self.done.emit(str(e))
+
+
+class KdfRekeyThread(QThread):
+    """Re-wrap vault key with new KDF settings off the UI thread"""
+
+    done = Signal(str)  # Error message, empty if success
+
+    def __init__(self, vault_manager: "VaultManager", username: str, password: str):
+        super().__init__()
+        self.vault_manager = vault_manager
+        self.username = username
+        self.password = password
+
+    def run(self):
+        try:
+            retune_kdf(self.vault_manager, self.username, self.password)
+            self.done.emit("")
+        except Exception as e:
+            self.done.emit(str(e))
+        finally:
+            self.password = None
 
 
 class SettingsTab(QWidget):
@@ -27,6 +74,12 @@ class SettingsTab(QWidget):
     def __init__(self):
         super().__init__()
 
+        self.vault_manager: Optional["VaultManager"] = None
+        self.username: Optional[str] = None
+        self.rekey_thread: Optional[KdfRekeyThread] = None
+        self.calibrate_thread: Optional[KdfCalibrateThread] = None
+        self.calibrated: Optional[KdfParams] = None  # Applied on save
+
         # Main layout
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -128,6 +181,13 @@ class SettingsTab(QWidget):
         self.label_security_warning = QLabel()
         self.label_security_warning.setWordWrap(True)
         self.label_security_warning.setStyleSheet("color: #e74c3c; margin-bottom: 5px;")
+        self.kdf_selector = QComboBox()
+        self.kdf_selector.addItems(available_kdfs())
+        self.kdf_target = QSpinBox()
+        self.kdf_target.setRange(50, 5000)
+        self.kdf_target.setSuffix(" ms")
+        self.calibrate_btn = QPushButton()
+        self.calibrate_btn.clicked.connect(self.calibrate_kdf)
         self.iter = QSpinBox()
         self.iter.setRange(1000, 9999999)
         self.rounds = QSpinBox()
@@ -136,17 +196,27 @@ class SettingsTab(QWidget):
         self.salt_size.setRange(8, 128)
         self.lockout = QSpinBox()
         self.lockout.setRange(0, 86400)
+        self.notes_index = QCheckBox()
 
+        self.label_kdf = QLabel()
+        self.label_kdf_target = QLabel()
         self.label_iter = QLabel()
         self.label_rounds = QLabel()
         self.label_salt = QLabel()
         self.label_lockout = QLabel()
+        self.label_notes_index = QLabel()
 
         # Add in widget layout
+        kdf_target_layout = QHBoxLayout()
+        kdf_target_layout.addWidget(self.kdf_target, 1)
+        kdf_target_layout.addWidget(self.calibrate_btn)
+        security_form.addRow(self.label_kdf, self.kdf_selector)
+        security_form.addRow(self.label_kdf_target, kdf_target_layout)
         security_form.addRow(self.label_iter, self.iter)
         security_form.addRow(self.label_rounds, self.rounds)
         security_form.addRow(self.label_salt, self.salt_size)
         security_form.addRow(self.label_lockout, self.lockout)
+        security_form.addRow(self.label_notes_index, self.notes_index)
         security_form.addRow(self.label_security_warning)
         self.security_config.setLayout(security_form)
         self.widget_layout.addWidget(self.security_config)
@@ -164,10 +234,13 @@ class SettingsTab(QWidget):
         self.label_lang.setText(translate.get_translation("language"))
         self.label_delay.setText(translate.get_translation("hibp_api_delay"))
         self.label_timeout.setText(translate.get_translation("hibp_timeout"))
+        self.label_kdf.setText(translate.get_translation("kdf"))
+        self.label_kdf_target.setText(translate.get_translation("kdf_target"))
         self.label_iter.setText(translate.get_translation("pbkdf2_iterations"))
         self.label_rounds.setText(translate.get_translation("bcrypt_rounds"))
         self.label_salt.setText(translate.get_translation("salt_size"))
         self.label_lockout.setText(translate.get_translation("lockout"))
+        self.label_notes_index.setText(translate.get_translation("notes_index"))
         self.label_security_warning.setText(
             translate.get_translation("security_warning")
         )
@@ -175,6 +248,7 @@ class SettingsTab(QWidget):
         # Buttons texts
         self.save_btn.setText(translate.get_translation("save_btn"))
         self.reset_btn.setText(translate.get_translation("reset_btn"))
+        self.calibrate_btn.setText(translate.get_translation("kdf_calibrate_btn"))
 
     def _load_values(self):
         """Fill widgets with data from cfg.data"""
@@ -186,15 +260,112 @@ class SettingsTab(QWidget):
         self.lang_selector.setCurrentText(d.LANGUAGE)
         self.delay.setValue(d.HIBP_REQUEST_DELAY)
         self.timeout.setValue(d.HIBP_TIMEOUT)
+        self.kdf_selector.setCurrentText(d.KDF)
+        self.kdf_target.setValue(d.KDF_TARGET_MS)
         self.iter.setValue(d.PBKDF2_ITERATIONS)
         self.rounds.setValue(d.BCRYPT_ROUNDS)
         self.salt_size.setValue(d.SALT_SIZE)
         self.lockout.setValue(d.LOCKOUT_DURATION)
+        self.notes_index.setChecked(d.NOTES_INDEX)
+        self.calibrated = None
 
     def refresh_values(self):
         """Public method to force refresh UI from config object"""
         self._load_values()
 
+    def set_vault_manager(self, manager: "VaultManager", username: str):
+        """Dependency injection (KDF settings are applied to this vault)"""
+        self.vault_manager = manager
+        self.username = username
+
+    def calibrate_kdf(self):
+        """Benchmark selected KDF for the target unlock time in background"""
+        if self.calibrate_thread is not None:
+            return
+        self.calibrate_btn.setEnabled(False)
+        self.calibrate_thread = KdfCalibrateThread(
+            self.kdf_selector.currentText(), self.kdf_target.value()
+        )
+        self.calibrate_thread.done.connect(self.on_kdf_calibrated)
+        self.calibrate_thread.start()
+
+    def on_kdf_calibrated(self, result):
+        """Slot called when calibration is finished (result is kept till save)"""
+        self.calibrate_thread.wait()
+        self.calibrate_thread = None
+        self.calibrate_btn.setEnabled(True)
+
+        if isinstance(result, str):
+            QMessageBox.critical(
+                self,
+                translate.get_translation("error_title"),
+                translate.get_translation("kdf_calibrate_failed").format(error=result),
+            )
+            return
+
+        self.calibrated = result
+        if result.name == KDF_PBKDF2:
+            self.iter.setValue(result.iterations)
+        QMessageBox.information(
+            self,
+            translate.get_translation("success_title"),
+            translate.get_translation("kdf_calibrate_done").format(
+                kdf=result.name,
+                iterations=result.iterations,
+                memory=result.memory_cost,
+                parallelism=result.parallelism,
+            ),
+        )
+
+    def apply_kdf_settings(self):
+        """Offer background re-key when vault KDF differs from the settings"""
+        if not self.vault_manager or self.rekey_thread is not None:
+            return
+        if not self.vault_manager.kdf_outdated():
+            return
+
+        reply = QMessageBox.question(
+            self,
+            translate.get_translation("kdf_apply_title"),
+            translate.get_translation("kdf_apply_msg"),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        password, ok = QInputDialog.getText(
+            self,
+            translate.get_translation("kdf_apply_title"),
+            translate.get_translation("kdf_password_label"),
+            QLineEdit.EchoMode.Password,
+        )
+        if not ok or not password:
+            return
+
+        self.save_btn.setEnabled(False)
+        self.rekey_thread = KdfRekeyThread(self.vault_manager, self.username, password)
+        self.rekey_thread.done.connect(self.on_kdf_applied)
+        self.rekey_thread.start()
+
+    def on_kdf_applied(self, error: str):
+        """Slot called when background re-key is finished"""
+        self.rekey_thread.wait()
+        self.rekey_thread = None
+        self.save_btn.setEnabled(True)
+
+        if error:
+            QMessageBox.critical(
+                self,
+                translate.get_translation("error_title"),
+                translate.get_translation("kdf_apply_failed").format(error=error),
+            )
+        else:
+            QMessageBox.information(
+                self,
+                translate.get_translation("success_title"),
+                translate.get_translation("kdf_apply_done"),
+            )
+
     def save_settings(self):
         """Read data from UI and save in file"""
         old_lang = cfg.data.LANGUAGE
@@ -203,10 +374,16 @@ class SettingsTab(QWidget):
         cfg.data.LANGUAGE = new_lang
         cfg.data.HIBP_REQUEST_DELAY = self.delay.value()
         cfg.data.HIBP_TIMEOUT = self.timeout.value()
+        cfg.data.KDF = self.kdf_selector.currentText()
+        cfg.data.KDF_TARGET_MS = self.kdf_target.value()
+        if self.calibrated is not None and self.calibrated.name == cfg.data.KDF:
+            apply_params(self.calibrated)
+        self.calibrated = None
         cfg.data.PBKDF2_ITERATIONS = self.iter.value()
         cfg.data.BCRYPT_ROUNDS = self.rounds.value()
         cfg.data.SALT_SIZE = self.salt_size.value()
         cfg.data.LOCKOUT_DURATION = self.lockout.value()
+        cfg.data.NOTES_INDEX = self.notes_index.isChecked()
 
         # Save config
         cfg.save()
@@ -228,6 +405,9 @@ class SettingsTab(QWidget):
                 translate.get_translation("success_msg"),
             )
 
+        # Vault keeps its own KDF parameters, new ones apply by explicit re-key
+        self.apply_kdf_settings()
+
     def reset_settings(self):
         """Resetting the settings and loading them into the UI"""
         reply = QMessageBox.question(
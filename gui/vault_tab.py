@@ -3,9 +3,10 @@ from typing import TYPE_CHECKING, Optional
 if TYPE_CHECKING:
     from keys.vault import VaultManager
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtWidgets import (
     QCheckBox,
+    QFileDialog,
     QFrame,
     QGridLayout,
     QHBoxLayout,
@@ -14,6 +15,7 @@ from PySide6.QtWidgets import (
     QListWidget,
     QListWidgetItem,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
     QTextEdit,
     QVBoxLayout,
@@ -21,16 +23,43 @@ from PySide6.QtWidgets import (
 )
 
 from gui.translator import translate
+from keys.importer import VaultImporter
 from models.vault_model import VaultEntryModel
 
 
+class VaultImportThread(QThread):
+    """Import export file into the vault off the UI thread"""
+
+    progress = Signal(int, float)  # Rows read, rows per second
+    done = Signal(object)  # ImportStats / error message (str)
+
+    def __init__(self, vault_manager: "VaultManager", path: str):
+        super().__init__()
+        self.vault_manager = vault_manager
+        self.path = path
+
+    def run(self):
+        try:
+            stats = VaultImporter(self.vault_manager).import_file(
+                self.path,
+                progress=lambda stats: self.progress.emit(stats.rows, stats.rate),
+            )
+            self.done.emit(stats)
+        except Exception as e:
+            self.done.emit(str(e))
+
+
 class VaultTab(QWidget):
     "Vault tab widget"
 
+    SEARCH_LIMIT = 200  # Shown search results
+
     def __init__(self):
         super().__init__()
 
         self.vault_manager: Optional["VaultManager"] = None
+        self.import_thread: Optional[VaultImportThread] = None
+        self.import_dialog: Optional[QProgressDialog] = None
 
         layout = QHBoxLayout()
         self.setLayout(layout)
@@ -38,9 +67,12 @@ class VaultTab(QWidget):
         # Services list (Left side)
         left = QVBoxLayout()
         self.stored_services_label = QLabel()
+        self.search_input = QLineEdit()
+        self.search_input.setClearButtonEnabled(True)
         self.services_list = QListWidget()
 
         left.addWidget(self.stored_services_label)
+        left.addWidget(self.search_input)
         left.addWidget(self.services_list)
 
         # Form (Right side)
@@ -88,12 +120,14 @@ class VaultTab(QWidget):
         self.clear_button = QPushButton()
         self.delete_button = QPushButton()
         self.refresh_button = QPushButton()
+        self.import_button = QPushButton()
 
         # Add widgets in layout
         buttons.addWidget(self.save_button)
         buttons.addWidget(self.clear_button)
         buttons.addWidget(self.delete_button)
         buttons.addWidget(self.refresh_button)
+        buttons.addWidget(self.import_button)
 
         right_layout.addSpacing(20)
         right_layout.addLayout(buttons)
@@ -104,12 +138,14 @@ class VaultTab(QWidget):
 
         # Logic connection
         self.services_list.itemClicked.connect(self.load_entry)
+        self.search_input.textChanged.connect(self.refresh_list)
 
         # Buttons connection
         self.save_button.clicked.connect(self.save_entry)
         self.clear_button.clicked.connect(self.clear_form)
         self.delete_button.clicked.connect(self.delete_entry)
         self.refresh_button.clicked.connect(self.refresh_list)
+        self.import_button.clicked.connect(self.import_entries)
 
         # Apply translate at start
         self.retranslate_ui()
@@ -129,6 +165,9 @@ class VaultTab(QWidget):
         self.show_pass.setText(translate.get_translation("vault_show_pass"))
 
         # Placeholder text
+        self.search_input.setPlaceholderText(
+            translate.get_translation("vault_search_placeholder")
+        )
         self.notes_input.setPlaceholderText(
             translate.get_translation("vault_notes_placeholder")
         )
@@ -138,6 +177,7 @@ class VaultTab(QWidget):
         self.clear_button.setText(translate.get_translation("vault_btn_clear"))
         self.delete_button.setText(translate.get_translation("vault_btn_delete"))
         self.refresh_button.setText(translate.get_translation("vault_btn_refresh"))
+        self.import_button.setText(translate.get_translation("vault_btn_import"))
 
     def set_vault_manager(self, manager: "VaultManager"):
         """Dependency injection"""
@@ -158,13 +198,26 @@ class VaultTab(QWidget):
         self.notes_input.clear()
 
     def refresh_list(self):
-        "Refresh service list"
+        "Refresh service list (filtered by search text)"
         if not self.vault_manager:
             return
 
+        query = self.search_input.text()
         self.services_list.clear()
         try:
-            services = self.vault_manager.list_services()
+            if query.strip():
+                services = self.vault_manager.search_services(query, self.SEARCH_LIMIT)
+                # Matches in notes go after matches in names
+                seen = set(services)
+                services += [
+                    service
+                    for service in self.vault_manager.search_notes(
+                        query, self.SEARCH_LIMIT
+                    )
+                    if service not in seen
+                ]
+            else:
+                services = self.vault_manager.list_services()
             self.services_list.addItems(services)
         except Exception as e:
             QMessageBox.critical(
@@ -184,6 +237,7 @@ class VaultTab(QWidget):
         entry = self.vault_manager.get_entry(service_name)
 
         if entry:
+            self.vault_manager.mark_used(service_name)
             self.service_input.setText(entry.service)
             self.name_input.setText(entry.username)
             self.pass_input.setText(entry.password)
@@ -293,3 +347,68 @@ class VaultTab(QWidget):
                     translate.get_translation("error_title"),
                     translate.get_translation("vault_err_del_failed"),
                 )
+
+    def import_entries(self):
+        """Import entries from CSV / JSON export file in background"""
+        if not self.vault_manager or self.import_thread is not None:
+            return
+
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            translate.get_translation("vault_import_title"),
+            "",
+            "CSV / JSON (*.csv *.json *.jsonl)",
+        )
+        if not path:
+            return
+
+        # Row count is unknown while streaming, so progress is busy indicator.
+        # Modal: the vault is in an import transaction until it's done
+        self.import_dialog = QProgressDialog(self)
+        self.import_dialog.setWindowTitle(
+            translate.get_translation("vault_import_title")
+        )
+        self.import_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.import_dialog.setRange(0, 0)
+        self.import_dialog.setCancelButton(None)
+        self.import_dialog.setMinimumDuration(0)
+        self.import_dialog.show()
+
+        self.import_thread = VaultImportThread(self.vault_manager, path)
+        self.import_thread.progress.connect(self.on_import_progress)
+        self.import_thread.done.connect(self.on_import_done)
+        self.import_thread.start()
+
+    def on_import_progress(self, rows: int, rate: float):
+        """Slot called after every imported chunk"""
+        self.import_dialog.setLabelText(
+            translate.get_translation("vault_import_progress").format(
+                rows=rows, rate=int(rate)
+            )
+        )
+
+    def on_import_done(self, result):
+        """Slot called when background import is finished"""
+        self.import_thread.wait()
+        self.import_thread = None
+        self.import_dialog.close()
+        self.import_dialog = None
+
+        if isinstance(result, str):
+            QMessageBox.critical(
+                self,
+                translate.get_translation("error_title"),
+                translate.get_translation("vault_err_import").format(error=result),
+            )
+            return
+
+        message = translate.get_translation("vault_import_done").format(
+            imported=result.imported, skipped=result.skipped, seconds=result.elapsed
+        )
+        if result.errors:
+            message += "\n\n" + "\n".join(result.errors[:5])
+
+        QMessageBox.information(
+            self, translate.get_translation("success_title"), message
+        )
+        self.refresh_list()
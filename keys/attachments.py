@@ -0,0 +1,133 @@
+import hashlib
+import os
+import secrets
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Union
+
+from crypto import stream
+from crypto.crypto import CryptoManager
+
+if TYPE_CHECKING:
+    from keys.vault import VaultManager
+
+"""
+Explanation:
+    Files attached to vault entries, encrypted with crypto/stream.py:
+        {name}.vault.attachments/{service hash}/{attachment id}.bin
+    Original file name and size are sealed inside each file, the service name
+    is authenticated with its chunks. Files are encrypted with an attachment
+    key kept in vault metadata wrapped by the vault data key, so a password
+    change or a full re-key only re-wraps that key, large files are not
+    touched. Attachments of deleted entries are removed by prune().
+"""
+
+AttachmentPath = Union[str, Path]
+
+
+@dataclass
+class AttachmentInfo:
+    """Attachment of an entry"""
+
+    id: str
+    name: str
+    size: int
+
+
+class VaultAttachments:
+    """Encrypted file attachments of vault entries"""
+
+    SUFFIX = ".bin"
+
+    def __init__(self, vault_manager: "VaultManager"):
+        self.vault = vault_manager
+        self.dir = vault_manager.vault_path.with_name(
+            vault_manager.vault_path.name + ".attachments"
+        )
+        self._crypto: Optional[CryptoManager] = None
+
+    # Attachment key manager (key is created and stored on first use)
+    @property
+    def crypto(self) -> CryptoManager:
+        if self._crypto is None:
+            wrapped = self.vault.metadata.attachment_key
+            if wrapped:
+                key = self.vault.crypto.unwrap_key(wrapped)
+            else:
+                key = CryptoManager.generate_key()
+                self.vault.store.update_metadata(
+                    attachment_key=self.vault.crypto.wrap_key(key)
+                )
+            self._crypto = CryptoManager.from_key(key)
+        return self._crypto
+
+    def add(self, service: str, path: AttachmentPath) -> AttachmentInfo:
+        """Encrypt file into the entry's attachments (KeyError if no entry)"""
+        if service not in self.vault.store:
+            raise KeyError(service)
+        path = Path(path)
+        attachment_id = secrets.token_hex(8)
+        target = self._service_dir(service) / f"{attachment_id}{self.SUFFIX}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        size = stream.encrypt_file(
+            self.crypto,
+            path,
+            target,
+            info={"name": path.name, "size": os.path.getsize(path)},
+            associated_data=service.encode("utf-8"),
+        )
+        return AttachmentInfo(attachment_id, path.name, size)
+
+    def list(self, service: str) -> List[AttachmentInfo]:
+        """Attachments of the entry (only file headers are decrypted)"""
+        result = []
+        service_dir = self._service_dir(service)
+        if not service_dir.exists():
+            return result
+        for path in sorted(service_dir.glob(f"*{self.SUFFIX}")):
+            try:
+                info = stream.read_info(
+                    self.crypto, path, associated_data=service.encode("utf-8")
+                )
+            except (OSError, ValueError) as e:
+                print(f"Attachment {path.name} can't be read: {e}")
+                continue
+            result.append(AttachmentInfo(path.stem, info["name"], info["size"]))
+        return result
+
+    def extract(
+        self, service: str, attachment_id: str, target: AttachmentPath
+    ) -> AttachmentInfo:
+        """Decrypt attachment into target file (ValueError if damaged)"""
+        info = stream.decrypt_file(
+            self.crypto,
+            self._path(service, attachment_id),
+            target,
+            associated_data=service.encode("utf-8"),
+        )
+        return AttachmentInfo(attachment_id, info["name"], info["size"])
+
+    def remove(self, service: str, attachment_id: str) -> bool:
+        path = self._path(service, attachment_id)
+        if not path.exists():
+            return False
+        path.unlink()
+        return True
+
+    def prune(self, services: Iterable[str]):
+        """Remove attachments of services that are not in the vault"""
+        for service in services:
+            if service not in self.vault.store:
+                shutil.rmtree(self._service_dir(service), ignore_errors=True)
+
+    def _service_dir(self, service: str) -> Path:
+        # Service names are not secret (stored in plaintext), the hash only
+        # makes them safe as directory names
+        return self.dir / hashlib.sha256(service.encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, service: str, attachment_id: str) -> Path:
+        if not attachment_id.isalnum():
+            raise ValueError(f"Invalid attachment id: {attachment_id}")
+        return self._service_dir(service) / f"{attachment_id}{self.SUFFIX}"
@@ -0,0 +1,113 @@
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Tuple
+
+"""
+Explanation:
+    Binary vault container (version 1):
+        header  : magic (8) | version (u16) | flags (u16) | reserved (u32)
+                  | index offset (u64) | index length (u64)
+        records : record length (u32) + record (compact JSON of encrypted entry)
+        index   : JSON {"metadata": {...},
+                        "entries": {service: [offset, length, username index]}}
+    Only header and index are parsed on open, so open time depends on the
+    number of services, not on the size of notes and passwords. A record is
+    decoded on request straight from the memory-mapped file. Username blind
+    index tokens are kept in the index, so lookups don't touch the records.
+"""
+
+MAGIC = b"HASHALL\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIQQ")
+RECORD_LENGTH = struct.Struct("<I")
+
+
+def is_container(path: Path) -> bool:
+    """Check container magic (False for legacy JSON vault)"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class VaultContainer:
+    """Read-only memory-mapped vault container"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, _, _, index_offset, index_length = HEADER.unpack_from(
+                self._map, 0
+            )
+            if magic != MAGIC:
+                raise ValueError("Not a vault container")
+            if version > VERSION:
+                raise ValueError(f"Vault container version {version} is not supported")
+
+            index = json.loads(self._map[index_offset : index_offset + index_length])
+        except (ValueError, struct.error, KeyError) as e:
+            self.close()
+            raise ValueError(f"Damaged vault container: {e}") from e
+
+        self.metadata: dict = index["metadata"]
+        self.index: Dict[str, list] = index["entries"]
+
+    def __contains__(self, service: str) -> bool:
+        return service in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def services(self) -> List[str]:
+        return list(self.index)
+
+    def username_index(self, service: str) -> str:
+        """Username blind index token (empty for old records)"""
+        item = self.index[service]
+        return item[2] if len(item) > 2 else ""
+
+    def read_raw(self, service: str) -> bytes:
+        """Encoded record of the service (KeyError if not exist)"""
+        offset, length = self.index[service][:2]
+        return self._map[offset : offset + length]
+
+    def read(self, service: str) -> dict:
+        return json.loads(self.read_raw(service))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def write_container(
+    f: BinaryIO, metadata: dict, records: Iterable[Tuple[str, bytes, str]]
+) -> int:
+    """Write (service, record, username index) records / returns records count"""
+    f.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0))  # Placeholder
+
+    index: Dict[str, list] = {}
+    offset = HEADER.size
+    for service, record, username_index in records:
+        f.write(RECORD_LENGTH.pack(len(record)))
+        f.write(record)
+        index[service] = [offset + RECORD_LENGTH.size, len(record), username_index]
+        offset += RECORD_LENGTH.size + len(record)
+
+    index_bytes = json.dumps(
+        {"metadata": metadata, "entries": index}, separators=(",", ":")
+    ).encode("utf-8")
+    f.write(index_bytes)
+
+    # Real header, then back to the end
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, 0, 0, offset, len(index_bytes)))
+    f.seek(0, 2)
+    return len(index)
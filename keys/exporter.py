@@ -0,0 +1,176 @@
+import csv
+import json
+import os
+import stat
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Union
+
+from crypto.crypto import CryptoManager, map_many
+from crypto.kdf import KDF_PBKDF2, KdfParams, default_params
+from keys.vault import VaultManager
+from models.vault_model import EncryptedVaultEntryModel
+
+"""
+Explanation:
+    Streaming export of the vault. Services are decrypted chunk by chunk in a
+    thread pool and written out immediately, so memory use does not depend on
+    the vault size. Formats:
+        csv / jsonl - plaintext (service, username, password, notes, created_at)
+        archive     - JSON Lines: header with KDF parameters, then one token per
+                      entry encrypted with a key derived from the archive password
+"""
+
+ARCHIVE_FORMAT = "hash.all-archive"
+ARCHIVE_VERSION = 2  # 2: AEAD entry tokens (version 1 archives are read too)
+ARCHIVE_EXTENSIONS = {"hashall": "archive"}  # File extension -> format
+
+
+@dataclass
+class ExportStats:
+    """Export progress / result"""
+
+    total: int = 0
+    exported: int = 0
+    failed: int = 0  # Entries that could not be decrypted
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Entries per second"""
+        return self.exported / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class VaultExporter:
+    """Streaming exporter of vault entries"""
+
+    CHUNK_SIZE = 500
+    FIELDS = ("service", "username", "password", "notes", "created_at")
+    FORMATS = ("csv", "jsonl", "archive")
+
+    def __init__(
+        self,
+        vault_manager: VaultManager,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ):
+        self.vault = vault_manager
+        self.workers = workers  # None = CRYPTO_WORKERS setting
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+
+    def export_file(
+        self,
+        path: Union[str, Path],
+        fmt: Optional[str] = None,
+        archive_password: Optional[str] = None,
+        progress: Optional[Callable[[ExportStats], None]] = None,
+    ) -> ExportStats:
+        """Export vault to csv / jsonl / archive file (fmt by extension if None)"""
+        path = Path(path)
+        fmt = (fmt or path.suffix.lstrip(".")).lower()
+        fmt = ARCHIVE_EXTENSIONS.get(fmt, fmt)
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        if fmt == "archive" and not archive_password:
+            raise ValueError("Archive export requires a password")
+
+        archive = None
+        if fmt == "archive":
+            archive = CryptoManager(password=archive_password)
+
+        stats = ExportStats()
+        start = time.perf_counter()
+
+        # Export file is created with rw------- rights
+        fd = os.open(
+            path,
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+            stat.S_IRUSR | stat.S_IWUSR,
+        )
+        with open(fd, "w", encoding="utf-8", newline="") as f:
+            writer = None
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(self.FIELDS)
+            elif archive:
+                header = {
+                    "format": ARCHIVE_FORMAT,
+                    "version": ARCHIVE_VERSION,
+                    "kdf": archive.kdf,
+                    "iterations": archive.iterations,
+                    "memory_cost": archive.kdf_params.memory_cost,
+                    "parallelism": archive.kdf_params.parallelism,
+                    "salt": archive.salt.hex(),
+                }
+                f.write(json.dumps(header) + "\n")
+
+            # Decryption (and archive encryption) run in thread pool
+            def export_row(encrypted: EncryptedVaultEntryModel) -> Union[dict, str]:
+                entry = self.vault.decrypt_entry(encrypted)
+                row = entry.model_dump(include=set(self.FIELDS))
+                return archive.encrypt_data(json.dumps(row)) if archive else row
+
+            results = map_many(
+                export_row, self._iter_encrypted(stats), self.workers, self.chunk_size
+            )
+            for done, result in enumerate(results, 1):
+                if isinstance(result, ValueError):
+                    stats.failed += 1
+                else:
+                    if writer:
+                        writer.writerow([result[name] for name in self.FIELDS])
+                    elif archive:
+                        f.write(result + "\n")
+                    else:
+                        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    stats.exported += 1
+
+                if done % self.chunk_size == 0:
+                    stats.elapsed = time.perf_counter() - start
+                    if progress:
+                        progress(stats)
+
+        stats.elapsed = time.perf_counter() - start
+        if progress:
+            progress(stats)
+        return stats
+
+    def _iter_encrypted(self, stats: ExportStats) -> Iterator[EncryptedVaultEntryModel]:
+        """Encrypted entries of the vault, read one by one"""
+        services = self.vault.list_services()
+        stats.total = len(services)
+        for service in services:
+            encrypted = self.vault.store.get(service)
+            if encrypted is not None:
+                yield encrypted
+
+
+def read_archive(path: Union[str, Path], password: str) -> Iterator[dict]:
+    """Stream decrypted entries (dicts) from export archive"""
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != ARCHIVE_FORMAT:
+            raise ValueError("Not a hash.all archive")
+        if header.get("version", 0) > ARCHIVE_VERSION:
+            raise ValueError("Archive version is not supported")
+
+        kdf = default_params(header.get("kdf", KDF_PBKDF2))
+        if header.get("iterations"):
+            kdf = KdfParams(
+                kdf.name,
+                header["iterations"],
+                header.get("memory_cost", 0),
+                header.get("parallelism", 0),
+            )
+        crypto = CryptoManager(
+            password=password, salt=bytes.fromhex(header["salt"]), kdf=kdf
+        )
+        for line in f:
+            token = line.strip()
+            if not token:
+                continue
+            try:
+                yield json.loads(crypto.decrypt_data(token))
+            except ValueError as e:
+                raise ValueError("Wrong archive password or damaged archive") from e
@@ -0,0 +1,241 @@
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Union
+from urllib.parse import urlparse
+
+from pydantic import ValidationError
+
+from crypto.crypto import map_many
+from keys.exporter import ARCHIVE_EXTENSIONS, read_archive
+from keys.vault import VaultManager
+from models.vault_model import EncryptedVaultEntryModel, VaultEntryModel
+
+"""
+Explanation:
+    Bulk import from CSV exports (Chrome, Firefox, Bitwarden, LastPass, KeePass
+    and generic service/username/password/notes columns), JSON Lines and JSON
+    exports (Bitwarden "items" or a plain list of objects) and hash.all export
+    archives (keys/exporter.py).
+    Rows are read as a stream and handled in chunks: each chunk is validated
+    and encrypted in a thread pool, then only ciphertext is kept. All chunks are
+    committed with a single vault write (VaultManager.transaction).
+"""
+
+
+@dataclass
+class ImportStats:
+    """Import progress / result"""
+
+    rows: int = 0
+    imported: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    errors: List[str] = field(default_factory=list)  # First MAX_ERRORS messages
+
+    @property
+    def rate(self) -> float:
+        """Rows per second"""
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def error_message(error: ValueError) -> str:
+    """Short message of validation error"""
+    if isinstance(error, ValidationError) and error.errors():
+        return error.errors()[0]["msg"]
+    return str(error)
+
+
+class VaultImporter:
+    """Streaming importer of password manager exports"""
+
+    CHUNK_SIZE = 500
+    MAX_ERRORS = 50
+    READ_SIZE = 65536  # JSON stream read block (chars)
+
+    # Known column names of export formats (lowercase), first match wins
+    FIELD_ALIASES = {
+        "service": ("service", "name", "title"),
+        "url": ("url", "login_uri", "uri", "origin", "website", "hostname"),
+        "username": ("username", "login_username", "login", "user", "email"),
+        "password": ("password", "login_password", "pass"),
+        "notes": ("notes", "note", "extra", "comments", "comment"),
+    }
+
+    def __init__(
+        self,
+        vault_manager: VaultManager,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ):
+        self.vault = vault_manager
+        self.workers = workers  # None = CRYPTO_WORKERS setting
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+
+    def import_file(
+        self,
+        path: Union[str, Path],
+        fmt: Optional[str] = None,
+        progress: Optional[Callable[[ImportStats], None]] = None,
+        archive_password: Optional[str] = None,
+    ) -> ImportStats:
+        """Import csv / jsonl / json / archive file (fmt by extension if None)"""
+        path = Path(path)
+        fmt = (fmt or path.suffix.lstrip(".")).lower()
+        fmt = ARCHIVE_EXTENSIONS.get(fmt, fmt)
+        if fmt == "archive":
+            if not archive_password:
+                raise ValueError("Archive import requires a password")
+            rows = read_archive(path, archive_password)
+        else:
+            rows = self._read_rows(path, fmt)
+        stats = ImportStats()
+        start = time.perf_counter()
+
+        with self.vault.transaction():
+            results = map_many(self._encrypt_row, rows, self.workers, self.chunk_size)
+            for result in results:
+                stats.rows += 1
+                if isinstance(result, EncryptedVaultEntryModel):
+                    self.vault.add_encrypted_entry(result)
+                    stats.imported += 1
+                else:
+                    stats.skipped += 1
+                    if len(stats.errors) < self.MAX_ERRORS:
+                        stats.errors.append(
+                            f"Row {stats.rows}: {error_message(result)}"
+                        )
+
+                if stats.rows % self.chunk_size == 0:
+                    stats.elapsed = time.perf_counter() - start
+                    if progress:
+                        progress(stats)
+
+        stats.elapsed = time.perf_counter() - start
+        if progress:
+            progress(stats)
+        return stats
+
+    def _encrypt_row(self, row: dict) -> EncryptedVaultEntryModel:
+        """Row -> encrypted entry (ValueError if row is invalid)"""
+        return self.vault.encrypt_entry(self._to_entry(row))
+
+    def _to_entry(self, row: dict) -> VaultEntryModel:
+        """Map export columns on VaultEntryModel"""
+        # Nested login object (Bitwarden JSON)
+        login = row.get("login")
+        if isinstance(login, dict):
+            row = {**row, **login}
+            uris = login.get("uris") or []
+            if uris and isinstance(uris[0], dict):
+                row.setdefault("uri", uris[0].get("uri"))
+
+        values = {}
+        normalized = {str(k).strip().lower(): v for k, v in row.items()}
+        for target, aliases in self.FIELD_ALIASES.items():
+            for alias in aliases:
+                value = normalized.get(alias)
+                if isinstance(value, str) and value.strip():
+                    values[target] = value.strip()
+                    break
+
+        service = values.get("service")
+        if not service and values.get("url"):
+            url = values["url"]
+            service = urlparse(url if "//" in url else f"//{url}").hostname or url
+        if not service:
+            raise ValueError("Service name not found")
+
+        entry = dict(
+            service=service,
+            username=values.get("username", ""),
+            password=values.get("password", ""),
+            notes=values.get("notes", ""),
+        )
+        created_at = row.get("created_at")
+        if isinstance(created_at, str):  # CSV columns are text
+            try:
+                created_at = float(created_at)
+            except ValueError:
+                created_at = None
+        if isinstance(created_at, (int, float)):
+            entry["created_at"] = created_at
+        return VaultEntryModel(**entry)
+
+    def _read_rows(self, path: Path, fmt: str) -> Iterator[dict]:
+        if fmt == "csv":
+            return self._read_csv(path)
+        if fmt in ("jsonl", "ndjson"):
+            return self._read_jsonl(path)
+        if fmt == "json":
+            return self._read_json(path)
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    def _read_csv(self, path: Path) -> Iterator[dict]:
+        # utf-8-sig drops BOM (Excel / KeePass exports)
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+
+    def _read_jsonl(self, path: Path) -> Iterator[dict]:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _read_json(self, path: Path) -> Iterator[dict]:
+        """Stream objects from top-level list or "items" list without full load"""
+        decoder = json.JSONDecoder()
+
+        with open(path, "r", encoding="utf-8-sig") as f:
+            buffer = f.read(self.READ_SIZE)
+
+            # Find array start
+            while True:
+                stripped = buffer.lstrip()
+                if stripped.startswith("["):
+                    pos = buffer.index("[") + 1
+                    break
+                marker = buffer.find('"items"')
+                bracket = buffer.find("[", marker) if marker != -1 else -1
+                if bracket != -1:
+                    pos = bracket + 1
+                    break
+                chunk = f.read(self.READ_SIZE)
+                if not chunk:
+                    return
+                buffer += chunk
+
+            # Decode array items one by one
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+
+                # Drop decoded part, refill buffer if it is empty
+                if pos >= len(buffer) or pos > self.READ_SIZE:
+                    buffer = buffer[pos:]
+                    pos = 0
+                    if not buffer:
+                        buffer = f.read(self.READ_SIZE)
+                        if not buffer:
+                            return
+                        continue
+
+                if buffer[pos] == "]":
+                    return
+
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Item is not read completely yet
+                    chunk = f.read(self.READ_SIZE)
+                    if not chunk:
+                        raise
+                    buffer = buffer[pos:] + chunk
+                    pos = 0
+                    continue
+
+                if isinstance(item, dict):
+                    yield item
+                pos = end
@@ -0,0 +1,197 @@
+import bisect
+import re
+import threading
+import unicodedata
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+"""
+Explanation:
+    Opt-in in-memory inverted index over decrypted notes (word -> services).
+    It is filled by a background thread that decrypts notes in batches, and
+    kept up to date by VaultManager on every add / delete. Query words match
+    as prefixes and all of them must be present in the notes. The index holds
+    plaintext words, so it lives only in memory and is wiped on close().
+"""
+
+WORD_RE = re.compile(r"\w+")
+
+# Reads notes of the service / None if it does not exist or can't be decrypted
+NotesReader = Callable[[str], Optional[str]]
+
+
+def tokenize(text: str) -> Set[str]:
+    """Normalized words of the text"""
+    return set(WORD_RE.findall(unicodedata.normalize("NFKC", text).casefold()))
+
+
+class NotesIndex:
+    """Inverted index over decrypted notes, built lazily in background"""
+
+    BATCH_SIZE = 256
+    MAX_INSORT = 64  # More word changes per update -> vocabulary is re-sorted lazily
+
+    def __init__(self, read_notes: NotesReader):
+        self._read_notes = read_notes
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # word -> services / service -> its words
+        self._postings: Dict[str, Dict[str, None]] = {}
+        self._words: Dict[str, Set[str]] = {}
+        # Sorted vocabulary for prefix lookup (None = rebuild on next query)
+        self._vocabulary: Optional[List[str]] = None
+
+        # Services waiting for (re)indexing and update counters, so a batch
+        # decrypted before a direct update can't overwrite it
+        self._pending: deque = deque()
+        self._queued: Set[str] = set()
+        self._versions: Dict[str, int] = {}
+
+    @property
+    def ready(self) -> bool:
+        """True when nothing is waiting for indexing"""
+        with self._lock:
+            return not self._pending and self._thread is None
+
+    # Queue services for background indexing (vault content is read later)
+    def schedule(self, services: Iterable[str]):
+        with self._lock:
+            if self._closed:
+                return
+            for service in services:
+                if service not in self._queued:
+                    self._queued.add(service)
+                    self._pending.append(service)
+            if self._pending and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="notes-index", daemon=True
+                )
+                self._thread.start()
+
+    # Index known plaintext notes right away
+    def update(self, service: str, notes: str):
+        with self._lock:
+            if self._closed:
+                return
+            self._bump(service)
+            self._apply(service, tokenize(notes))
+
+    def remove(self, service: str):
+        with self._lock:
+            if self._closed:
+                return
+            self._bump(service)
+            self._apply(service, set())
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """Services whose notes have all query words (as prefixes), sorted"""
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self._postings)
+
+            found: Optional[Set[str]] = None
+            # Rarest prefix first keeps intersections small
+            for word in sorted(words, key=len, reverse=True):
+                matches: Set[str] = set()
+                start = bisect.bisect_left(self._vocabulary, word)
+                for candidate in self._vocabulary[start:]:
+                    if not candidate.startswith(word):
+                        break
+                    matches.update(self._postings.get(candidate, ()))
+                found = matches if found is None else found & matches
+                if not found:
+                    return []
+
+        result = sorted(found)
+        return result[:limit] if limit else result
+
+    # Stop indexing and drop all decrypted words
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+            self._queued.clear()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+        with self._lock:
+            for services in self._postings.values():
+                services.clear()
+            self._postings.clear()
+            self._words.clear()
+            self._versions.clear()
+            self._vocabulary = None
+
+    def _bump(self, service: str):
+        self._versions[service] = self._versions.get(service, 0) + 1
+
+    # Replace words of the service (lock is held). Vocabulary keeps exactly
+    # the indexed words: new ones are inserted once, unused ones are removed
+    def _apply(self, service: str, words: Set[str]):
+        old = self._words.pop(service, set())
+        unused = []
+        for word in old - words:
+            services = self._postings.get(word)
+            if services is not None:
+                services.pop(service, None)
+                if not services:
+                    del self._postings[word]
+                    unused.append(word)
+
+        new_words = [word for word in words - old if word not in self._postings]
+        if self._vocabulary is not None:
+            if len(unused) + len(new_words) > self.MAX_INSORT:
+                self._vocabulary = None
+            else:
+                for word in unused:
+                    i = bisect.bisect_left(self._vocabulary, word)
+                    if i < len(self._vocabulary) and self._vocabulary[i] == word:
+                        del self._vocabulary[i]
+                for word in new_words:
+                    i = bisect.bisect_left(self._vocabulary, word)
+                    if i == len(self._vocabulary) or self._vocabulary[i] != word:
+                        self._vocabulary.insert(i, word)
+
+        for word in words:
+            self._postings.setdefault(word, {})[service] = None
+        if words:
+            self._words[service] = words
+
+    # Background worker: decrypt pending notes batch by batch
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._closed or not self._pending:
+                    self._thread = None
+                    return
+                batch = []
+                while self._pending and len(batch) < self.BATCH_SIZE:
+                    service = self._pending.popleft()
+                    self._queued.discard(service)
+                    batch.append((service, self._versions.get(service, 0)))
+
+            # Decryption runs without the lock, so queries are not blocked
+            results = []
+            for service, version in batch:
+                try:
+                    notes = self._read_notes(service)
+                except Exception as e:
+                    print(f"Notes index: failed to read {service}: {e}")
+                    notes = None
+                results.append((service, version, notes))
+
+            with self._lock:
+                if self._closed:
+                    self._thread = None
+                    return
+                for service, version, notes in results:
+                    if self._versions.get(service, 0) != version:
+                        continue  # Updated directly meanwhile
+                    self._apply(service, tokenize(notes) if notes else set())
@@ -0,0 +1,418 @@
+import hashlib
+import json
+import os
+import shutil
+import stat
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from auth.auth import AuthManager
+from crypto.crypto import CryptoManager, map_many
+from crypto.kdf import KDF_PBKDF2, KdfParams
+from gui.config import cfg
+from keys.store import ShardedVaultStore, encode_record, open_store, write_private
+from keys.vault import VaultManager, vault_path
+from models.auth_model import UserLoginModel, UserRegModel
+from models.vault_model import EncryptedVaultEntryModel, KeySlotModel
+
+"""
+Explanation:
+    change_password() only re-wraps the vault data key with the new
+    password-derived key, so it takes constant time for any vault size.
+    retune_kdf() does the same with the current password to apply new KDF
+    settings (the vault keeps its KDF parameters in the key slot).
+
+    VaultRekey is a full re-key: new master password and new random data key.
+    Every entry is decrypted with the old data key and encrypted with the new
+    one in a thread pool. Results go to a staging directory ({username}.rekey/
+    near the vaults):
+        checkpoint.json - phase, new bcrypt hash, new vault salt, KDF parameters,
+                          new data key (wrapped by the new password-derived key)
+                          and the committed size of staging.jsonl
+        staging.jsonl   - {"fp": old record hash, "entry": new encrypted entry}
+    Each re-encrypted entry is decrypted again with the new key and compared
+    with the plaintext before it is staged. An interrupted run resumes from the
+    checkpoint (old records changed meanwhile are staged again).
+    When everything is staged, a new vault is built in the staging directory
+    and the phase becomes "verified". From then on commit needs no keys: new
+    hash and salt go to the user store, the new vault replaces the live one and
+    staging is removed. Each step is idempotent, and recover_rekeys() finishes
+    a commit interrupted by a crash before anybody logs in.
+"""
+
+CHECKPOINT_NAME = "checkpoint.json"
+STAGING_NAME = "staging.jsonl"
+CHECKPOINT_VERSION = 1
+
+
+@dataclass
+class RekeyStats:
+    """Re-key progress / result"""
+
+    total: int = 0
+    done: int = 0  # Staged entries (resumed ones included)
+    resumed: int = 0  # Entries taken from the interrupted run
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Entries per second"""
+        return (self.done - self.resumed) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def rekey_dir(username: str) -> Path:
+    """Staging directory of user's password change"""
+    return cfg.vaults_dir / f"{username}.rekey"
+
+
+def load_checkpoint(username: str) -> Optional[dict]:
+    """Checkpoint of unfinished password change / None"""
+    path = rekey_dir(username) / CHECKPOINT_NAME
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version", 0) > CHECKPOINT_VERSION:
+        raise ValueError("Password change checkpoint version is not supported")
+    return checkpoint
+
+
+def checkpoint_params(checkpoint: dict) -> KdfParams:
+    """KDF parameters of the new password key (early checkpoints: PBKDF2)"""
+    kdf = checkpoint["kdf"]
+    if isinstance(kdf, dict):
+        return KdfParams(**kdf)
+    return KdfParams(kdf or KDF_PBKDF2, checkpoint["iterations"])
+
+
+def record_hash(entry: EncryptedVaultEntryModel) -> str:
+    """Fingerprint of the old record (detects changes between runs)"""
+    return hashlib.sha256(encode_record(entry)).hexdigest()
+
+
+class VaultRekey:
+    """Resumable re-encryption of the vault with a new master password"""
+
+    CHUNK_SIZE = 500
+
+    def __init__(
+        self,
+        vault_manager: VaultManager,
+        username: str,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ):
+        self.vault = vault_manager
+        self.username = username
+        self.workers = workers  # None = CRYPTO_WORKERS setting
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+
+        self.dir = rekey_dir(username)
+        self.checkpoint_path = self.dir / CHECKPOINT_NAME
+        self.staging_path = self.dir / STAGING_NAME
+
+    def run(
+        self,
+        new_password: str,
+        progress: Optional[Callable[[RekeyStats], None]] = None,
+    ) -> RekeyStats:
+        """Re-encrypt vault with new password and make it live. The caller
+        closes the vault manager afterwards (it still shows the old vault)"""
+        auth = AuthManager()
+        checkpoint = load_checkpoint(self.username)
+
+        if checkpoint is None:
+            UserRegModel(username=self.username, password=new_password)
+            password_key = CryptoManager(
+                password=new_password, salt=os.urandom(cfg.data.SALT_SIZE)
+            )
+            checkpoint = {
+                "version": CHECKPOINT_VERSION,
+                "phase": "staging",
+                "username": self.username,
+                "hash": auth.hash_password(new_password),
+                "vault_salt": password_key.salt.hex(),
+                "kdf": asdict(password_key.kdf_params),
+                "data_key": password_key.wrap_key(CryptoManager.generate_key()),
+                "offset": 0,
+                "started": time.time(),
+            }
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self._write_checkpoint(checkpoint)
+        elif not auth.check_password(new_password, checkpoint["hash"]):
+            raise ValueError(
+                "New password does not match the interrupted password change"
+            )
+
+        if checkpoint["phase"] == "staging":
+            stats = self._stage(checkpoint, new_password, progress)
+        else:
+            stats = RekeyStats()
+
+        # Vault files are released before the new vault replaces them
+        self.vault.store.close()
+        finish_rekey(self.username)
+        return stats
+
+    def _write_checkpoint(self, checkpoint: dict):
+        write_private(
+            self.checkpoint_path, json.dumps(checkpoint, indent=2).encode("utf-8")
+        )
+
+    # Staged fingerprints by service. Bytes past the checkpoint are cut off
+    def _read_staged(self, offset: int) -> Dict[str, str]:
+        staged: Dict[str, str] = {}
+        if not self.staging_path.exists():
+            return staged
+
+        if self.staging_path.stat().st_size > offset:
+            os.truncate(self.staging_path, offset)
+        with open(self.staging_path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                staged[record["entry"]["service"]] = record["fp"]
+        return staged
+
+    def _stage(
+        self,
+        checkpoint: dict,
+        new_password: str,
+        progress: Optional[Callable[[RekeyStats], None]],
+    ) -> RekeyStats:
+        password_key = CryptoManager(
+            password=new_password,
+            salt=bytes.fromhex(checkpoint["vault_salt"]),
+            kdf=checkpoint_params(checkpoint),
+        )
+        new_crypto = CryptoManager.from_key(
+            password_key.unwrap_key(checkpoint["data_key"]), salt=password_key.salt
+        )
+        stats = RekeyStats()
+        start = time.perf_counter()
+        staged = self._read_staged(checkpoint["offset"])
+
+        # Transaction holds the vault lock: nothing changes while staging.
+        # Entries are read here, workers of map_many only do the crypto
+        with self.vault.transaction():
+            store = self.vault.store
+            services = self.vault.list_services()
+            stats.total = len(services)
+
+            todo: List[Tuple[EncryptedVaultEntryModel, str]] = []
+            for service in services:
+                encrypted = store.get(service)
+                fp = record_hash(encrypted)
+                if staged.get(service) == fp:
+                    stats.resumed += 1
+                else:
+                    todo.append((encrypted, fp))
+            stats.done = stats.resumed
+
+            fd = os.open(
+                self.staging_path,
+                os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                stat.S_IRUSR | stat.S_IWUSR,
+            )
+            with open(fd, "ab") as f:
+                lines = map_many(
+                    lambda item: self._reencrypt(item[0], item[1], new_crypto),
+                    todo,
+                    self.workers,
+                    self.chunk_size,
+                )
+                chunk: List[bytes] = []
+                for line in lines:
+                    if isinstance(line, ValueError):
+                        raise line
+                    chunk.append(line)
+                    if len(chunk) >= self.chunk_size or (
+                        stats.done + len(chunk) == stats.total
+                    ):
+                        self._commit_chunk(f, chunk, checkpoint)
+                        stats.done += len(chunk)
+                        chunk = []
+                        stats.elapsed = time.perf_counter() - start
+                        if progress:
+                            progress(stats)
+
+            self._build(services, store, checkpoint, new_crypto)
+
+        checkpoint["phase"] = "verified"
+        self._write_checkpoint(checkpoint)
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    # Append staged lines durably, entries up to the new offset are done
+    def _commit_chunk(self, f: BinaryIO, lines: List[bytes], checkpoint: dict):
+        f.write(b"".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+        checkpoint["offset"] = f.tell()
+        self._write_checkpoint(checkpoint)
+
+    # Old entry -> staging line (ValueError if it can't be re-encrypted safely)
+    def _reencrypt(
+        self, encrypted: EncryptedVaultEntryModel, fp: str, new_crypto: CryptoManager
+    ) -> bytes:
+        try:
+            entry = self.vault.decrypt_entry(encrypted)
+        except ValueError as e:
+            raise ValueError(
+                f"Entry {encrypted.service} can't be decrypted, password is not changed"
+            ) from e
+
+        new_encrypted = self.vault.encrypt_entry(entry, new_crypto)
+        if self.vault.decrypt_entry(new_encrypted, new_crypto) != entry:
+            raise ValueError(f"Verification of {encrypted.service} failed")
+
+        record = {"fp": fp, "entry": new_encrypted.model_dump()}
+        return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    # Build new vault (same layout as the live one) from staged entries
+    def _build(
+        self,
+        services: List[str],
+        store,
+        checkpoint: dict,
+        new_crypto: CryptoManager,
+    ):
+        entries: Dict[str, dict] = {}
+        with open(self.staging_path, "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)["entry"]
+                entries[entry["service"]] = entry  # Last staged version wins
+
+        new_path = self.dir / self.vault.vault_path.name
+        _remove_vault(new_path)
+
+        shards = len(store.stores) if isinstance(store, ShardedVaultStore) else 1
+        new_store = open_store(new_path, shards)
+        try:
+            params = checkpoint_params(checkpoint)
+            # Attachment files stay as they are, only their key is re-wrapped
+            attachment_key = store.metadata.attachment_key
+            if attachment_key:
+                attachment_key = new_crypto.wrap_key(
+                    self.vault.crypto.unwrap_key(attachment_key)
+                )
+            new_store.update_metadata(
+                created=store.metadata.created,
+                attachment_key=attachment_key,
+                key_slots={
+                    checkpoint["vault_salt"]: KeySlotModel(
+                        kdf=params.name,
+                        iterations=params.iterations,
+                        memory_cost=params.memory_cost,
+                        parallelism=params.parallelism,
+                        wrapped_key=checkpoint["data_key"],
+                    ).model_dump()
+                },
+            )
+            new_store.begin()
+            try:
+                for service in services:
+                    new_store.put(EncryptedVaultEntryModel(**entries[service]))
+            except Exception:
+                new_store.rollback()
+                raise
+            new_store.commit()
+        finally:
+            new_store.close()
+
+
+def change_password(vault_manager: VaultManager, username: str, new_password: str):
+    """Change master password: data key is re-wrapped, entries are not touched"""
+    UserRegModel(username=username, password=new_password)
+    rewrap_key(
+        vault_manager,
+        username,
+        new_password,
+        new_hash=AuthManager().hash_password(new_password),
+    )
+
+
+def retune_kdf(vault_manager: VaultManager, username: str, password: str):
+    """Apply current KDF settings (algorithm, costs, salt size) to the vault key"""
+    response = AuthManager().verify_user(
+        UserLoginModel(username=username, password=password)
+    )
+    if not response.success:
+        raise ValueError(response.message)
+    rewrap_key(vault_manager, username, password)
+
+
+def rewrap_key(
+    vault_manager: VaultManager,
+    username: str,
+    password: str,
+    new_hash: Optional[str] = None,
+):
+    """Wrap data key with a key derived by current KDF settings and new salt"""
+    if load_checkpoint(username) is not None:
+        raise ValueError("Finish the interrupted password change first (rekey)")
+
+    auth = AuthManager()
+    password_key = CryptoManager(password=password, salt=os.urandom(cfg.data.SALT_SIZE))
+
+    # New slot, then credentials, then the old slot goes. If interrupted, the
+    # slot matching the user store is still there and the other one is dropped on
+    # the next unlock
+    vault_manager.add_key_slot(password_key)
+    fields = {"vault_salt": password_key.salt.hex()}
+    if new_hash is not None:
+        fields["hash"] = new_hash
+    auth.update_user(username, **fields)
+    vault_manager.drop_key_slots(password_key)
+
+
+# Remove vault file, its journal and shards directory
+def _remove_vault(path: Path):
+    path.unlink(missing_ok=True)
+    path.with_name(path.name + ".journal").unlink(missing_ok=True)
+    shutil.rmtree(path.with_name(path.name + ".shards"), ignore_errors=True)
+
+
+def finish_rekey(username: str) -> bool:
+    """Make verified re-keyed vault live (idempotent) / False if not verified"""
+    checkpoint = load_checkpoint(username)
+    if checkpoint is None or checkpoint["phase"] != "verified":
+        return False
+
+    staging = rekey_dir(username)
+    live_path = vault_path(username)
+    new_vault = staging / live_path.name
+    new_shards = new_vault.with_name(new_vault.name + ".shards")
+
+    # 1. New credentials (vault salt must match the new vault below)
+    AuthManager().update_user(
+        username, hash=checkpoint["hash"], vault_salt=checkpoint["vault_salt"]
+    )
+
+    # 2. New vault replaces the live one (skipped if already moved)
+    if new_shards.exists():
+        _remove_vault(live_path)
+        new_shards.replace(live_path.with_name(live_path.name + ".shards"))
+    elif new_vault.exists():
+        # Old journal must not be replayed over the new base file
+        live_path.with_name(live_path.name + ".journal").unlink(missing_ok=True)
+        shutil.rmtree(live_path.with_name(live_path.name + ".shards"), True)
+        new_vault.replace(live_path)
+
+    # 3. Staging is not needed anymore
+    shutil.rmtree(staging, ignore_errors=True)
+    return True
+
+
+def recover_rekeys() -> List[str]:
+    """Finish password changes interrupted after verification (before login)"""
+    finished = []
+    for path in cfg.vaults_dir.glob("*.rekey"):
+        username = path.name[: -len(".rekey")]
+        try:
+            if finish_rekey(username):
+                finished.append(username)
+        except (OSError, ValueError) as e:
+            print(f"Failed to finish password change of {username}: {e}")
+    return finished
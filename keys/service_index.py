@@ -0,0 +1,260 @@
+import bisect
+import itertools
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+"""
+Explanation:
+    Search index over service names for filter-as-you-type:
+        prefix  - sorted list of normalized names + bisect, O(log n) per query
+        fuzzy   - trigram -> services map for substrings and typos
+        recency - services opened in this session are ranked first
+    Service names are stored in plaintext anyway, so the index holds nothing
+    secret. It is updated per entry, never rebuilt on a single change.
+"""
+
+MIN_SIMILARITY = 0.5  # Share of query trigrams a fuzzy match must have
+FUZZY_SCORE_LIMIT = 1000  # More candidates -> only the likeliest are scored
+FUZZY_CAPPED = 200  # Likeliest candidates scored then
+FUZZY_SCAN_LIMIT = 2000  # More -> shortest names of the trigram are kept ready
+
+
+def normalize(name: str) -> str:
+    return unicodedata.normalize("NFKC", name).strip().casefold()
+
+
+def trigrams(key: str) -> Set[str]:
+    """Trigrams of normalized name (start is padded, so prefixes weigh more)"""
+    padded = "  " + key
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class ServiceIndex:
+    """Prefix / trigram / recency index of service names"""
+
+    MAX_INSORT = 256  # More additions -> sorted list is rebuilt lazily
+
+    def __init__(self, services: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._keys: Dict[str, str] = {
+            service: normalize(service) for service in services
+        }
+
+        # (key, service) sorted / None = rebuild on next query
+        self._sorted: Optional[List[Tuple[str, str]]] = None
+        self._insorted = 0
+
+        # trigram -> services (None until background build is done)
+        self._grams: Optional[Dict[str, Set[str]]] = None
+        # trigram -> its FUZZY_CAPPED shortest services, kept for trigrams of
+        # more than FUZZY_SCAN_LIMIT services (like "com")
+        self._shortest: Dict[str, List[str]] = {}
+        threading.Thread(target=self._build, name="service-index", daemon=True).start()
+
+        # service -> use counter (higher = used later)
+        self._recent: Dict[str, int] = {}
+        self._clock = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, service: str):
+        with self._lock:
+            if service in self._keys:
+                return
+            key = normalize(service)
+            self._keys[service] = key
+
+            if self._sorted is not None:
+                if self._insorted < self.MAX_INSORT:
+                    bisect.insort(self._sorted, (key, service))
+                    self._insorted += 1
+                else:
+                    self._sorted = None
+            if self._grams is not None:
+                for gram in trigrams(key):
+                    self._grams.setdefault(gram, set()).add(service)
+                    shortest = self._shortest.get(gram)
+                    if shortest is not None:
+                        bisect.insort(shortest, service, key=len)
+                        del shortest[FUZZY_CAPPED:]
+
+    def remove(self, service: str):
+        with self._lock:
+            key = self._keys.pop(service, None)
+            if key is None:
+                return
+            self._recent.pop(service, None)
+
+            if self._sorted is not None:
+                i = bisect.bisect_left(self._sorted, (key, service))
+                if i < len(self._sorted) and self._sorted[i] == (key, service):
+                    del self._sorted[i]
+            if self._grams is not None:
+                for gram in trigrams(key):
+                    if service in self._shortest.get(gram, ()):
+                        del self._shortest[gram]  # Rebuilt on next query
+                    services = self._grams.get(gram)
+                    if services is not None:
+                        services.discard(service)
+                        if not services:
+                            del self._grams[gram]
+
+    # Mark service as just used (ranked higher afterwards)
+    def touch(self, service: str):
+        with self._lock:
+            if service in self._keys:
+                self._recent[service] = next(self._clock)
+
+    def search(self, query: str, limit: int = 100) -> List[str]:
+        """Best matches: exact, then prefix, then fuzzy; recent use first"""
+        query = normalize(query)
+        if not query:
+            return []
+
+        with self._lock:
+            found = self._prefix_matches(query, limit)
+            if len(found) < limit and len(query) >= 3 and self._grams is not None:
+                seen = set(found)
+                found += [
+                    service
+                    for service in self._fuzzy_matches(query, limit)
+                    if service not in seen
+                ]
+            return found[:limit]
+
+    # Prefix matches: exact name, recently used, then alphabetical
+    def _prefix_matches(self, query: str, limit: int) -> List[str]:
+        if self._sorted is None:
+            self._sort()
+
+        lo = bisect.bisect_left(self._sorted, (query, ""))
+        hi = bisect.bisect_left(self._sorted, (query + "\U0010ffff", ""), lo)
+
+        recent = sorted(
+            (
+                service
+                for service in self._recent
+                if self._keys[service].startswith(query)
+            ),
+            key=lambda s: -self._recent[s],
+        )
+        exact = []
+        if lo < hi and self._sorted[lo][0] == query:
+            exact = [
+                service
+                for key, service in self._sorted[lo : lo + limit]
+                if key == query
+            ]
+        alphabetical = [
+            service for _, service in self._sorted[lo : min(hi, lo + limit)]
+        ]
+        return list(dict.fromkeys(exact + recent + alphabetical))
+
+    # Trigram matches (substrings and typos), best similarity first
+    def _fuzzy_matches(self, query: str, limit: int) -> List[str]:
+        # Query is matched anywhere in the name, so without start padding
+        grams = {gram for gram in trigrams(query) if not gram.startswith(" ")}
+        needed = max(1, int(len(grams) * MIN_SIMILARITY + 0.5))
+        ordered = sorted(grams, key=lambda gram: len(self._grams.get(gram, ())))
+        postings = [self._grams.get(gram, set()) for gram in ordered]
+
+        # Any fuzzy match shares at least one of the (len - needed + 1) rarest
+        # trigrams, so only their services are candidates
+        rarest = postings[: len(grams) - needed + 1]
+
+        if sum(len(services) for services in rarest) > FUZZY_SCORE_LIMIT:
+            candidates = self._capped_candidates(ordered, postings)
+        else:
+            candidates = set().union(*rarest)
+
+        # Shared trigrams counted with set intersections (no per-name split)
+        shared: Counter = Counter()
+        for services in postings:
+            shared.update(candidates & services)
+
+        scored = []
+        for service in candidates:
+            key = self._keys[service]
+            if shared[service] < needed and query not in key:
+                continue
+            score = shared[service] / len(grams) + (query in key)
+            scored.append((-score, -self._recent.get(service, 0), key, service))
+        scored.sort()
+        return [service for *_, service in scored[:limit]]
+
+    # Query too common to score every candidate within a keystroke: names
+    # having the rarest trigrams are narrowed by intersections while that is
+    # cheap (trigrams no name has are typos, skipped), then the shortest ones
+    # are kept, of equal shared trigrams they are the most similar
+    def _capped_candidates(
+        self, grams: List[str], postings: List[Set[str]]
+    ) -> Set[str]:
+        present = [
+            (gram, services) for gram, services in zip(grams, postings) if services
+        ]
+        gram, candidates = present[0]
+        for _, services in present[1:]:
+            if not FUZZY_CAPPED < len(candidates) <= FUZZY_SCAN_LIMIT:
+                break
+            narrowed = candidates & services
+            if narrowed:
+                candidates = narrowed
+
+        if len(candidates) <= FUZZY_CAPPED:
+            return candidates
+        if len(candidates) > FUZZY_SCAN_LIMIT:
+            # Not narrowed: all services of the rarest trigram, whose shortest
+            # ones are kept in order
+            return set(self._shortest_of(gram))
+        return set(sorted(candidates, key=len)[:FUZZY_CAPPED])
+
+    # Shortest services of a common trigram (by length of the name: about the
+    # normalized length, cheaper)
+    def _shortest_of(self, gram: str) -> List[str]:
+        shortest = self._shortest.get(gram)
+        if shortest is None:
+            shortest = sorted(self._grams[gram], key=len)[:FUZZY_CAPPED]
+            self._shortest[gram] = shortest
+        return shortest
+
+    def _sort(self):
+        self._sorted = sorted((key, service) for service, key in self._keys.items())
+        self._insorted = 0
+
+    # Sorted list and trigram map are built in background after unlock,
+    # changes made meanwhile are merged into the trigram map
+    def _build(self):
+        with self._lock:
+            if self._sorted is None:
+                self._sort()
+            snapshot = dict(self._keys)
+
+        grams: Dict[str, Set[str]] = {}
+        for service, key in snapshot.items():
+            for gram in trigrams(key):
+                grams.setdefault(gram, set()).add(service)
+
+        with self._lock:
+            for service, key in snapshot.items():
+                if self._keys.get(service) != key:
+                    for gram in trigrams(key):
+                        grams[gram].discard(service)
+            for service, key in self._keys.items():
+                if service not in snapshot:
+                    for gram in trigrams(key):
+                        grams.setdefault(gram, set()).add(service)
+            self._grams = grams
+            common = [
+                gram
+                for gram, services in grams.items()
+                if len(services) > FUZZY_SCAN_LIMIT
+            ]
+
+        # Shortest services of common trigrams are ready before first query
+        for gram in common:
+            with self._lock:
+                if len(self._grams.get(gram, ())) > FUZZY_SCAN_LIMIT:
+                    self._shortest_of(gram)
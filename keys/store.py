@@ -0,0 +1,899 @@
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from gui.config import cfg
+from keys.container import VaultContainer, is_container, write_container
+from models.vault_model import (
+    EncryptedVaultEntryModel,
+    VaultDataModel,
+    VaultMetadataModel,
+)
+
+"""
+Explanation:
+    VaultStore is one vault file plus an append-only journal
+    ({name}.vault.journal). The base file is a binary container with an offset
+    index (keys/container.py); old JSON vaults are converted on open. Every
+    mutation appends one JSON line with the already encrypted record, so saving
+    an entry costs O(1) instead of a full rewrite. When the journal grows past
+    VAULT_JOURNAL_LIMIT it is folded into the base file by a background
+    compaction. On open the journal is replayed over the base file, which also
+    recovers mutations after a crash.
+
+    ShardedVaultStore hash-partitions entries across N VaultStore files in
+    {name}.vault.shards/ with a small manifest.json, so a mutation or a
+    transaction rewrites only the shards it touched.
+"""
+
+# (mtime_ns, size, inode) of the base file and of the journal
+Stamp = Tuple[Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int]]]
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def encode_record(entry: EncryptedVaultEntryModel) -> bytes:
+    """Compact JSON record of encrypted entry (empty fields are left out)"""
+    return json.dumps(
+        entry.model_dump(exclude_defaults=True), separators=(",", ":")
+    ).encode("utf-8")
+
+
+def write_private(path: Path, data: bytes, force_sync: bool = False):
+    """Atomic write of small file with rw------- rights"""
+    write_private_temp(path, data, force_sync).replace(path)
+
+
+def write_private_temp(path: Path, data: bytes, force_sync: bool = False) -> Path:
+    """Write data to a tempfile next to path (rw------- rights), the caller
+    replaces path with it"""
+    temp_file = path.with_name(path.name + ".tmp")
+    with open(temp_file, "wb") as f:
+        f.write(data)
+        if force_sync or cfg.data.VAULT_FSYNC != "never":
+            f.flush()
+            os.fsync(f.fileno())
+    try:  # rw------- rights
+        temp_file.chmod(stat.S_IRUSR | stat.S_IWUSR)
+    except OSError:  # For Windows and etc.
+        pass
+    return temp_file
+
+
+class VaultState:
+    """Live vault view: base container + changes from journal / transaction"""
+
+    def __init__(
+        self,
+        metadata: VaultMetadataModel,
+        container: Optional[VaultContainer] = None,
+        changes: Optional[Dict[str, Optional[EncryptedVaultEntryModel]]] = None,
+        services: Optional[Dict[str, None]] = None,
+    ):
+        self.metadata = metadata
+        self.container = container
+        # Entries changed over container (None = deleted)
+        self.changes = changes if changes is not None else {}
+        # Ordered set of live services
+        if services is None:
+            services = dict.fromkeys(container.services()) if container else {}
+        self.services = services
+        # Username blind index -> services, built on first lookup
+        self._by_username: Optional[Dict[str, Dict[str, None]]] = None
+
+    def get(self, service: str) -> Optional[EncryptedVaultEntryModel]:
+        if service in self.changes:
+            return self.changes[service]
+        if self.container is not None and service in self.container:
+            return EncryptedVaultEntryModel(**self.container.read(service))
+        return None
+
+    def username_index(self, service: str) -> str:
+        """Username blind index token of live service (empty if not indexed)"""
+        if service in self.changes:
+            entry = self.changes[service]
+            return entry.username_index if entry is not None else ""
+        return self.container.username_index(service)
+
+    def find_username(self, token: str) -> List[str]:
+        """Services with the username token (no record is decoded)"""
+        if self._by_username is None:
+            self._by_username = {}
+            for service in self.services:
+                self._index_add(service, self.username_index(service))
+        return list(self._by_username.get(token, ()))
+
+    def _index_add(self, service: str, token: str):
+        if self._by_username is not None:
+            self._by_username.setdefault(token, {})[service] = None
+
+    def _index_remove(self, service: str):
+        if self._by_username is None or service not in self.services:
+            return
+        token = self.username_index(service)
+        services = self._by_username.get(token)
+        if services is not None:
+            services.pop(service, None)
+            if not services:
+                del self._by_username[token]
+
+    def put(self, entry: EncryptedVaultEntryModel, timestamp: float):
+        self._index_remove(entry.service)
+        self.changes[entry.service] = entry
+        self.services[entry.service] = None
+        self._index_add(entry.service, entry.username_index)
+        self._touch(timestamp)
+
+    def delete(self, service: str, timestamp: float) -> bool:
+        if service not in self.services:
+            return False
+        self._index_remove(service)
+        self.changes[service] = None
+        del self.services[service]
+        self._touch(timestamp)
+        return True
+
+    def update_metadata(self, fields: dict, timestamp: float):
+        self.metadata = VaultMetadataModel(**{**self.metadata.model_dump(), **fields})
+        self._touch(timestamp)
+
+    def _touch(self, timestamp: float):
+        self.metadata.entry_count = len(self.services)
+        self.metadata.last_modified = timestamp
+
+    def copy(self) -> "VaultState":
+        """Working copy (container is shared, it is read-only)"""
+        vault_state = VaultState(
+            self.metadata.model_copy(),
+            self.container,
+            dict(self.changes),
+            dict(self.services),
+        )
+        if self._by_username is not None:
+            vault_state._by_username = {
+                token: dict(services) for token, services in self._by_username.items()
+            }
+        return vault_state
+
+    def records(self) -> Iterator[Tuple[str, bytes, str]]:
+        """Encoded records of live entries (unchanged ones are copied as is)"""
+        for service in self.services:
+            entry = self.changes.get(service)
+            if entry is not None:
+                yield service, encode_record(entry), entry.username_index
+            else:
+                yield (
+                    service,
+                    self.container.read_raw(service),
+                    self.container.username_index(service),
+                )
+
+    def close(self):
+        if self.container is not None:
+            self.container.close()
+
+
+class VaultStore:
+    """Single vault file: binary container + append-only journal"""
+
+    def __init__(self, vault_path: Path):
+        self.vault_path = vault_path
+        self.journal_path = vault_path.with_name(vault_path.name + ".journal")
+
+        # Guards cache and files against the background compaction
+        self._lock = threading.RLock()
+        self._compact_thread: Optional[threading.Thread] = None
+
+        # Live vault view and the file stamps it was read from
+        self._cache: Optional[VaultState] = None
+        self._cache_stamp: Optional[Stamp] = None
+
+        # Working copy of the active transaction (store lock is held meanwhile)
+        self._tx: Optional[VaultState] = None
+        self._tx_dirty = False
+
+        self._ensure_vault_exists()
+
+    # Check exist vault / create new if not exist / convert old JSON vault
+    def _ensure_vault_exists(self):
+        if not self.vault_path.exists():
+            self._save_vault(VaultState(VaultMetadataModel(created=time.time())))
+        elif not is_container(self.vault_path):
+            vault_state = self._load_vault()
+            if self._cache is vault_state:  # Not converted if JSON is damaged
+                self._save_vault(vault_state)
+
+    # File stamp (mtime, size, inode) for change detection / None if not exist
+    @staticmethod
+    def _file_stamp(path: Path) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _stamp(self) -> Stamp:
+        return (self._file_stamp(self.vault_path), self._file_stamp(self.journal_path))
+
+    # Drop cached view (and close its container)
+    def _drop_cache(self):
+        if self._cache is not None:
+            self._cache.close()
+        self._cache = None
+        self._cache_stamp = None
+
+    # Loading exist vault / or error. Cached view is reused until the files change
+    def _load_vault(self) -> VaultState:
+        with self._lock:
+            stamp = self._stamp()
+            if (
+                self._cache is not None
+                and stamp[0] is not None
+                and stamp == self._cache_stamp
+            ):
+                return self._cache
+
+            self._drop_cache()
+            if stamp[0] is None:
+                return VaultState(VaultMetadataModel(created=time.time()))
+
+            if is_container(self.vault_path):
+                container = VaultContainer(self.vault_path)
+                try:
+                    metadata = VaultMetadataModel(**container.metadata)
+                except ValueError:
+                    container.close()
+                    raise
+                vault_state = VaultState(metadata, container)
+            else:
+                vault_state = self._load_legacy()
+                if vault_state is None:
+                    return VaultState(VaultMetadataModel(created=time.time()))
+
+            self._replay_journal(vault_state)
+
+            self._cache = vault_state
+            self._cache_stamp = self._stamp()  # Replay may have cut a torn record
+            return vault_state
+
+    # Old JSON vault (version 1.0.0) / None if damaged
+    def _load_legacy(self) -> Optional[VaultState]:
+        try:
+            with open(self.vault_path, "r", encoding="utf-8") as f:
+                vault_data = VaultDataModel(**json.load(f))
+        except json.JSONDecodeError:
+            return None
+        return VaultState(
+            vault_data.metadata,
+            changes=dict(vault_data.entries),
+            services=dict.fromkeys(vault_data.entries),
+        )
+
+    # Apply journal records over the base data (crash recovery included)
+    def _replay_journal(self, vault_state: VaultState):
+        if not self.journal_path.exists():
+            return
+
+        with open(self.journal_path, "rb") as f:
+            raw = f.read()
+
+        # Last record without newline was interrupted by a crash, cut it off
+        valid_end = raw.rfind(b"\n") + 1
+        if valid_end < len(raw):
+            print("Warning: dropping incomplete vault journal record")
+            os.truncate(self.journal_path, valid_end)
+
+        for line in raw[:valid_end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply_record(vault_state, json.loads(line))
+            except (json.JSONDecodeError, ValueError, KeyError) as e:
+                print(f"Warning: skipping broken vault journal record: {e}")
+
+    # Apply one journal record to vault state
+    @staticmethod
+    def _apply_record(vault_state: VaultState, record: dict):
+        op = record["op"]
+        timestamp = record.get("ts", vault_state.metadata.last_modified)
+        if op == "put":
+            vault_state.put(EncryptedVaultEntryModel(**record["entry"]), timestamp)
+        elif op == "del":
+            vault_state.delete(record["service"], timestamp)
+        elif op == "meta":
+            vault_state.update_metadata(record["fields"], timestamp)
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+
+    # Append one record to the journal, compaction starts if it is too big
+    def _append_journal(self, record: dict, force_sync: bool = False):
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+        fd = os.open(
+            self.journal_path,
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0),
+            stat.S_IRUSR | stat.S_IWUSR,
+        )
+        try:
+            os.write(fd, line)
+            if force_sync or cfg.data.VAULT_FSYNC == "always":
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        # Cache already holds this record
+        self._cache_stamp = self._stamp()
+
+        journal_stamp = self._cache_stamp[1]
+        if journal_stamp and journal_stamp[1] >= cfg.data.VAULT_JOURNAL_LIMIT:
+            self._start_compaction()
+
+    # Write vault container into a tempfile near the vault / returns tempfile path
+    def _write_temp(self, vault_state: VaultState) -> Path:
+        # Tempfile directory
+        target_dir = (
+            self.vault_path.parent if self.vault_path.parent.exists() else Path.cwd()
+        )
+
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                mode="wb",
+                dir=target_dir,
+                delete=False,  # Important for Windows
+            ) as tmp_file:
+                tmp_path = Path(tmp_file.name)
+                write_container(
+                    tmp_file, vault_state.metadata.model_dump(), vault_state.records()
+                )
+                if cfg.data.VAULT_FSYNC != "never":
+                    tmp_file.flush()
+                    os.fsync(tmp_file.fileno())
+            try:  # rw------- rights
+                tmp_path.chmod(stat.S_IRUSR | stat.S_IWUSR)
+            except OSError:  # For Windows and etc.
+                pass
+            return tmp_path
+        except Exception:
+            # Clear temp litter if error
+            if tmp_path and tmp_path.exists():
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            raise
+
+    # Replace base file with written tempfile, journal is folded in. Records
+    # appended after the snapshot (tail) are written to a new journal first
+    # and swapped in after the base file: a crash in between leaves the full
+    # old journal, whose replay over the new base gives the same state. The
+    # journal is deleted only when there is no tail
+    def _install(self, tmp_path: Path, tail: bytes = b""):
+        journal_tmp = None
+        if tail:
+            # Tail records were already acknowledged, so always synced
+            journal_tmp = write_private_temp(self.journal_path, tail, force_sync=True)
+        self._drop_cache()  # Mapped file is closed first (Windows)
+        try:
+            tmp_path.replace(self.vault_path)
+        except BaseException:
+            if journal_tmp is not None:
+                journal_tmp.unlink(missing_ok=True)
+            raise
+        if journal_tmp is not None:
+            journal_tmp.replace(self.journal_path)
+        else:
+            self.journal_path.unlink(missing_ok=True)
+
+    # Atomic save: tempfile, only owner can get this data
+    def _save_vault(self, vault_state: VaultState):
+        with self._lock:
+            try:
+                self._install(self._write_temp(vault_state))
+            except Exception as e:
+                print(f"Critical error saving vault: {e}")
+                # Cached view may hold unsaved changes, so drop it
+                self._drop_cache()
+                raise e
+
+    # Start compaction in background if it is not running yet
+    def _start_compaction(self):
+        if self._compact_thread and self._compact_thread.is_alive():
+            return
+        self._compact_thread = threading.Thread(
+            target=self.compact, name="vault-compaction"
+        )
+        self._compact_thread.start()
+
+    # Fold journal into the base file. Only the final swap holds the lock
+    def compact(self):
+        try:
+            with self._lock:
+                snapshot = self._load_vault().copy()
+                base_stamp, journal_stamp = self._cache_stamp
+                journal_offset = journal_stamp[1] if journal_stamp else 0
+
+            # Reads unchanged records from the mapped base file
+            tmp_path = self._write_temp(snapshot)
+
+            with self._lock:
+                # Base file was rewritten meanwhile (transaction), snapshot is stale
+                if self._file_stamp(self.vault_path) != base_stamp:
+                    tmp_path.unlink(missing_ok=True)
+                    return
+
+                # Records appended while the snapshot was written stay in journal
+                tail = b""
+                if self.journal_path.exists():
+                    with open(self.journal_path, "rb") as f:
+                        f.seek(journal_offset)
+                        tail = f.read()
+
+                self._install(tmp_path, tail)
+        except Exception as e:
+            # Journal is still complete, so nothing is lost
+            print(f"Vault compaction failed: {e}")
+
+    # Wait for background compaction and release the mapped file
+    def close(self):
+        thread = self._compact_thread
+        if thread and thread.is_alive():
+            thread.join()
+        with self._lock:
+            self._drop_cache()
+
+    # Current vault state (transaction working copy if active)
+    def _current(self) -> VaultState:
+        return self._tx if self._tx is not None else self._load_vault()
+
+    @property
+    def metadata(self) -> VaultMetadataModel:
+        with self._lock:
+            return self._current().metadata
+
+    def services(self) -> List[str]:
+        with self._lock:
+            return list(self._current().services)
+
+    def __contains__(self, service: str) -> bool:
+        with self._lock:
+            return service in self._current().services
+
+    def get(self, service: str) -> Optional[EncryptedVaultEntryModel]:
+        with self._lock:
+            return self._current().get(service)
+
+    # Services with the username blind index token
+    def find_username(self, token: str) -> List[str]:
+        with self._lock:
+            return self._current().find_username(token)
+
+    # Store encrypted entry (journal record or transaction copy)
+    def put(self, entry: EncryptedVaultEntryModel):
+        with self._lock:
+            vault_state = self._current()
+            now = time.time()
+
+            if self._tx is None:
+                self._append_journal(
+                    {"op": "put", "ts": now, "entry": entry.model_dump()}
+                )
+            else:
+                self._tx_dirty = True
+
+            vault_state.put(entry, now)
+
+    # Delete entry / False if not exist
+    def delete(self, service: str) -> bool:
+        with self._lock:
+            vault_state = self._current()
+            if service not in vault_state.services:
+                return False
+
+            now = time.time()
+            if self._tx is None:
+                self._append_journal({"op": "del", "ts": now, "service": service})
+            else:
+                self._tx_dirty = True
+
+            return vault_state.delete(service, now)
+
+    # Change metadata fields (key slots and etc.). Always durable
+    def update_metadata(self, **fields):
+        with self._lock:
+            vault_state = self._current()
+            now = time.time()
+
+            if self._tx is None:
+                self._append_journal(
+                    {"op": "meta", "ts": now, "fields": fields}, force_sync=True
+                )
+            else:
+                self._tx_dirty = True
+
+            vault_state.update_metadata(fields, now)
+
+    # Transaction: begin -> put / delete -> commit (or rollback).
+    # Store lock is held from begin to commit / rollback
+    def begin(self):
+        self._lock.acquire()
+        try:
+            self._tx = self._load_vault().copy()
+            self._tx_dirty = False
+        except Exception:
+            self._lock.release()
+            raise
+
+    # First commit phase: write working copy / None if nothing changed
+    def prepare(self) -> Optional[Path]:
+        if not self._tx_dirty:
+            return None
+        return self._write_temp(self._tx)
+
+    # Second commit phase: install prepared file and end transaction. A
+    # sharded commit drops the journal first: it is folded in the prepared
+    # file, which the manifest rolls forward after a crash
+    def finish(self, tmp_path: Optional[Path], drop_journal: bool = False):
+        try:
+            if tmp_path is not None:
+                if drop_journal:
+                    self.journal_path.unlink(missing_ok=True)
+                self._install(tmp_path)
+        except Exception as e:
+            print(f"Critical error saving vault: {e}")
+            self._drop_cache()
+            raise
+        finally:
+            self._end_transaction()
+
+    def commit(self):
+        try:
+            tmp_path = self.prepare()
+        except Exception:
+            self._end_transaction()
+            raise
+        self.finish(tmp_path)
+
+    def rollback(self, tmp_path: Optional[Path] = None):
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+        self._end_transaction()
+
+    def _end_transaction(self):
+        self._tx = None
+        self._tx_dirty = False
+        self._lock.release()
+
+
+class ShardedVaultStore:
+    """Entries hash-partitioned across shard stores with a manifest"""
+
+    def __init__(self, shard_dir: Path):
+        self.shard_dir = shard_dir
+        self.manifest_path = shard_dir / MANIFEST_NAME
+
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version", 0) > MANIFEST_VERSION:
+            raise ValueError("Vault manifest version is not supported")
+        if manifest.get("commit"):
+            self._roll_forward(shard_dir, manifest)
+
+        # Held from begin to commit / rollback, like the lock of VaultStore
+        self._lock = threading.RLock()
+        self._tx_metadata: Optional[VaultMetadataModel] = None
+        self._in_tx = False
+        self._incomplete = False  # Commit failed halfway, reopen finishes it
+
+        self._metadata = VaultMetadataModel(**manifest["metadata"])
+        self.stores = [
+            VaultStore(self._shard_path(shard_dir, i))
+            for i in range(manifest["shards"])
+        ]
+
+        # Fan out index parsing and journal replay across threads
+        with ThreadPoolExecutor(max_workers=min(len(self.stores), 8)) as pool:
+            list(pool.map(lambda store: store.services(), self.stores))
+
+    @staticmethod
+    def _shard_path(shard_dir: Path, number: int) -> Path:
+        return shard_dir / f"shard-{number:03d}{cfg.data.VAULT_EXTENSION}"
+
+    @staticmethod
+    def shard_of(service: str, shards: int) -> int:
+        """Stable shard number of the service"""
+        digest = hashlib.blake2b(service.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % shards
+
+    def _store(self, service: str) -> VaultStore:
+        return self.stores[self.shard_of(service, len(self.stores))]
+
+    # Create shards (moving entries from single-file store if given)
+    @classmethod
+    def create(
+        cls, shard_dir: Path, shards: int, source: Optional[VaultStore] = None
+    ) -> "ShardedVaultStore":
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            shard_dir.chmod(stat.S_IRWXU)  # rights rwx------
+        except OSError:  # For Windows and etc.
+            pass
+
+        # Leftovers of interrupted migration
+        for i in range(shards):
+            path = cls._shard_path(shard_dir, i)
+            path.unlink(missing_ok=True)
+            path.with_name(path.name + ".journal").unlink(missing_ok=True)
+
+        stores = [VaultStore(cls._shard_path(shard_dir, i)) for i in range(shards)]
+        metadata = VaultMetadataModel(created=time.time())
+
+        if source is not None:
+            metadata = source.metadata.model_copy()
+            for store in stores:
+                store.begin()
+            try:
+                for service in source.services():
+                    stores[cls.shard_of(service, shards)].put(source.get(service))
+                prepared = [store.prepare() for store in stores]
+            except Exception:
+                for store in stores:
+                    store.rollback()
+                raise
+            for store, tmp_path in zip(stores, prepared):
+                store.finish(tmp_path)
+
+        for store in stores:
+            store.close()
+
+        # Manifest makes the shards live
+        cls._write_manifest(shard_dir, shards, metadata)
+
+        if source is not None:
+            source.close()
+            source.vault_path.unlink(missing_ok=True)
+            source.journal_path.unlink(missing_ok=True)
+
+        return cls(shard_dir)
+
+    # Manifest with pending commit (shard number -> prepared file name) is the
+    # commit point of a transaction, see commit()
+    @staticmethod
+    def _write_manifest(
+        shard_dir: Path,
+        shards: int,
+        metadata: VaultMetadataModel,
+        commit: Optional[Dict[str, str]] = None,
+    ):
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "shards": shards,
+            "metadata": metadata.model_dump(),
+        }
+        if commit:
+            manifest["commit"] = commit
+        write_private(
+            shard_dir / MANIFEST_NAME,
+            json.dumps(manifest, indent=2).encode("utf-8"),
+            force_sync=True,
+        )
+
+    # Finish commit interrupted after its manifest was written: prepared shard
+    # files still there are installed (their journals are folded in them)
+    @classmethod
+    def _roll_forward(cls, shard_dir: Path, manifest: dict):
+        for number, name in manifest["commit"].items():
+            tmp_path = shard_dir / name
+            if tmp_path.exists():
+                path = cls._shard_path(shard_dir, int(number))
+                path.with_name(path.name + ".journal").unlink(missing_ok=True)
+                tmp_path.replace(path)
+        cls._write_manifest(
+            shard_dir, manifest["shards"], VaultMetadataModel(**manifest["metadata"])
+        )
+        manifest.pop("commit")
+
+    def _check_complete(self):
+        if self._incomplete:
+            raise ValueError("Vault commit is incomplete, reopen the vault")
+
+    # Shared metadata lives in the manifest (rewritten at once, durable).
+    # In a transaction it is written with the commit
+    def update_metadata(self, **fields):
+        with self._lock:
+            self._check_complete()
+            if self._in_tx:
+                base = self._tx_metadata or self._metadata
+                self._tx_metadata = VaultMetadataModel(
+                    **{**base.model_dump(), **fields}
+                )
+                return
+            metadata = VaultMetadataModel(**{**self._metadata.model_dump(), **fields})
+            self._write_manifest(self.shard_dir, len(self.stores), metadata)
+            self._metadata = metadata
+
+    @property
+    def metadata(self) -> VaultMetadataModel:
+        with self._lock:
+            metadata = (self._tx_metadata or self._metadata).model_copy()
+        metadata.entry_count = sum(len(store.services()) for store in self.stores)
+        metadata.last_modified = max(
+            [metadata.last_modified]
+            + [store.metadata.last_modified for store in self.stores]
+        )
+        return metadata
+
+    def services(self) -> List[str]:
+        return [service for store in self.stores for service in store.services()]
+
+    def __contains__(self, service: str) -> bool:
+        return service in self._store(service)
+
+    def get(self, service: str) -> Optional[EncryptedVaultEntryModel]:
+        return self._store(service).get(service)
+
+    def find_username(self, token: str) -> List[str]:
+        return [
+            service for store in self.stores for service in store.find_username(token)
+        ]
+
+    def put(self, entry: EncryptedVaultEntryModel):
+        self._check_complete()
+        self._store(entry.service).put(entry)
+
+    def delete(self, service: str) -> bool:
+        self._check_complete()
+        return self._store(service).delete(service)
+
+    # Transaction over all shards, all or nothing. Only changed shards are
+    # rewritten: they are written to prepared files first, then the manifest
+    # records them with the new metadata (commit point) and they are
+    # installed. A crash or error during installation is rolled forward on
+    # the next open, so no mix of old and new shards is ever loaded
+    def begin(self):
+        self._lock.acquire()
+        started = []
+        try:
+            self._check_complete()
+            for store in self.stores:
+                store.begin()
+                started.append(store)
+        except Exception:
+            for store in started:
+                store.rollback()
+            self._lock.release()
+            raise
+        self._in_tx = True
+        self._tx_metadata = None
+
+    def commit(self):
+        try:
+            self._commit()
+        finally:
+            self._in_tx = False
+            self._tx_metadata = None
+            self._lock.release()
+
+    def _commit(self):
+        prepared: List[Optional[Path]] = []
+        try:
+            for store in self.stores:
+                prepared.append(store.prepare())
+        except Exception:
+            for i, store in enumerate(self.stores):
+                store.rollback(prepared[i] if i < len(prepared) else None)
+            raise
+
+        pending = {
+            str(number): tmp_path.name
+            for number, tmp_path in enumerate(prepared)
+            if tmp_path is not None
+        }
+        metadata = self._tx_metadata or self._metadata
+        if pending or self._tx_metadata is not None:
+            try:
+                self._write_manifest(
+                    self.shard_dir, len(self.stores), metadata, pending
+                )
+            except Exception:
+                for store, tmp_path in zip(self.stores, prepared):
+                    store.rollback(tmp_path)
+                raise
+        self._metadata = metadata
+
+        errors = []
+        for store, tmp_path in zip(self.stores, prepared):
+            try:
+                store.finish(tmp_path, drop_journal=True)
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            self._incomplete = True
+            raise errors[0]
+
+        if pending:
+            try:
+                self._write_manifest(self.shard_dir, len(self.stores), metadata)
+            except Exception as e:
+                # Installed files are gone, so the pending list is harmless
+                print(f"Vault manifest was not cleaned up: {e}")
+
+    def rollback(self):
+        try:
+            for store in self.stores:
+                store.rollback()
+        finally:
+            self._in_tx = False
+            self._tx_metadata = None
+            self._lock.release()
+
+    def compact(self):
+        for store in self.stores:
+            store.compact()
+
+    def close(self):
+        for store in self.stores:
+            store.close()
+
+
+def stored_metadata(vault_path: Path) -> Optional[VaultMetadataModel]:
+    """Metadata of a stored vault read without opening its store: journal
+    isn't replayed or repaired, leftovers aren't removed, nothing is written.
+    None if the vault is not in current format"""
+    manifest_path = vault_path.with_name(vault_path.name + ".shards") / MANIFEST_NAME
+    if manifest_path.exists():
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return VaultMetadataModel(**json.load(f)["metadata"])
+    if not is_container(vault_path):
+        return None
+
+    container = VaultContainer(vault_path)
+    try:
+        metadata = VaultMetadataModel(**container.metadata)
+    finally:
+        container.close()
+
+    # Metadata changes not compacted yet (incomplete last record is skipped)
+    journal_path = vault_path.with_name(vault_path.name + ".journal")
+    try:
+        raw = journal_path.read_bytes()
+    except FileNotFoundError:
+        return metadata
+    for line in raw[: raw.rfind(b"\n") + 1].splitlines():
+        if not line.startswith(b'{"op":"meta"'):
+            continue
+        try:
+            fields = json.loads(line)["fields"]
+            metadata = VaultMetadataModel(**{**metadata.model_dump(), **fields})
+        except (ValueError, KeyError, TypeError):
+            continue
+    return metadata
+
+
+def open_store(
+    vault_path: Path, shards: int = 1
+) -> Union[VaultStore, ShardedVaultStore]:
+    """Open vault storage. Sharded layout is used if it exists or shards > 1;
+    a single-file vault is migrated into shards on first open"""
+    shard_dir = vault_path.with_name(vault_path.name + ".shards")
+
+    if (shard_dir / MANIFEST_NAME).exists():
+        # Single file left by interrupted migration (already copied to shards)
+        if vault_path.exists():
+            vault_path.unlink()
+            vault_path.with_name(vault_path.name + ".journal").unlink(missing_ok=True)
+        return ShardedVaultStore(shard_dir)
+
+    if shards > 1:
+        source = VaultStore(vault_path) if vault_path.exists() else None
+        return ShardedVaultStore.create(shard_dir, shards, source)
+
+    return VaultStore(vault_path)
@@ -1,143 +1,440 @@
 import json
-import os
-import stat
-import tempfile
-import time
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 
-from crypto.crypto import CryptoManager
+from crypto.crypto import CryptoManager, map_many
+from crypto.kdf import KdfParams, default_params
 from gui.config import cfg
+from keys.attachments import VaultAttachments
+from keys.notes_index import NotesIndex
+from keys.service_index import ServiceIndex
+from keys.store import ShardedVaultStore, VaultStore, open_store, stored_metadata
 from models.vault_model import (
     EncryptedVaultEntryModel,
-    VaultDataModel,
+    KeySlotModel,
     VaultEntryModel,
     VaultMetadataModel,
 )
 
+VaultStorage = Union[VaultStore, ShardedVaultStore]
+
+
+def vault_path(username: str) -> Path:
+    """Vault base path of the user (shards live next to it)"""
+    return cfg.vaults_dir / f"{username}{cfg.data.VAULT_EXTENSION}"
+
+
+def slot_params(slot: KeySlotModel) -> KdfParams:
+    """KDF parameters recorded in the key slot (early slots: PBKDF2 from config)"""
+    if not slot.iterations:
+        return default_params(slot.kdf)
+    return KdfParams(slot.kdf, slot.iterations, slot.memory_cost, slot.parallelism)
+
 
 class VaultManager:
-    # Initialization
-    def __init__(self, username: str, crypto_manager: CryptoManager):
-        self.vault_path = cfg.vaults_dir / f"{username}{cfg.data.VAULT_EXTENSION}"
-        self.crypto = crypto_manager
-        self._ensure_vault_exists()
-
-    # Check exist vault / create new if not exist
-    def _ensure_vault_exists(self):
-        if not self.vault_path.exists():
-            vault_data = VaultDataModel(
-                metadata=VaultMetadataModel(created=time.time()),
-                entries={},
-            )
-            self._save_vault(vault_data)
+    # Initialization. Storage layout (single file / shards) is in keys/store.py.
+    # crypto_manager holds the password-derived key, it only unwraps the vault
+    # data key; entries are encrypted with the data key (self.crypto)
+    def __init__(
+        self,
+        username: str,
+        crypto_manager: CryptoManager,
+        store: Optional[VaultStorage] = None,
+    ):
+        self.vault_path = vault_path(username)
+        self.store = store or open_store(self.vault_path, cfg.data.VAULT_SHARDS)
+        self.crypto = self._unlock(crypto_manager)
+
+        # Transaction nesting guard / services changed in the transaction
+        self._lock = threading.RLock()
+        self._in_tx = False
+        self._tx_services: List[str] = []
+
+        # Encrypted files attached to entries
+        self.attachments = VaultAttachments(self)
 
-    # Loading exist vault / or error
-    def _load_vault(self) -> VaultDataModel:
+        # Service name search (prefix / fuzzy / recent use)
+        self.service_index = ServiceIndex(self.list_services())
+
+        # Opt-in notes search, filled in background after unlock
+        self.notes_index: Optional[NotesIndex] = None
+        if cfg.data.NOTES_INDEX:
+            self.notes_index = NotesIndex(self._read_notes)
+            self.notes_index.schedule(self.list_services())
+
+    # Open vault with master password. Key is derived with KDF parameters
+    # recorded in the vault, whatever the current settings are
+    @classmethod
+    def unlock(
+        cls, username: str, password: str, vault_salt: Optional[bytes]
+    ) -> "VaultManager":
+        store = open_store(vault_path(username), cfg.data.VAULT_SHARDS)
         try:
-            if not self.vault_path.exists():
-                raise FileNotFoundError
-
-            with open(self.vault_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return VaultDataModel(**data)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return VaultDataModel(
-                metadata=VaultMetadataModel(created=time.time()), entries={}
+            slot = (
+                store.metadata.key_slots.get(vault_salt.hex()) if vault_salt else None
+            )
+            password_key = CryptoManager(
+                password=password,
+                salt=vault_salt,
+                kdf=slot_params(slot) if slot is not None else None,
+            )
+            return cls(username, password_key, store)
+        except Exception:
+            store.close()
+            raise
+
+    # Password key of existing vault, derived before the login is verified
+    # (auth/login.py runs it along with bcrypt). Only the stored metadata is
+    # read, the store is opened after verification; None for new / early JSON
+    # vaults and salts without key slot, unlock() handles them then
+    @staticmethod
+    def derive_slot_key(
+        username: str, password: str, vault_salt: bytes
+    ) -> Optional[CryptoManager]:
+        metadata = stored_metadata(vault_path(username))
+        if metadata is None:
+            return None
+        slot = metadata.key_slots.get(vault_salt.hex())
+        if slot is None:
+            return None
+        return CryptoManager(password, vault_salt, kdf=slot_params(slot))
+
+    # Open vault with key from derive_slot_key() once user's settings are
+    # loaded (store layout / shards of the settings are applied then)
+    @classmethod
+    def unlock_with(cls, username: str, password_key: CryptoManager) -> "VaultManager":
+        return cls(username, password_key)
+
+    @property
+    def metadata(self) -> VaultMetadataModel:
+        return self.store.metadata
+
+    # Key slot of the password-derived key (with its KDF parameters)
+    @staticmethod
+    def _key_slot(password_key: CryptoManager, data_key: bytes) -> dict:
+        params = password_key.kdf_params
+        return KeySlotModel(
+            kdf=params.name,
+            iterations=params.iterations,
+            memory_cost=params.memory_cost,
+            parallelism=params.parallelism,
+            wrapped_key=password_key.wrap_key(data_key),
+        ).model_dump()
+
+    # Unwrap data key with password-derived key (slot of its vault salt)
+    def _unlock(self, password_key: CryptoManager) -> CryptoManager:
+        salt = password_key.salt.hex()
+        key_slots = self.metadata.key_slots
+
+        if salt in key_slots:
+            slot = key_slots[salt]
+            data_key = password_key.unwrap_key(slot.wrapped_key)
+            # Slot of other password is left by interrupted password change,
+            # early slots have no KDF parameters
+            if len(key_slots) > 1 or not slot.iterations:
+                self.store.update_metadata(
+                    key_slots={salt: self._key_slot(password_key, data_key)}
+                )
+        elif not key_slots:
+            # Vault without data key: entries are already encrypted with the
+            # password-derived key, so it becomes the data key (no re-encryption)
+            if len(self.store.services()):
+                data_key = password_key.key
+            else:
+                data_key = CryptoManager.generate_key()
+            self.store.update_metadata(
+                key_slots={salt: self._key_slot(password_key, data_key)}
             )
+        else:
+            raise ValueError("Vault data key is not available for this password")
+
+        return CryptoManager.from_key(data_key, salt=password_key.salt)
+
+    # Wrap data key for new password-derived key. The old slot stays until
+    # drop_key_slots(), so a crash in between doesn't lock the vault
+    def add_key_slot(self, password_key: CryptoManager):
+        key_slots = {
+            salt: slot.model_dump() for salt, slot in self.metadata.key_slots.items()
+        }
+        key_slots[password_key.salt.hex()] = self._key_slot(
+            password_key, self.crypto.key
+        )
+        self.store.update_metadata(key_slots=key_slots)
 
-    # Atomic save: tempfile, only owner can get this data
-    def _save_vault(self, vault_data: VaultDataModel):
-        # Tempfile directory
-        target_dir = (
-            self.vault_path.parent if self.vault_path.parent.exists() else Path.cwd()
+    # Keep only the slot of given password-derived key (it becomes current)
+    def drop_key_slots(self, password_key: CryptoManager):
+        salt = password_key.salt.hex()
+        slot = self.metadata.key_slots[salt]
+        self.store.update_metadata(key_slots={salt: slot.model_dump()})
+        self.crypto.salt = password_key.salt
+
+    # KDF parameters of the slot differ from the settings (re-key is due)
+    def kdf_outdated(self) -> bool:
+        salt = self.crypto.salt.hex()
+        slot = self.metadata.key_slots.get(salt)
+        return (
+            slot is None
+            or slot_params(slot) != default_params()
+            or len(self.crypto.salt) != cfg.data.SALT_SIZE
+        )
+
+    # Fold journal(s) into the base file(s) now
+    def compact(self):
+        self.store.compact()
+
+    # End of session: wipe notes index, wait for compaction, release vault files,
+    # zero the data key
+    def close(self):
+        if self.notes_index is not None:
+            self.notes_index.close()
+            self.notes_index = None
+        self.store.close()
+        self.crypto.wipe()
+
+    # Group any number of mutations into one atomic write:
+    #     with vault.transaction():
+    #         vault.add_entry(...)
+    # Changes go to a working copy, nothing is written if the block raises
+    @contextmanager
+    def transaction(self) -> Iterator["VaultManager"]:
+        with self._lock:
+            # Nested transaction joins the outer one
+            if self._in_tx:
+                yield self
+                return
+
+            self.store.begin()
+            self._in_tx = True
+            self._tx_services = []
+            try:
+                yield self
+            except BaseException:
+                self._in_tx = False
+                self.store.rollback()
+                self._reindex(self._tx_services)
+                raise
+            finally:
+                services, self._tx_services = self._tx_services, []
+            self._in_tx = False
+            self.store.commit()
+            self.attachments.prune(services)
+
+    # Seal secret fields of the entry into one token (with vault key or another
+    # one). Service name is authenticated with them
+    def encrypt_entry(
+        self, entry: VaultEntryModel, crypto: Optional[CryptoManager] = None
+    ) -> EncryptedVaultEntryModel:
+        crypto = crypto or self.crypto
+        fields = [entry.username, entry.password, entry.notes or ""]
+        return EncryptedVaultEntryModel(
+            service=entry.service,
+            sealed=crypto.seal(
+                json.dumps(fields, ensure_ascii=False).encode("utf-8"),
+                entry.service.encode("utf-8"),
+            ),
+            created_at=entry.created_at,
+            username_index=crypto.blind_index(entry.username),
         )
 
-        tmp_path = None
+    # Decrypt secret fields (ValueError if token is damaged or key is wrong)
+    def decrypt_entry(
+        self,
+        encrypted: EncryptedVaultEntryModel,
+        crypto: Optional[CryptoManager] = None,
+    ) -> VaultEntryModel:
+        username, password, notes = self._open_fields(encrypted, crypto)
+        return VaultEntryModel(
+            service=encrypted.service,
+            username=username,
+            password=password,
+            notes=notes,
+            created_at=encrypted.created_at,
+        )
+
+    # Batch versions in thread pool (order is kept, failed items are ValueError)
+    def encrypt_entries(
+        self,
+        entries: Iterable[VaultEntryModel],
+        crypto: Optional[CryptoManager] = None,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[Union[EncryptedVaultEntryModel, ValueError]]:
+        return map_many(
+            lambda entry: self.encrypt_entry(entry, crypto),
+            entries,
+            workers,
+            chunk_size,
+        )
+
+    def decrypt_entries(
+        self,
+        encrypted: Iterable[EncryptedVaultEntryModel],
+        crypto: Optional[CryptoManager] = None,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[Union[VaultEntryModel, ValueError]]:
+        return map_many(
+            lambda item: self.decrypt_entry(item, crypto),
+            encrypted,
+            workers,
+            chunk_size,
+        )
+
+    # (username, password, notes) of sealed or early per-field entry
+    def _open_fields(
+        self,
+        encrypted: EncryptedVaultEntryModel,
+        crypto: Optional[CryptoManager] = None,
+    ) -> Tuple[str, str, str]:
+        crypto = crypto or self.crypto
+        if not encrypted.sealed:
+            return (
+                crypto.decrypt_data(encrypted.username),
+                crypto.decrypt_data(encrypted.password),
+                crypto.decrypt_data(encrypted.notes),
+            )
+
+        data = crypto.unseal(encrypted.sealed, encrypted.service.encode("utf-8"))
         try:
-            with tempfile.NamedTemporaryFile(
-                mode="w",
-                dir=target_dir,
-                delete=False,  # Important for Windows
-                encoding="utf-8",
-            ) as tmp_file:
-                data_to_save = (
-                    vault_data.model_dump()
-                    if hasattr(vault_data, "model_dump")
-                    else vault_data.dict()
-                )
-                json.dump(data_to_save, tmp_file, indent=2)
-                tmp_path = Path(tmp_file.name)
-            tmp_path.replace(self.vault_path)
-            try:  # rw------- rights
-                self.vault_path.chmod(stat.S_IRUSR | stat.S_IWUSR)
-            except OSError:  # For Windows and etc.
-                pass
-        except Exception as e:
-            print(f"Critical error saving vault: {e}")
-            # Clear temp litter if error
-            if tmp_path and tmp_path.exists():
-                try:
-                    os.unlink(tmp_path)
-                except OSError:
-                    pass
-            raise e
+            username, password, notes = json.loads(data)
+        except ValueError as e:
+            raise ValueError("Damaged sealed entry") from e
+        return username, password, notes
+
+    # Store already encrypted entry (journal record or transaction copy)
+    def add_encrypted_entry(
+        self, encrypted_entry: EncryptedVaultEntryModel, notes: Optional[str] = None
+    ):
+        self.store.put(encrypted_entry)
+        self._entry_changed(encrypted_entry.service, notes)
 
     # Add entry / save updated vault
     def add_entry(self, entry: VaultEntryModel) -> bool:
         try:
-            vault_data = self._load_vault()
-
-            encrypted_entry = EncryptedVaultEntryModel(
-                service=entry.service,
-                username=self.crypto.encrypt_data(entry.username),
-                password=self.crypto.encrypt_data(entry.password),
-                notes=self.crypto.encrypt_data(entry.notes),
-                created_at=entry.created_at,
-            )
-
-            vault_data.entries[entry.service] = encrypted_entry
-            vault_data.metadata.entry_count = len(vault_data.entries)
-            vault_data.metadata.last_modified = time.time()
-
-            self._save_vault(vault_data)
+            self.add_encrypted_entry(self.encrypt_entry(entry), entry.notes)
             return True
 
         except Exception as e:
             raise ValueError(f"Failed to add entry: {e}")
             return False
 
+    # Add (or replace) many entries with one vault write. Returns added count.
+    # Entries are encrypted in thread pool, any failure rolls all back
+    def add_entries(self, entries: Iterable[VaultEntryModel]) -> int:
+        count = 0
+        with self.transaction():
+            for result in map_many(
+                lambda entry: (self.encrypt_entry(entry), entry.notes), entries
+            ):
+                if isinstance(result, ValueError):
+                    raise ValueError(f"Failed to add entry: {result}")
+                self.add_encrypted_entry(*result)
+                count += 1
+        return count
+
     # Get entry by service name / return decrypt data or None if error
     def get_entry(self, service: str) -> Optional[VaultEntryModel]:
-        vault_data = self._load_vault()
-
-        if service not in vault_data.entries:
+        encrypted = self.store.get(service)
+        if encrypted is None:
             return None
 
-        encrypted = vault_data.entries[service]
         try:
-            return VaultEntryModel(
-                service=service,
-                username=self.crypto.decrypt_data(encrypted.username),
-                password=self.crypto.decrypt_data(encrypted.password),
-                notes=self.crypto.decrypt_data(encrypted.notes),
-                created_at=encrypted.created_at,
-            )
+            return self.decrypt_entry(encrypted)
         except ValueError:
             return None
 
+    # Services whose username matches (case / whitespace / Unicode form are
+    # ignored). Lookup goes over blind index tokens, entries aren't decrypted
+    def find_by_username(self, username: str) -> List[str]:
+        self._backfill_username_index()
+        return self.store.find_username(self.crypto.blind_index(username))
+
+    # Entries stored before blind index existed get their tokens once
+    def _backfill_username_index(self):
+        with self._lock:
+            missing = self.store.find_username("")
+            if not missing:
+                return
+
+            with self.transaction():
+                for service in missing:
+                    encrypted = self.store.get(service)
+                    try:
+                        username = self._open_fields(encrypted)[0]
+                    except ValueError:
+                        continue
+                    self.store.put(
+                        encrypted.model_copy(
+                            update={"username_index": self.crypto.blind_index(username)}
+                        )
+                    )
+
     # Get listed services / entries
     def list_services(self) -> List[str]:
-        vault_data = self._load_vault()
-        return list(vault_data.entries.keys())
+        return self.store.services()
 
     # Delete entry. Returns True if success, or False if fault
     def delete_entry(self, service: str) -> bool:
-        vault_data = self._load_vault()
+        if not self.store.delete(service):
+            return False
+        self.service_index.remove(service)
+        if self.notes_index is not None:
+            self.notes_index.remove(service)
+        if self._in_tx:
+            self._tx_services.append(service)  # Attachments go after commit
+        else:
+            self.attachments.prune([service])
+        return True
 
-        if service in vault_data.entries:
-            del vault_data.entries[service]
-            vault_data.metadata.entry_count = len(vault_data.entries)
-            self._save_vault(vault_data)
-            return True
-        return False
+    # Services matching typed text, best first (exact, prefix, fuzzy)
+    def search_services(self, query: str, limit: int = 100) -> List[str]:
+        return self.service_index.search(query, limit)
+
+    # Service was opened by user, it is ranked higher in search
+    def mark_used(self, service: str):
+        self.service_index.touch(service)
+
+    # Services whose notes contain all words of the query (prefix match).
+    # Empty if notes index is off; partial while it is still being built
+    def search_notes(self, query: str, limit: Optional[int] = None) -> List[str]:
+        if self.notes_index is None:
+            return []
+        return self.notes_index.search(query, limit)
+
+    # Keep search indexes in sync (notes are decrypted in background if not given)
+    def _entry_changed(self, service: str, notes: Optional[str]):
+        self.service_index.add(service)
+        if self.notes_index is not None:
+            if notes is None:
+                self.notes_index.schedule([service])
+            else:
+                self.notes_index.update(service, notes)
+        if self._in_tx:
+            self._tx_services.append(service)
+
+    # Bring indexes back to the vault content (after rollback)
+    def _reindex(self, services: List[str]):
+        for service in services:
+            if service in self.store:
+                self.service_index.add(service)
+            else:
+                self.service_index.remove(service)
+        if self.notes_index is not None:
+            self.notes_index.schedule(services)
+
+    # Decrypted notes for the index / None if missing or not decryptable
+    def _read_notes(self, service: str) -> Optional[str]:
+        encrypted = self.store.get(service)
+        if encrypted is None:
+            return None
+        try:
+            return self._open_fields(encrypted)[2]
+        except ValueError:
+            return None
+
+    # Delete many entries with one vault write. Returns deleted count
+    def delete_entries(self, services: Iterable[str]) -> int:
+        with self.transaction():
+            return sum(1 for service in services if self.delete_entry(service))
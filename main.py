@@ -19,6 +19,18 @@ def main():
     # Setting up imports
     setup_imports()
 
+    # Finish master password changes interrupted by crash (before any login)
+    from keys.rekey import recover_rekeys
+
+    for username in recover_rekeys():
+        print(f"Finished interrupted password change for: {username}")
+
+    # Headless commands (import / export and etc.)
+    if len(sys.argv) > 1:
+        from cli.cli import run
+
+        sys.exit(run(sys.argv[1:]))
+
     try:
         from gui.app import Runtime
 
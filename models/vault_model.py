@@ -58,13 +58,48 @@ class VaultEntryModel(BaseSecureModel):
         return datetime.fromtimestamp(self.created_at)
 
 
-# Entry model for work with encrypted data
+# Limit for encrypted fields (ciphertext is longer than the 1024 chars of plaintext)
+ENCRYPTED_MAX_LENGTH = 8192
+
+
+# Entry model for work with encrypted data. Secret fields are sealed together
+# in one AEAD token; early entries have a Fernet token per field instead
 class EncryptedVaultEntryModel(BaseSecureModel):
     service: str = Field(...)  # Unencrypted
-    username: str = Field(...)  # Encrypted
-    password: str = Field(...)  # Encrypted
-    notes: Optional[str] = Field(default="")  # Encrypted
+    # Sealed [username, password, notes]. Base64 ciphertext can randomly match
+    # injection patterns, so skip
+    sealed: str = Field(
+        default="",
+        max_length=ENCRYPTED_MAX_LENGTH,
+        json_schema_extra={"skip_secure_validation": True},
+    )
+    # Encrypted (early format)
+    username: str = Field(
+        default="",
+        max_length=ENCRYPTED_MAX_LENGTH,
+        json_schema_extra={"skip_secure_validation": True},
+    )
+    password: str = Field(
+        default="",
+        max_length=ENCRYPTED_MAX_LENGTH,
+        json_schema_extra={"skip_secure_validation": True},
+    )
+    notes: Optional[str] = Field(
+        default="",
+        max_length=ENCRYPTED_MAX_LENGTH,
+        json_schema_extra={"skip_secure_validation": True},
+    )
     created_at: float = Field(...)  # Unencrypted
+    username_index: str = Field(default="")  # Blind index (keyed HMAC) of username
+
+
+# Vault data key wrapped by a password-derived key (KDF parameters included)
+class KeySlotModel(BaseSecureModel):
+    kdf: str = Field(default="pbkdf2-sha256")
+    iterations: int = Field(default=0)  # 0 = not recorded, config value is used
+    memory_cost: int = Field(default=0)  # KiB (scrypt / Argon2id)
+    parallelism: int = Field(default=0)  # scrypt p / Argon2id lanes
+    wrapped_key: str = Field(..., json_schema_extra={"skip_secure_validation": True})
 
 
 # Vault model for work with metadata
@@ -73,6 +108,21 @@ class VaultMetadataModel(BaseSecureModel):
     created: float = Field(...)
     last_modified: float = Field(default_factory=time.time)
     entry_count: int = Field(default=0)
+    # Key slots by vault salt (hex), one per password (two while it changes)
+    key_slots: Dict[str, KeySlotModel] = Field(default_factory=dict)
+    # Key of file attachments, wrapped by the vault data key (empty = none yet)
+    attachment_key: str = Field(
+        default="", json_schema_extra={"skip_secure_validation": True}
+    )
+
+    # Early slots were bare wrapped key tokens
+    @field_validator("key_slots", mode="before")
+    @classmethod
+    def validate_key_slots(cls, v: dict) -> dict:
+        return {
+            salt: {"wrapped_key": slot} if isinstance(slot, str) else slot
+            for salt, slot in v.items()
+        }
 
 
 # Vault model for work with all data (includes metadata)
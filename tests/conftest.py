@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+# gui.config creates its directories under the home directory on import, so
+# the tests get their own home before any app module is imported
+os.environ["HOME"] = os.environ["APPDATA"] = tempfile.mkdtemp(prefix="hash.all-")
+
+import pytest  # noqa: E402
+
+from gui.config import Config, cfg  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_cfg(tmp_path, monkeypatch):
+    """Default settings (cheap KDF / bcrypt) and empty directories per test"""
+    vaults_dir = tmp_path / "vaults"
+    vaults_dir.mkdir()
+    monkeypatch.setattr(cfg, "config_dir", tmp_path)
+    monkeypatch.setattr(cfg, "vaults_dir", vaults_dir)
+    monkeypatch.setattr(cfg, "config_file", tmp_path / "config_default.json")
+    monkeypatch.setattr(cfg, "data", Config())
+    cfg.data.PBKDF2_ITERATIONS = 1000
+    cfg.data.BCRYPT_ROUNDS = 4
+    cfg.data.VAULT_FSYNC = "never"
+    return cfg
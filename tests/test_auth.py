@@ -0,0 +1,80 @@
+import bcrypt
+
+from auth import auth as auth_module
+from auth.auth import AuthManager
+from models.auth_model import UserLoginModel, UserRegModel
+
+
+def checked_costs(monkeypatch) -> list:
+    """bcrypt costs of the hashes verify_user checks against"""
+    costs = []
+    checkpw = bcrypt.checkpw
+
+    def counted(password, hashed):
+        costs.append(AuthManager.hash_rounds(hashed.decode()))
+        return checkpw(password, hashed)
+
+    monkeypatch.setattr(auth_module.bcrypt, "checkpw", counted)
+    return costs
+
+
+def test_unknown_user_is_checked_at_stored_cost(isolated_cfg, monkeypatch):
+    isolated_cfg.data.BCRYPT_ROUNDS = 5
+    auth = AuthManager()
+    for name in ("alice", "bob"):
+        auth.register_user(UserRegModel(username=name, password="Passw0rd!x"))
+
+    # Settings changed later, stored hashes keep their cost
+    isolated_cfg.data.BCRYPT_ROUNDS = 4
+    auth = AuthManager()
+    costs = checked_costs(monkeypatch)
+    assert not auth.verify_user(
+        UserLoginModel(username="alice", password="wrongpass1")
+    ).success
+    assert not auth.verify_user(
+        UserLoginModel(username="nobody", password="wrongpass1")
+    ).success
+    assert costs == [5, 5]
+
+
+def test_common_hash_cost(isolated_cfg):
+    auth = AuthManager()
+    assert auth.store.common_hash_cost() is None
+    assert auth.dummy_rounds() == isolated_cfg.data.BCRYPT_ROUNDS
+
+    for name, rounds in (("a", 4), ("b", 5), ("c", 5)):
+        auth.store.add(name, {"hash": auth.hash_password("x", rounds)})
+    assert auth.store.common_hash_cost() == 5
+
+
+def test_rehash_upgrades_cost(isolated_cfg):
+    auth = AuthManager()
+    auth.register_user(UserRegModel(username="bob", password="Passw0rd!x"))
+    assert auth.rehash_if_needed("bob", "Passw0rd!x") is None
+
+    isolated_cfg.data.BCRYPT_ROUNDS = 5
+    auth.rehash_if_needed("bob", "Passw0rd!x").join()
+    assert AuthManager.hash_rounds(auth.store.get("bob")["hash"]) == 5
+    assert auth.verify_user(
+        UserLoginModel(username="bob", password="Passw0rd!x")
+    ).success
+
+
+def test_rehash_does_not_undo_password_change(isolated_cfg, monkeypatch):
+    auth = AuthManager()
+    auth.register_user(UserRegModel(username="bob", password="Passw0rd!x"))
+    isolated_cfg.data.BCRYPT_ROUNDS = 5
+
+    # Password is changed while the old one is being rehashed
+    hash_password = auth.hash_password
+    changed = hash_password("NewPassw0rd!y", 4)
+
+    def slow_hash(password, rounds=None):
+        auth.update_user("bob", hash=changed)
+        return hash_password(password, rounds)
+
+    monkeypatch.setattr(auth, "hash_password", slow_hash)
+    auth.rehash_if_needed("bob", "Passw0rd!x").join()
+
+    assert auth.store.get("bob")["hash"] == changed
+    assert auth.store.replace_hash("bob", "stale", "other") is False
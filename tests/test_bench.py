@@ -0,0 +1,36 @@
+from bench.suite import compare, environment, percentile, run_case
+
+
+def case(ops_per_sec: float, peak_kib: float = 100) -> dict:
+    return {"ops_per_sec": ops_per_sec, "peak_kib": peak_kib}
+
+
+def results(**cases) -> dict:
+    return {"environment": environment(), "cases": cases}
+
+
+def test_compare_flags_slower_and_bigger_cases(capsys):
+    baseline = results(fast=case(1000), same=case(1000), big=case(1000), kept=case(10))
+    current = results(
+        fast=case(700), same=case(900), big=case(1000, 200), kept=case(10), new=case(5)
+    )
+
+    regressions = compare(current, baseline, tolerance=0.15)
+    assert regressions == ["fast: SLOWER", "big: MEMORY"]
+    assert "Warning" not in capsys.readouterr().out
+
+
+def test_compare_warns_on_other_environment(capsys):
+    baseline = results(a=case(100))
+    baseline["environment"] = {**baseline["environment"], "cpu_count": -1}
+    assert compare(results(a=case(100)), baseline, tolerance=0.15) == []
+    assert "Warning" in capsys.readouterr().out
+
+
+def test_run_case_reports_latencies():
+    calls = []
+    result = run_case(lambda: calls.append(1), repeat=9, ops=10)
+    assert len(calls) == 10  # Warm-up and timed runs
+    assert result["repeat"] == 9
+    assert result["p50_ms"] <= result["p99_ms"] <= result["max_ms"]
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
@@ -0,0 +1,69 @@
+import base64
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+
+from crypto.cipher import (
+    AES_GCM,
+    CHACHA20_POLY1305,
+    CIPHER_VERSIONS,
+    NONCE_SIZE,
+    CipherEngine,
+)
+from crypto.crypto import CryptoManager
+
+KEY = b"k" * 32
+
+
+@pytest.mark.parametrize("cipher", [AES_GCM, CHACHA20_POLY1305])
+def test_tokens_of_both_ciphers_are_read(cipher):
+    token = CipherEngine(KEY, cipher).encrypt(b"data", b"ad")
+    for reader in (AES_GCM, CHACHA20_POLY1305):
+        assert CipherEngine(KEY, reader).decrypt(token, b"ad") == b"data"
+    with pytest.raises(InvalidTag):
+        CipherEngine(KEY).decrypt(token, b"other")
+
+
+def test_ciphers_use_own_subkeys():
+    for cipher, aead in ((AES_GCM, AESGCM), (CHACHA20_POLY1305, ChaCha20Poly1305)):
+        token = CipherEngine(KEY, cipher).encrypt(b"data")
+        nonce, sealed = token[1 : 1 + NONCE_SIZE], token[1 + NONCE_SIZE :]
+        with pytest.raises(InvalidTag):
+            aead(KEY).decrypt(nonce, sealed, b"")
+
+
+@pytest.mark.parametrize(
+    "cipher, aead", [(AES_GCM, AESGCM), (CHACHA20_POLY1305, ChaCha20Poly1305)]
+)
+def test_first_aead_tokens_are_read(cipher, aead):
+    nonce = os.urandom(NONCE_SIZE)
+    token = (
+        bytes((CIPHER_VERSIONS[cipher],))
+        + nonce
+        + aead(KEY).encrypt(nonce, b"old", b"")
+    )
+    assert CipherEngine(KEY).decrypt(token) == b"old"
+
+
+def test_fernet_token_is_read_after_aead_switch():
+    key = CryptoManager.generate_key()
+    crypto = CryptoManager.from_key(key)
+    token = Fernet(bytes(key.view())).encrypt(b"early secret")
+
+    assert crypto.decrypt_data(base64.urlsafe_b64encode(token).decode()) == (
+        "early secret"
+    )
+    # New tokens are AEAD ones
+    assert crypto.decrypt_data(crypto.encrypt_data("new")) == "new"
+    assert base64.urlsafe_b64decode(crypto.encrypt_data("new"))[0] == 0x03
+
+
+def test_tampered_token_is_rejected():
+    crypto = CryptoManager.from_key(CryptoManager.generate_key())
+    raw = bytearray(base64.urlsafe_b64decode(crypto.seal(b"data", b"ad")))
+    raw[-1] ^= 1
+    with pytest.raises(ValueError):
+        crypto.unseal(base64.urlsafe_b64encode(raw).decode(), b"ad")
@@ -0,0 +1,31 @@
+from crypto.crypto import CryptoManager, map_many
+
+
+def test_batch_keeps_order_and_marks_failures():
+    crypto = CryptoManager.from_key(CryptoManager.generate_key())
+    data = [f"value {i}" for i in range(50)]
+    tokens = list(crypto.encrypt_many(data, workers=4, chunk_size=7))
+    assert [crypto.decrypt_data(token) for token in tokens] == data
+
+    tokens[3] = "broken"
+    tokens[20] = crypto.encrypt_data("")  # Empty stays empty
+    result = list(crypto.decrypt_many(tokens, workers=4, chunk_size=7))
+    assert isinstance(result[3], ValueError)
+    assert result[20] == ""
+    assert [item for i, item in enumerate(result) if i not in (3, 20)] == [
+        value for i, value in enumerate(data) if i not in (3, 20)
+    ]
+
+
+def test_map_many_reads_input_lazily():
+    consumed = []
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    results = map_many(lambda i: i * 2, items(), workers=2, chunk_size=10)
+    assert next(results) == 0
+    assert len(consumed) < 100  # Only the first chunks are read
+    assert list(results) == [i * 2 for i in range(1, 100)]
@@ -0,0 +1,61 @@
+import pytest
+
+from crypto.crypto import CryptoManager
+from keys.exporter import VaultExporter, read_archive
+from keys.importer import VaultImporter
+from keys.vault import VaultManager
+from models.vault_model import VaultEntryModel
+
+ENTRIES = 20
+
+
+@pytest.fixture
+def vault() -> VaultManager:
+    vault = VaultManager("bob", CryptoManager("pw", b"s" * 32))
+    vault.add_entries(
+        VaultEntryModel(
+            service=f"svc{i}",
+            username="u,x",
+            password='p"q',
+            notes="line1\nline2",
+            created_at=1600000000.5 + i,
+        )
+        for i in range(ENTRIES)
+    )
+    yield vault
+    vault.close()
+
+
+@pytest.fixture
+def target() -> VaultManager:
+    vault = VaultManager("alice", CryptoManager("other", b"t" * 32))
+    yield vault
+    vault.close()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_export_import_round_trip(vault, target, tmp_path, fmt):
+    path = tmp_path / f"export.{fmt}"
+    stats = VaultExporter(vault, workers=2).export_file(path)
+    assert (stats.exported, stats.failed) == (ENTRIES, 0)
+
+    stats = VaultImporter(target, chunk_size=7).import_file(path)
+    assert (stats.imported, stats.skipped) == (ENTRIES, 0)
+
+    entry = target.get_entry("svc3")
+    assert (entry.username, entry.password) == ("u,x", 'p"q')
+    assert entry.notes == "line1\nline2"
+    assert entry.created_at == 1600000003.5
+
+
+def test_archive_is_encrypted(vault, target, tmp_path):
+    path = tmp_path / "export.hashall"
+    VaultExporter(vault).export_file(path, archive_password="arch")
+    assert b"svc3" not in path.read_bytes()
+
+    with pytest.raises(ValueError):
+        list(read_archive(path, "wrong"))
+
+    stats = VaultImporter(target).import_file(path, archive_password="arch")
+    assert stats.imported == ENTRIES
+    assert target.get_entry("svc0").password == 'p"q'
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from crypto.crypto import CryptoManager
+from keys.importer import VaultImporter
+from keys.vault import VaultManager
+
+
+@pytest.fixture
+def vault() -> VaultManager:
+    vault = VaultManager("bob", CryptoManager("pw", b"s" * 32))
+    yield vault
+    vault.close()
+
+
+def test_csv_columns_of_other_managers(vault, tmp_path):
+    path = tmp_path / "chrome.csv"
+    path.write_text(
+        "name,url,username,password,note\n"
+        "GitHub,https://github.com,octo,pw1,\n"
+        ",https://www.example.com/login,me,pw2,hi\n"
+        "Broken,,,pw3,\n",
+        encoding="utf-8",
+    )
+    stats = VaultImporter(vault).import_file(path)
+
+    assert (stats.imported, stats.skipped) == (2, 1)
+    assert stats.errors[0].startswith("Row 3:")
+    assert vault.get_entry("GitHub").username == "octo"
+    assert vault.get_entry("www.example.com").notes == "hi"
+
+
+def test_csv_created_at_is_parsed(vault, tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_text(
+        "service,username,password,created_at\n"
+        "a,u,p,1600000000.5\n"
+        "b,u,p,not a number\n",
+        encoding="utf-8",
+    )
+    assert VaultImporter(vault).import_file(path).imported == 2
+
+    assert vault.get_entry("a").created_at == 1600000000.5
+    assert vault.get_entry("b").created_at > 1600000000.5  # Import time
+
+
+def test_bitwarden_json_items(vault, tmp_path):
+    items = [
+        {
+            "name": f"site{i}",
+            "notes": None,
+            "login": {"username": f"u{i}", "password": "p", "uris": []},
+        }
+        for i in range(30)
+    ]
+    path = tmp_path / "bitwarden.json"
+    path.write_text(json.dumps({"encrypted": False, "items": items}), "utf-8")
+
+    stats = VaultImporter(vault, chunk_size=7).import_file(path)
+    assert (stats.rows, stats.imported) == (30, 30)
+    assert vault.get_entry("site29").username == "u29"
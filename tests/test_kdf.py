@@ -0,0 +1,73 @@
+import pytest
+
+from crypto.crypto import CryptoManager
+from crypto.kdf import (
+    KDF_ARGON2ID,
+    KDF_PBKDF2,
+    KDF_SCRYPT,
+    KdfParams,
+    apply_params,
+    available_kdfs,
+    calibrate,
+    default_params,
+    derive_key,
+)
+from keys.vault import VaultManager
+
+SALT = b"s" * 32
+
+CHEAP = {
+    KDF_PBKDF2: KdfParams(KDF_PBKDF2, iterations=1000),
+    KDF_SCRYPT: KdfParams(KDF_SCRYPT, iterations=1, memory_cost=1024, parallelism=1),
+    KDF_ARGON2ID: KdfParams(KDF_ARGON2ID, iterations=1, memory_cost=64, parallelism=1),
+}
+
+
+@pytest.mark.parametrize("name", available_kdfs())
+def test_derive_key_per_backend(name):
+    params = CHEAP[name]
+    key = derive_key(b"password", SALT, params)
+
+    assert len(key) == 32
+    assert derive_key(b"password", SALT, params) == key
+    assert derive_key(b"password", b"t" * 32, params) != key
+    assert derive_key(b"other", SALT, params) != key
+
+
+def test_backends_give_different_keys():
+    keys = {derive_key(b"password", SALT, CHEAP[name]) for name in available_kdfs()}
+    assert len(keys) == len(available_kdfs())
+
+
+def test_unsupported_kdf_is_rejected():
+    with pytest.raises(ValueError):
+        derive_key(b"password", SALT, KdfParams("md5"))
+    with pytest.raises(ValueError):
+        default_params("md5")
+
+
+def test_calibrated_params_are_applied(isolated_cfg):
+    params = calibrate(KDF_PBKDF2, target_ms=5)
+    assert params.iterations >= 10000
+    assert params.iterations % 1000 == 0
+
+    params = calibrate(KDF_SCRYPT, target_ms=5)
+    assert params.memory_cost >= 1024
+    assert params.memory_cost & (params.memory_cost - 1) == 0  # Power of 2
+
+    apply_params(params)
+    assert isolated_cfg.data.KDF == KDF_SCRYPT
+    assert default_params() == params
+
+
+def test_vault_keeps_its_kdf_after_settings_change(isolated_cfg):
+    apply_params(CHEAP[KDF_SCRYPT])
+    vault = VaultManager("bob", CryptoManager("pw", SALT))
+    assert vault.metadata.key_slots[SALT.hex()].kdf == KDF_SCRYPT
+    vault.close()
+
+    apply_params(CHEAP[KDF_PBKDF2])
+    vault = VaultManager.unlock("bob", "pw", SALT)
+    assert vault.crypto.salt == SALT
+    assert vault.kdf_outdated()
+    vault.close()
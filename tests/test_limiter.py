@@ -0,0 +1,73 @@
+import pytest
+
+from auth import limiter as limiter_module
+from auth.limiter import RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(limiter_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def db_path(isolated_cfg):
+    isolated_cfg.data.MAX_LOGIN_ATTEMPTS = 3
+    isolated_cfg.data.CLEANUP_INTERVAL = 3600
+    isolated_cfg.data.LOCKOUT_DURATION = 86400
+    return isolated_cfg.config_dir / "users.db"
+
+
+def fail(limiter: RateLimiter, clock: Clock, times: int, step: float = 60):
+    for _ in range(times):
+        limiter.rec_failed_attempt("bob")
+        clock.now += step
+
+
+def test_lockout_outlasts_cleanup_interval(db_path, clock):
+    limiter = RateLimiter(db_path)
+    fail(limiter, clock, 3)
+    last_attempt = clock.now - 60
+
+    clock.now = last_attempt + 3600 + 60
+    can_proceed, response = limiter.check_rate_limit("bob")
+    assert not can_proceed
+    assert response.lockout_time == 86400 - 3660
+
+    clock.now = last_attempt + 86400 + 1
+    assert limiter.check_rate_limit("bob")[0]
+
+
+def test_window_follows_last_attempt(db_path, clock, isolated_cfg):
+    isolated_cfg.data.LOCKOUT_DURATION = 900
+    limiter = RateLimiter(db_path)
+    fail(limiter, clock, 2, step=3000)  # Second one 3000 s after the first
+
+    # Past first attempt + CLEANUP_INTERVAL, but the attempts still count
+    limiter.rec_failed_attempt("bob")
+    assert not limiter.check_rate_limit("bob")[0]
+
+    # A quiet CLEANUP_INTERVAL starts over
+    clock.now += 3600 + 1
+    can_proceed, response = limiter.check_rate_limit("bob")
+    assert can_proceed
+    assert response.remaining_attempts == 3
+    assert limiter.rec_failed_attempt("bob").remaining_attempts == 2
+
+
+def test_state_survives_new_limiter(db_path, clock):
+    fail(RateLimiter(db_path), clock, 3)
+    assert not RateLimiter(db_path).check_rate_limit("bob")[0]
+
+    limiter = RateLimiter(db_path)
+    limiter.clear_attempts("bob")
+    assert RateLimiter(db_path).check_rate_limit("bob")[0]
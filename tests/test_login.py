@@ -0,0 +1,93 @@
+import pytest
+
+from auth.auth import AuthManager
+from auth.login import login
+from crypto import crypto as crypto_module
+from gui.config import cfg
+from keys.vault import VaultManager, vault_path
+from models.auth_model import UserLoginModel, UserRegModel
+from models.vault_model import VaultEntryModel
+
+PASSWORD = "Passw0rd!x"
+
+
+@pytest.fixture
+def auth() -> AuthManager:
+    auth = AuthManager()
+    auth.register_user(UserRegModel(username="usr", password=PASSWORD))
+    result = login(auth, UserLoginModel(username="usr", password=PASSWORD))
+    result.vault.add_entry(VaultEntryModel(service="s", username="u", password="p"))
+    result.vault.close()
+    return auth
+
+
+@pytest.fixture
+def derivations(monkeypatch) -> list:
+    """Usernames of speculative key derivations"""
+    calls = []
+    derive = VaultManager.derive_slot_key
+
+    def counted(username, password, vault_salt):
+        calls.append(username)
+        return derive(username, password, vault_salt)
+
+    monkeypatch.setattr(VaultManager, "derive_slot_key", staticmethod(counted))
+    return calls
+
+
+def test_login_unlocks_with_speculative_key(auth, derivations):
+    result = login(auth, UserLoginModel(username="usr", password=PASSWORD))
+    assert result.response.success
+    assert result.vault.get_entry("s").password == "p"
+    assert derivations == ["usr"]
+    result.vault.close()
+
+
+def test_wrong_password_returns_no_vault(auth):
+    result = login(auth, UserLoginModel(username="usr", password="wrongpass1"))
+    assert not result.response.success
+    assert result.vault is None
+
+
+def test_locked_account_skips_speculation(auth, derivations):
+    for _ in range(cfg.data.MAX_LOGIN_ATTEMPTS):
+        login(auth, UserLoginModel(username="usr", password="wrongpass1"))
+    derivations.clear()
+
+    result = login(auth, UserLoginModel(username="usr", password=PASSWORD))
+    assert not result.response.success
+    assert result.response.lockout_time
+    assert derivations == []
+
+
+def test_speculation_does_not_touch_vault_files(auth):
+    journal = vault_path("usr").with_name(vault_path("usr").name + ".journal")
+    with open(journal, "ab") as f:
+        f.write(b'{"op":"put","ts":1,"entry":{"serv')
+    size = journal.stat().st_size
+
+    salt = bytes.fromhex(auth.get_vault_salt("usr"))
+    password_key = VaultManager.derive_slot_key("usr", PASSWORD, salt)
+    assert password_key is not None
+    assert journal.stat().st_size == size
+    password_key.wipe()
+
+
+def test_unknown_user_costs_the_same_derivation(auth, monkeypatch):
+    calls = []
+    derive = crypto_module.derive_key
+
+    def counted(password, salt, params, length=32):
+        calls.append(params)
+        return derive(password, salt, params, length)
+
+    monkeypatch.setattr(crypto_module, "derive_key", counted)
+
+    result = login(auth, UserLoginModel(username="usr", password="wrongpass1"))
+    assert not result.response.success
+    known = list(calls)
+    calls.clear()
+
+    result = login(auth, UserLoginModel(username="nobody", password="wrongpass1"))
+    assert not result.response.success
+    assert calls == known
@@ -0,0 +1,43 @@
+import time
+
+from keys.notes_index import NotesIndex
+
+
+def test_words_match_as_prefixes():
+    index = NotesIndex(lambda service: None)
+    index.update("a", "Recovery codes: 1234")
+    index.update("b", "recovery email")
+
+    assert index.search("recov") == ["a", "b"]
+    assert index.search("recovery cod") == ["a"]
+    assert index.search("missing") == []
+
+
+def test_vocabulary_follows_updates():
+    index = NotesIndex(lambda service: None)
+    index.update("a", "alpha beta")
+    index.search("a")  # Vocabulary is built
+
+    for _ in range(3):
+        index.update("a", "gamma")
+        index.update("a", "alpha beta")
+    index.update("b", "delta")
+    index.remove("b")
+
+    assert index._vocabulary == ["alpha", "beta"]
+    assert index.search("al") == ["a"]
+    assert index.search("ga") == []
+
+
+def test_background_indexing():
+    notes = {"a": "bank pin", "b": "wifi password", "c": None}
+    index = NotesIndex(notes.get)
+    index.schedule(notes)
+    deadline = time.monotonic() + 10
+    while not index.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert index.ready
+    assert index.search("wifi") == ["b"]
+    index.close()
+    assert index.search("wifi") == []
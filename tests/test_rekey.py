@@ -0,0 +1,113 @@
+from typing import Optional
+
+import pytest
+
+from auth.auth import AuthManager
+from crypto.crypto import CryptoManager
+from keys.rekey import VaultRekey, change_password, load_checkpoint
+from keys.vault import VaultManager
+from models.auth_model import UserLoginModel, UserRegModel
+from models.vault_model import VaultEntryModel
+
+OLD = "OldPass1!x"
+NEW = "NewPass2!y"
+ENTRIES = 50
+
+
+class Stop(Exception):
+    pass
+
+
+def open_vault(password: str) -> Optional[VaultManager]:
+    response = AuthManager().verify_user(
+        UserLoginModel(username="bob", password=password)
+    )
+    if not response.success:
+        return None
+    salt = bytes.fromhex(response.vault_salt)
+    return VaultManager("bob", CryptoManager(password, salt))
+
+
+@pytest.fixture
+def vault() -> VaultManager:
+    AuthManager().register_user(UserRegModel(username="bob", password=OLD))
+    vault = open_vault(OLD)
+    vault.add_entries(
+        VaultEntryModel(service=f"s{i}", username=f"u{i}", password="p", notes="n")
+        for i in range(ENTRIES)
+    )
+    return vault
+
+
+def interrupt(vault: VaultManager):
+    """Rekey stopped after some chunks were staged"""
+
+    def progress(stats):
+        if stats.done >= 20:
+            raise Stop
+
+    with pytest.raises(Stop):
+        VaultRekey(vault, "bob", chunk_size=10).run(NEW, progress)
+    vault.close()
+
+
+def test_rekey_changes_password(vault):
+    stats = VaultRekey(vault, "bob", chunk_size=10).run(NEW)
+    vault.close()
+    assert stats.done == ENTRIES
+    assert load_checkpoint("bob") is None
+
+    assert open_vault(OLD) is None
+    vault = open_vault(NEW)
+    assert len(vault.list_services()) == ENTRIES
+    assert vault.get_entry("s7").username == "u7"
+    vault.close()
+
+
+def test_interrupted_rekey_resumes(vault):
+    interrupt(vault)
+    checkpoint = load_checkpoint("bob")
+    assert checkpoint["phase"] == "staging"
+    assert checkpoint["offset"] > 0
+
+    # Old password still works until the rekey is committed, changes made
+    # meanwhile are staged again on resume
+    vault = open_vault(OLD)
+    vault.add_entry(
+        VaultEntryModel(service="s1", username="changed", password="p", notes="")
+    )
+    stats = VaultRekey(vault, "bob", chunk_size=10).run(NEW)
+    vault.close()
+    assert stats.resumed > 0
+    assert stats.done == ENTRIES
+    assert load_checkpoint("bob") is None
+
+    vault = open_vault(NEW)
+    assert len(vault.list_services()) == ENTRIES
+    assert vault.get_entry("s1").username == "changed"
+    assert vault.get_entry("s49").notes == "n"
+    vault.close()
+
+
+def test_resume_requires_same_new_password(vault):
+    interrupt(vault)
+
+    vault = open_vault(OLD)
+    with pytest.raises(ValueError):
+        VaultRekey(vault, "bob").run("Other3!zz")
+    vault.close()
+    assert load_checkpoint("bob") is not None
+
+
+def test_password_change_rewraps_data_key_only(vault):
+    sealed = {service: vault.store.get(service).sealed for service in ("s0", "s9")}
+    change_password(vault, "bob", NEW)
+    assert len(vault.metadata.key_slots) == 1
+    vault.close()
+
+    assert open_vault(OLD) is None
+    vault = open_vault(NEW)
+    for service, token in sealed.items():
+        assert vault.store.get(service).sealed == token
+    assert vault.get_entry("s9").username == "u9"
+    vault.close()
@@ -0,0 +1,50 @@
+import gc
+
+from crypto.crypto import CryptoManager
+from crypto.secret import SecretBuffer, urlsafe_b64decode
+
+
+def test_wipe_zeroes_memory_seen_by_views():
+    secret = SecretBuffer("master password")
+    view = secret.view()
+    secret.wipe()
+    assert bytes(view) == bytes(len("master password"))
+    view.release()
+
+
+def test_with_block_and_take_zero_the_source():
+    source = bytearray(b"key bytes")
+    with SecretBuffer.take(source) as secret:
+        assert source == bytes(len(source))
+        view = secret.view()
+        assert bytes(view) == b"key bytes"
+    assert bytes(view) == bytes(len(b"key bytes"))
+    view.release()
+
+
+def test_garbage_collected_buffer_is_zeroed():
+    secret = SecretBuffer(b"secret")
+    view = secret.view()
+    del secret
+    gc.collect()
+    assert bytes(view) == bytes(6)
+    view.release()
+
+
+def test_decoded_key_and_wiped_manager():
+    key = CryptoManager.generate_key()
+    with urlsafe_b64decode(key.view()) as raw:
+        assert len(raw) == 32
+
+    crypto = CryptoManager.from_key(key)
+    view = crypto.key.view()
+    crypto.wipe()
+    assert not any(bytes(view))
+    view.release()
+
+
+def test_comparison_and_repr():
+    secret = SecretBuffer(b"abc")
+    assert secret == b"abc"
+    assert secret != SecretBuffer(b"abd")
+    assert "abc" not in repr(secret)
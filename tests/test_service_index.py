@@ -0,0 +1,98 @@
+import random
+import statistics
+import string
+import time
+
+import pytest
+
+from keys import service_index
+from keys.service_index import ServiceIndex
+
+
+def built(services) -> ServiceIndex:
+    """Index with its background trigram build finished"""
+    index = ServiceIndex(services)
+    deadline = time.monotonic() + 10
+    while index._grams is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return index
+
+
+@pytest.fixture(scope="module")
+def services_index() -> ServiceIndex:
+    return built(f"service{i}.com" for i in range(5000))
+
+
+def test_prefix_exact_first():
+    index = built(["github.com", "GitLab", "git", "bitbucket.org"])
+    assert index.search("git") == ["git", "github.com", "GitLab"]
+    assert index.search("GIT")[0] == "git"
+
+
+def test_recent_first_among_prefix_matches():
+    index = built(["alpha", "alps", "also"])
+    index.touch("also")
+    assert index.search("al") == ["also", "alpha", "alps"]
+
+
+def test_fuzzy_substring_and_typo():
+    index = built(["github.com", "gitlab.com", "bitbucket.org", "example.net"])
+    assert index.search("hub")[0] == "github.com"
+    assert index.search("githb")[0] == "github.com"
+    assert index.search("bitbucet")[0] == "bitbucket.org"
+
+
+@pytest.mark.parametrize(
+    "query, best",
+    [
+        ("servce10", "service10.com"),
+        ("sevice42", "service42.com"),
+        ("rvice42", "service42.com"),
+    ],
+)
+def test_fuzzy_over_many_candidates(services_index, query, best):
+    found = services_index.search(query, limit=20)
+    assert found[0] == best
+    assert len(found) == 20
+
+
+def test_add_and_remove():
+    index = built(["github.com"])
+    index.add("gitea.io")
+    assert index.search("gitea") == ["gitea.io"]
+    assert index.search("gtea") == ["gitea.io"]
+
+    index.remove("gitea.io")
+    assert index.search("gitea") == []
+    assert index.search("gtea") == []
+
+
+def test_common_trigram_gives_shortest_names(monkeypatch):
+    monkeypatch.setattr(service_index, "FUZZY_SCORE_LIMIT", 10)
+    monkeypatch.setattr(service_index, "FUZZY_SCAN_LIMIT", 20)
+    monkeypatch.setattr(service_index, "FUZZY_CAPPED", 3)
+    index = built(["x" * i + ".com" for i in range(50, 0, -1)])
+
+    assert index.search("com") == ["x.com", "xx.com", "xxx.com"]
+    index.add("a.com")
+    assert index.search("com") == ["a.com", "x.com", "xx.com"]
+    index.remove("x.com")
+    assert index.search("com") == ["a.com", "xx.com", "xxx.com"]
+
+
+def test_common_trigram_query_is_fast():
+    rng = random.Random(7)
+    index = built(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12)))
+        + rng.choice((".com", ".net", ".org"))
+        for _ in range(100000)
+    )
+    for query in ("com", "net", ".org"):
+        index.search(query)  # Warm-up
+        timings = []
+        for _ in range(25):
+            start = time.perf_counter()
+            found = index.search(query)
+            timings.append(time.perf_counter() - start)
+        assert len(found) == 100
+        assert statistics.median(timings) < 0.001, query
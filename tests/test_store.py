@@ -0,0 +1,206 @@
+from pathlib import Path
+
+import pytest
+
+from keys.store import ShardedVaultStore, VaultStore, open_store, stored_metadata
+from models.vault_model import EncryptedVaultEntryModel
+
+
+def entry(service: str, sealed: str = "sealed") -> EncryptedVaultEntryModel:
+    return EncryptedVaultEntryModel(
+        service=service, sealed=sealed, created_at=1, username_index="ix"
+    )
+
+
+@pytest.fixture
+def path(tmp_path) -> Path:
+    return tmp_path / "user.vault"
+
+
+def journal(path: Path) -> Path:
+    return path.with_name(path.name + ".journal")
+
+
+def test_journal_is_replayed_on_open(path):
+    store = VaultStore(path)
+    store.put(entry("a"))
+    store.put(entry("b"))
+    store.delete("a")
+    store.update_metadata(version="2.0.0")
+    store.close()
+
+    store = VaultStore(path)
+    assert store.services() == ["b"]
+    assert store.get("b").sealed == "sealed"
+    assert store.metadata.version == "2.0.0"
+    store.close()
+
+
+def test_torn_record_is_dropped(path, capsys):
+    store = VaultStore(path)
+    store.put(entry("a"))
+    store.close()
+    valid_size = journal(path).stat().st_size
+    with open(journal(path), "ab") as f:
+        f.write(b'{"op":"put","ts":1,"entry":{"serv')
+
+    store = VaultStore(path)
+    assert store.services() == ["a"]
+    assert journal(path).stat().st_size == valid_size
+    assert "incomplete vault journal record" in capsys.readouterr().out
+
+    # Journal stays appendable after the cut
+    store.put(entry("b"))
+    store.close()
+    assert VaultStore(path).services() == ["a", "b"]
+
+
+def test_broken_record_is_skipped(path):
+    store = VaultStore(path)
+    store.put(entry("a"))
+    store.close()
+    with open(journal(path), "ab") as f:
+        f.write(b'{"op":"nope"}\nnot json\n')
+    store = VaultStore(path)
+    store.put(entry("b"))
+    store.close()
+
+    assert VaultStore(path).services() == ["a", "b"]
+
+
+def test_compaction_folds_journal(path):
+    store = VaultStore(path)
+    for i in range(10):
+        store.put(entry(f"s{i}", sealed=f"v{i}"))
+    store.delete("s3")
+    store.compact()
+    assert not journal(path).exists()
+    assert store.get("s4").sealed == "v4"
+    store.close()
+
+    store = VaultStore(path)
+    assert len(store.services()) == 9
+    assert "s3" not in store
+    store.close()
+
+
+class Crash(BaseException):
+    pass
+
+
+def test_compaction_crash_keeps_tail_records(path, monkeypatch):
+    store = VaultStore(path)
+    for i in range(5):
+        store.put(entry(f"s{i}"))
+
+    # A record is appended while the snapshot is written, then the process
+    # dies after the base file swap, before the journal swap
+    write_temp = store._write_temp
+
+    def write_temp_and_append(vault_state):
+        tmp_path = write_temp(vault_state)
+        store.put(entry("tail"))
+        return tmp_path
+
+    replace = Path.replace
+
+    def crashing_replace(self, target):
+        if self.name.endswith(".journal.tmp"):
+            raise Crash
+        return replace(self, target)
+
+    monkeypatch.setattr(store, "_write_temp", write_temp_and_append)
+    monkeypatch.setattr(Path, "replace", crashing_replace)
+    with pytest.raises(Crash):
+        store.compact()
+    monkeypatch.undo()
+
+    store = VaultStore(path)
+    assert sorted(store.services()) == ["s0", "s1", "s2", "s3", "s4", "tail"]
+    store.compact()
+    store.close()
+    assert sorted(VaultStore(path).services()) == [
+        "s0",
+        "s1",
+        "s2",
+        "s3",
+        "s4",
+        "tail",
+    ]
+
+
+def test_sharded_store_keeps_entries(path, isolated_cfg):
+    store = open_store(path, shards=4)
+    for i in range(20):
+        store.put(entry(f"s{i}"))
+    store.close()
+
+    store = open_store(path)
+    assert len(store.services()) == 20
+    assert store.get("s7") is not None
+    store.close()
+
+
+def test_sharded_commit_crash_rolls_forward(path, monkeypatch):
+    store = open_store(path, shards=4)
+    store.begin()
+    for i in range(20):
+        store.put(entry(f"s{i}"))
+    store.commit()
+
+    # The process dies after the first shard of the next commit is installed
+    installs = []
+    install = VaultStore._install
+
+    def crashing_install(self, tmp_path, tail=b""):
+        if installs:
+            raise Crash
+        installs.append(self)
+        return install(self, tmp_path, tail)
+
+    store.begin()
+    for i in range(20):
+        store.put(entry(f"s{i}", sealed="new"))
+    store.update_metadata(version="7.0.0")
+    monkeypatch.setattr(VaultStore, "_install", crashing_install)
+    with pytest.raises(Crash):
+        store.commit()
+    monkeypatch.undo()
+
+    store = open_store(path)
+    assert isinstance(store, ShardedVaultStore)
+    assert {store.get(f"s{i}").sealed for i in range(20)} == {"new"}
+    assert store.metadata.version == "7.0.0"
+    assert not list(store.shard_dir.glob("tmp*"))
+    store.close()
+
+
+def test_sharded_metadata_follows_transaction(path):
+    store = open_store(path, shards=2)
+    store.begin()
+    store.update_metadata(version="7.0.0")
+    assert store.metadata.version == "7.0.0"
+    store.rollback()
+    assert store.metadata.version != "7.0.0"
+    store.close()
+
+    store = open_store(path)
+    assert store.metadata.version != "7.0.0"
+    store.begin()
+    store.update_metadata(version="7.0.0")
+    store.commit()
+    store.close()
+    assert open_store(path).metadata.version == "7.0.0"
+
+
+def test_stored_metadata_does_not_write(path):
+    store = VaultStore(path)
+    store.put(entry("a"))
+    store.update_metadata(version="2.0.0")
+    store.close()
+    with open(journal(path), "ab") as f:
+        f.write(b'{"op":"meta","ts":1,"fields":{"ver')
+    size = journal(path).stat().st_size
+
+    assert stored_metadata(path).version == "2.0.0"
+    assert journal(path).stat().st_size == size
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from crypto.crypto import CryptoManager
+from crypto.stream import HEADER, TAG_SIZE, decrypt_file, encrypt_file, read_info
+
+CHUNK = 64
+STRIDE = CHUNK + TAG_SIZE
+
+
+@pytest.fixture
+def crypto() -> CryptoManager:
+    return CryptoManager.from_key(CryptoManager.generate_key())
+
+
+@pytest.fixture
+def sealed(tmp_path, crypto):
+    """Encrypted file of 4 full chunks and a partial one (no info block)"""
+    src = tmp_path / "plain.bin"
+    src.write_bytes(os.urandom(CHUNK * 4 + 10))
+    encrypt_file(crypto, src, tmp_path / "sealed.bin", chunk_size=CHUNK, workers=2)
+    return src, tmp_path / "sealed.bin"
+
+
+def chunks(path) -> list:
+    data = path.read_bytes()[HEADER.size :]
+    return [data[i : i + STRIDE] for i in range(0, len(data), STRIDE)]
+
+
+def write_chunks(path, parts: list):
+    path.write_bytes(path.read_bytes()[: HEADER.size] + b"".join(parts))
+
+
+def test_round_trip_with_info(tmp_path, crypto):
+    src = tmp_path / "plain.bin"
+    for size in (0, 1, CHUNK, CHUNK * 3 + 1):
+        src.write_bytes(os.urandom(size))
+        encrypt_file(crypto, src, tmp_path / "sealed.bin", {"name": "a"}, b"ad", CHUNK)
+        assert read_info(crypto, tmp_path / "sealed.bin", b"ad") == {"name": "a"}
+        info = decrypt_file(crypto, tmp_path / "sealed.bin", tmp_path / "out", b"ad")
+        assert info == {"name": "a"}
+        assert (tmp_path / "out").read_bytes() == src.read_bytes()
+
+
+def test_tampered_chunk_is_rejected(sealed, crypto, tmp_path):
+    src, path = sealed
+    data = bytearray(path.read_bytes())
+    data[HEADER.size + STRIDE + 5] ^= 1
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="Chunk 1"):
+        decrypt_file(crypto, path, tmp_path / "out")
+    assert not (tmp_path / "out").exists()
+
+
+def test_reordered_chunks_are_rejected(sealed, crypto, tmp_path):
+    _, path = sealed
+    parts = chunks(path)
+    parts[0], parts[1] = parts[1], parts[0]
+    write_chunks(path, parts)
+    with pytest.raises(ValueError):
+        decrypt_file(crypto, path, tmp_path / "out")
+
+
+@pytest.mark.parametrize("keep", [1, 4])
+def test_truncated_file_is_rejected(sealed, crypto, tmp_path, keep):
+    _, path = sealed
+    # Whole chunks dropped at the end: the last one left isn't flagged last
+    write_chunks(path, chunks(path)[:keep])
+    with pytest.raises(ValueError):
+        decrypt_file(crypto, path, tmp_path / "out")
+
+
+def test_cut_last_chunk_is_rejected(sealed, crypto, tmp_path):
+    _, path = sealed
+    path.write_bytes(path.read_bytes()[:-3])
+    with pytest.raises(ValueError):
+        decrypt_file(crypto, path, tmp_path / "out")
+
+
+def test_header_and_key_are_authenticated(sealed, crypto, tmp_path):
+    _, path = sealed
+    with pytest.raises(ValueError):
+        decrypt_file(crypto, path, tmp_path / "out", associated_data=b"other")
+
+    other = CryptoManager.from_key(CryptoManager.generate_key())
+    with pytest.raises(ValueError):
+        decrypt_file(other, path, tmp_path / "out")
@@ -0,0 +1,46 @@
+import json
+
+from auth.auth import AuthManager
+from auth.store import USERS_JSON, open_user_store
+from models.auth_model import UserLoginModel
+
+
+def test_users_json_is_migrated(isolated_cfg):
+    hashed = AuthManager().hash_password("Passw0rd!x")
+    users = {
+        "alice": {"hash": hashed, "vault_salt": "ab" * 32, "created_at": 5.0},
+        "broken": {"vault_salt": "cd"},  # No hash, skipped
+    }
+    json_path = isolated_cfg.config_dir / USERS_JSON
+    json_path.write_text(json.dumps(users))
+
+    auth = AuthManager()
+    assert not json_path.exists()
+    assert json_path.with_name(USERS_JSON + ".migrated").exists()
+    assert auth.store.get("alice") == users["alice"]
+    assert auth.store.get("broken") is None
+    assert auth.verify_user(
+        UserLoginModel(username="alice", password="Passw0rd!x")
+    ).success
+
+
+def test_migration_keeps_existing_users(isolated_cfg):
+    store = open_user_store(isolated_cfg.config_dir)
+    store.add("alice", {"hash": "current", "vault_salt": "", "created_at": 1.0})
+
+    json_path = isolated_cfg.config_dir / USERS_JSON
+    json_path.write_text(
+        json.dumps({"alice": {"hash": "old"}, "bob": {"hash": "bob's"}})
+    )
+    assert store.migrate_json(json_path) == 1
+    assert store.get("alice")["hash"] == "current"
+    assert store.get("bob")["hash"] == "bob's"
+    assert store.migrate_json(json_path) == 0  # Already renamed
+
+
+def test_broken_users_json_is_left_in_place(isolated_cfg):
+    json_path = isolated_cfg.config_dir / USERS_JSON
+    json_path.write_text("{not json")
+    store = open_user_store(isolated_cfg.config_dir)
+    assert json_path.exists()
+    assert store.get("alice") is None
@@ -0,0 +1,152 @@
+import pytest
+
+from crypto.crypto import CryptoManager
+from keys.vault import VaultManager
+from models.vault_model import EncryptedVaultEntryModel, VaultEntryModel
+
+SALT = b"s" * 32
+
+
+def open_vault(password: str = "pw") -> VaultManager:
+    return VaultManager("bob", CryptoManager(password, SALT))
+
+
+def entry(service: str, username: str = "user", notes: str = "") -> VaultEntryModel:
+    return VaultEntryModel(
+        service=service, username=username, password="p", notes=notes
+    )
+
+
+@pytest.fixture
+def vault() -> VaultManager:
+    vault = open_vault()
+    yield vault
+    vault.close()
+
+
+def test_cached_view_is_reused_until_files_change(vault):
+    vault.add_entry(entry("a"))
+    state = vault.store._load_vault()
+    assert vault.store._load_vault() is state
+
+    # Other manager (other process) writes the same vault
+    other = open_vault()
+    other.add_entry(entry("b"))
+    other.close()
+
+    assert vault.store._load_vault() is not state
+    assert vault.list_services() == ["a", "b"]
+    assert vault.get_entry("b").username == "user"
+
+
+def test_transaction_commits_all_changes(vault):
+    vault.add_entry(entry("a"))
+    with vault.transaction():
+        vault.add_entry(entry("b"))
+        vault.delete_entry("a")
+        with vault.transaction():  # Nested one joins the outer
+            vault.add_entry(entry("c"))
+
+    vault.close()
+    vault = open_vault()
+    assert vault.list_services() == ["b", "c"]
+    vault.close()
+
+
+def test_transaction_rollback_restores_state(vault):
+    vault.add_entry(entry("a", username="before"))
+    vault.add_entry(entry("b"))
+
+    with pytest.raises(RuntimeError):
+        with vault.transaction():
+            vault.add_entry(entry("a", username="after"))
+            vault.delete_entry("b")
+            vault.add_entry(entry("c"))
+            raise RuntimeError("abort")
+
+    assert vault.list_services() == ["a", "b"]
+    assert vault.get_entry("a").username == "before"
+    assert vault.search_services("c") == []
+    vault.close()
+    vault = open_vault()
+    assert vault.list_services() == ["a", "b"]
+    vault.close()
+
+
+def test_username_lookup_ignores_case_and_unicode_form(vault):
+    vault.add_entry(entry("a", username="Alice@Example.com"))
+    vault.add_entry(entry("b", username="ｂｏｂ"))  # Fullwidth form
+    vault.add_entry(entry("c", username="carol"))
+
+    assert vault.find_by_username("  alice@example.COM ") == ["a"]
+    assert vault.find_by_username("BOB") == ["b"]
+    assert vault.find_by_username("dave") == []
+    # Tokens are stored, the username itself is not
+    assert "alice" not in vault.store.get("a").username_index.lower()
+
+
+def test_username_index_is_backfilled(vault):
+    vault.add_entry(entry("a", username="alice"))
+    vault.store.put(vault.store.get("a").model_copy(update={"username_index": ""}))
+
+    assert vault.find_by_username("Alice") == ["a"]
+    assert vault.store.get("a").username_index
+
+
+def test_data_key_is_unwrapped_from_key_slot(vault):
+    vault.add_entry(entry("a"))
+    data_key = bytes(vault.crypto.key.view())
+    slot = vault.metadata.key_slots[SALT.hex()]
+
+    # Entries are encrypted with a random data key, not the password key
+    password_key = CryptoManager("pw", SALT)
+    assert bytes(password_key.key.view()) != data_key
+    assert bytes(password_key.unwrap_key(slot.wrapped_key).view()) == data_key
+
+    vault.close()
+    vault = open_vault()
+    assert bytes(vault.crypto.key.view()) == data_key
+    assert vault.get_entry("a").username == "user"
+    vault.close()
+    with pytest.raises(ValueError):
+        open_vault("wrong")
+
+
+def test_unlock_uses_kdf_parameters_of_vault(vault, isolated_cfg):
+    vault.add_entry(entry("a"))
+    assert vault.metadata.key_slots[SALT.hex()].iterations == 1000
+    vault.close()
+
+    # Other settings later: the vault still opens with its own parameters
+    isolated_cfg.data.PBKDF2_ITERATIONS = 2000
+    vault = VaultManager.unlock("bob", "pw", SALT)
+    assert vault.crypto.salt == SALT
+    assert vault.get_entry("a").username == "user"
+    assert vault.kdf_outdated()
+    vault.close()
+
+
+def test_entry_is_one_token_bound_to_service(vault):
+    encrypted = vault.encrypt_entry(entry("a", notes="n"))
+    assert encrypted.sealed
+    assert (encrypted.username, encrypted.password, encrypted.notes) == ("", "", "")
+    assert vault.decrypt_entry(encrypted).notes == "n"
+
+    # Token moved to another entry doesn't open
+    moved = encrypted.model_copy(update={"service": "b"})
+    with pytest.raises(ValueError):
+        vault.decrypt_entry(moved)
+
+
+def test_early_per_field_entry_is_read(vault):
+    vault.add_encrypted_entry(
+        EncryptedVaultEntryModel(
+            service="old",
+            username=vault.crypto.encrypt_data("alice"),
+            password=vault.crypto.encrypt_data("p"),
+            notes="",
+            created_at=1,
+        )
+    )
+    found = vault.get_entry("old")
+    assert (found.username, found.password, found.notes) == ("alice", "p", "")